@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+# --- CONFIGURATION ---
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+# Third-party imports the dashboard used to pay for on every cold start, then its own modules
+MODULES = [
+    'streamlit', 'pandas', 'numpy', 'altair', 'nba_api.live.nba.endpoints.scoreboard',
+    'pymssql', 'sklearn', 'joblib',
+    'dashboard_common', 'model_artifact', 'storage', 'replay_chart', 'live_tab', 'history_tab',
+]
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+# AppTest runs the script headless, exactly as a first page load would, without a browser
+RENDER_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=300)
+app.run()
+elapsed = time.perf_counter() - start
+heavy = [m for m in ('nba_api', 'altair', 'sklearn', 'pymssql', 'pyodbc', 'joblib') if m in sys.modules]
+print(elapsed, len(app.exception), ','.join(heavy))
+"""
+
+
+def run_fresh(code, cwd):
+    """Run a snippet in a new interpreter (nothing cached) and return its stdout, or None on failure."""
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def bench_imports(cwd, runs=RUNS):
+    """Median cold import time per module in seconds (None if it is not installed)."""
+    timings = {}
+    for module in MODULES:
+        samples = [run_fresh(IMPORT_SNIPPET.format(module=module), cwd) for _ in range(runs)]
+        samples = [float(s) for s in samples if s is not None]
+        timings[module] = statistics.median(samples) if samples else None
+    return timings
+
+
+def bench_first_render(app_path, runs=RUNS):
+    """Median wall time from a bare interpreter to the first full script run of the app."""
+    samples, exceptions, heavy = [], 0, ''
+    for _ in range(runs):
+        out = run_fresh(RENDER_SNIPPET.format(app=os.path.abspath(app_path)), os.path.dirname(os.path.abspath(app_path)))
+        if out is None:
+            continue
+        elapsed, n_exc, *rest = out.split(' ')
+        samples.append(float(elapsed))
+        exceptions = int(n_exc)
+        heavy = rest[0] if rest else ''
+    return {
+        'first_render_s': statistics.median(samples) if samples else None,
+        'exceptions': exceptions,
+        'heavy_modules_loaded': heavy.split(',') if heavy else [],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure dashboard import time and time-to-first-render")
+    parser.add_argument('--app', default=os.path.join(ROOT, 'app.py'),
+                        help="Script to benchmark (point at another checkout's app.py to compare)")
+    parser.add_argument('--runs', type=int, default=RUNS, help="Fresh interpreters per measurement")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    print(f"Cold import times (median of {args.runs} fresh interpreters):")
+    imports = bench_imports(os.path.dirname(os.path.abspath(args.app)), args.runs)
+    for module, seconds in imports.items():
+        print(f"   {module:<40} {'not installed' if seconds is None else f'{seconds * 1000:8.1f} ms'}")
+
+    print(f"\nTime to first render of '{args.app}':")
+    render = bench_first_render(args.app, args.runs)
+    if render['first_render_s'] is None:
+        print("   App failed to run under AppTest.")
+    else:
+        print(f"   {render['first_render_s'] * 1000:.1f} ms "
+              f"({render['exceptions']} exception element(s) on the page)")
+        print(f"   Heavy modules loaded by the first render: {', '.join(render['heavy_modules_loaded']) or 'none'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'app': args.app, 'imports_s': imports, **render}, f, indent=2)
@@ -0,0 +1,347 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import traceback
+import subprocess
+import contextlib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import storage                      # noqa: E402
+import game_blobs                   # noqa: E402
+import instrumentation              # noqa: E402
+import season_store                 # noqa: E402
+import replay_engine                # noqa: E402
+import monte_carlo                  # noqa: E402
+import model_artifact               # noqa: E402
+import win_prob_lookup              # noqa: E402
+import ingest_v6_teams              # noqa: E402
+import train_model_rf               # noqa: E402
+from synthetic_pbp import write_seasons   # noqa: E402
+
+# --- CONFIGURATION ---
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+RESULTS_PATH = 'bench_results.json'
+BASE_GAMES = 246                # Games per season at --scale 1 (a fifth of a season keeps a run under a minute)
+BACKEND = 'sqlite'              # Local stand-in for Azure SQL ('sqlite' or 'parquet')
+CPUS = 1                        # Cores the run is pinned to, so results from bigger machines stay comparable
+THRESHOLD = 0.25                # Allowed relative slowdown before a metric counts as a regression
+MICRO_THRESHOLD = 1.0           # Default for metrics in 'us': microsecond timings jitter by more than 25%
+# Short timings jitter more between runs, so they get more room (1.0 = twice as slow)
+THRESHOLDS = {
+    'train.export_lr_s': 1.0,
+    'infer.surface_build_rows_per_s': 0.5,
+    'infer.lr.batch_rows_per_s': 1.0,
+    'infer.surface.batch_rows_per_s': 1.0,
+    'sim.fit_rows_per_s': 0.5,
+    'replay.blob_ms': 0.5,
+    'replay.frames_ms': 0.5,
+}
+# Run settings that must match the baseline's for a slowdown to count as a regression
+COMPARABLE = ('backend', 'seasons', 'games_per_season', 'cpus')
+SINGLE_CALLS = 500              # Single-row predict_proba calls timed per predictor
+BATCH_ROWS = 10000              # Rows per batched predict_proba call
+BATCH_CALLS = 20                # Batched calls timed per predictor
+TIME_BUDGET = 5.0               # Seconds a timing loop may run before it settles for fewer calls (min 3)
+REPLAY_GAMES = 50               # Games replayed per replay benchmark
+
+
+class Results:
+    """Metric name -> {value, unit, better}; better is 'lower' or 'higher'."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.errors = {}
+
+    def add(self, name, value, unit, better='lower'):
+        self.metrics[name] = {'value': float(value), 'unit': unit, 'better': better}
+        print(f"   {name:<34}{value:>14.3f} {unit}")
+
+    @contextlib.contextmanager
+    def section(self, name):
+        """Run one benchmark; a failure (e.g. out of memory at 100x) is recorded and the rest still run."""
+        print(f"\n[{name}]")
+        try:
+            yield
+        except Exception as exc:
+            self.errors[name] = f"{type(exc).__name__}: {exc}"
+            print(f"   FAILED: {self.errors[name]}")
+            traceback.print_exc()
+
+
+def timed(func, *args, **kwargs):
+    """(result, seconds) of one call."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def quiet(func, *args, **kwargs):
+    """Call a pipeline entry point without its progress prints."""
+    with contextlib.redirect_stdout(open(os.devnull, 'w')) as devnull:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            devnull.close()
+
+
+def median_call_us(func, calls, budget=TIME_BUDGET):
+    """Median wall time of up to `calls` calls in microseconds, after one warm-up call.
+
+    Stops early once `budget` seconds are spent, so slow predictors at large scales still finish.
+    """
+    func()
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < calls and (len(samples) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1e6
+
+
+# --- BENCHMARKS ---
+def bench_ingest(results, csv_paths, store_path, work_dir):
+    """Transform throughput on its own, then the full ingest into the local store."""
+    df, read_s = timed(lambda: pd.concat(
+        [pd.read_csv(p, usecols=ingest_v6_teams.read_pbp_columns) for p in csv_paths], ignore_index=True))
+    results.add('ingest.read_rows_per_s', len(df) / read_s, 'rows/s', 'higher')
+    upload_df, transform_s = timed(ingest_v6_teams.transform_games, df, verbose=False)
+    results.add('ingest.transform_rows_per_s', len(df) / transform_s, 'rows/s', 'higher')
+    rows = len(df)
+    del df, upload_df
+
+    ingest_v6_teams.STORAGE_BACKEND = train_model_rf.STORAGE_BACKEND = BACKEND
+    ingest_v6_teams.LOCAL_STORE_PATH = train_model_rf.LOCAL_STORE_PATH = store_path
+    # The loader's checkpoint stays in the work dir, which is removed with the run
+    _, load_s = timed(quiet, ingest_v6_teams.ingest_teams_fix, csv_paths,
+                      checkpoint_path=os.path.join(work_dir, 'ingest_checkpoint.json'))
+    results.add('ingest.full_rows_per_s', rows / load_s, 'rows/s', 'higher')
+    return rows
+
+
+def last_span(name, **labels):
+    """Seconds of the most recent `name` span with these labels (see instrumentation.span)."""
+    series = instrumentation.REGISTRY.histograms[(name, tuple(sorted(labels.items())))]
+    return series.samples[-1]
+
+
+def bench_training(results, model_dir):
+    """Aggregated read and the RF/LR fits of train_model_rf; both models are exported as artifacts."""
+    store = train_model_rf.get_store()
+    counts, read_s = timed(store.read_training_counts)
+    results.add('train.read_rows_per_s', counts['Plays'].sum() / read_s, 'rows/s', 'higher')
+    train, _ = train_model_rf.split_counts(counts)
+    models = quiet(train_model_rf.fit_models, train[train_model_rf.FEATURES], train['HomeWin'],
+                   sample_weight=train['Plays'])
+    # fit_models times each estimator into the train.fit histogram; rows are the unique weighted states
+    for name in ('RF', 'LR'):
+        results.add(f'train.fit_{name.lower()}_rows_per_s', len(train) / last_span('train.fit', model=name),
+                    'rows/s', 'higher')
+
+    predictors = {}
+    for name, model in zip(('rf', 'lr'), models):
+        path = os.path.join(model_dir, name)
+        _, export_s = timed(model_artifact.export_model, model, path)
+        results.add(f'train.export_{name}_s', export_s, 's')
+        predictors[name] = model_artifact.load_model(path)
+    return predictors
+
+
+def bench_inference(results, predictors):
+    """Single-row latency (the live tab's call) and batched throughput (replays, bulk scoring)."""
+    rng = np.random.default_rng(0)
+    single = pd.DataFrame({'ScoreMargin': [5], 'TimeRemainingSec': [600]})
+    batch = pd.DataFrame({
+        'ScoreMargin': rng.integers(-30, 31, BATCH_ROWS),
+        'TimeRemainingSec': rng.integers(0, win_prob_lookup.MAX_SECONDS + 1, BATCH_ROWS),
+    })
+    surface, build_s = timed(win_prob_lookup.build_surface, predictors['lr'])
+    results.add('infer.surface_build_rows_per_s', surface.size / build_s, 'rows/s', 'higher')
+    predictors = {**predictors, 'surface': win_prob_lookup.WinProbabilitySurface(surface)}
+
+    for name, predictor in predictors.items():
+        results.add(f'infer.{name}.single_us', median_call_us(lambda: predictor.predict_proba(single), SINGLE_CALLS), 'us')
+        batch_us = median_call_us(lambda: predictor.predict_proba(batch), BATCH_CALLS)
+        results.add(f'infer.{name}.batch_rows_per_s', BATCH_ROWS / (batch_us / 1e6), 'rows/s', 'higher')
+
+
+def bench_simulation(results, store_path):
+    """Fit the Monte Carlo simulator from the store and time a full live slate."""
+    df = storage.open_store(BACKEND, path=store_path).read_game_states(['GameID', 'Quarter', 'HomeScore', 'AwayScore'])
+    params, fit_s = timed(monte_carlo.fit_params, df)
+    results.add('sim.fit_rows_per_s', len(df) / fit_s, 'rows/s', 'higher')
+    sims_per_s, slate_s, _ = monte_carlo.benchmark(monte_carlo.Simulator(params, seed=0), calls=5)
+    results.add('sim.sims_per_s', sims_per_s, 'sims/s', 'higher')
+    results.add('sim.slate_ms', slate_s * 1000, 'ms')
+
+
+def bench_replay(results, store_path, season_dir, predictor):
+    """Per-game cost of each replay source and of turning plays into chart frames."""
+    store = storage.open_store(BACKEND, path=store_path)
+    game_ids = store.search_games(limit=REPLAY_GAMES)['GameID'].tolist()
+    n = len(game_ids)
+
+    games, read_s = timed(lambda: [store.read_game(g) for g in game_ids])
+    results.add('replay.read_game_ms', read_s / n * 1000, 'ms')
+    _, blob_s = timed(lambda: [game_blobs.decode_game(store.read_game_blob(g)) for g in game_ids])
+    results.add('replay.blob_ms', blob_s / n * 1000, 'ms')
+
+    _, build_s = timed(season_store.build, store, season_dir)
+    resident = season_store.SeasonStore(season_dir)
+    resident.load()
+    results.add('replay.season_store_rows_per_s', len(resident._plays) / build_s, 'rows/s', 'higher')
+    _, slice_s = timed(lambda: [resident.game(g) for g in game_ids])
+    results.add('replay.resident_us', slice_s / n * 1e6, 'us')
+
+    _, frames_s = timed(lambda: [replay_engine.compute_win_curve(predictor, g) for g in games])
+    results.add('replay.frames_ms', frames_s / n * 1000, 'ms')
+
+
+# --- BASELINE ---
+def threshold_for(name, metric, default_threshold=THRESHOLD):
+    """Allowed slowdown for one metric: its THRESHOLDS entry, else MICRO_THRESHOLD for 'us' timings."""
+    if name in THRESHOLDS:
+        return THRESHOLDS[name]
+    return max(MICRO_THRESHOLD, default_threshold) if metric['unit'] == 'us' else default_threshold
+
+
+def compare(results, baseline, default_threshold=THRESHOLD):
+    """Relative change of every shared metric; returns the names that regressed past their threshold.
+
+    Against a baseline recorded with other COMPARABLE settings the table is informational only.
+    """
+    differs = [key for key in COMPARABLE if baseline['meta'].get(key) != results['meta'][key]]
+    if differs:
+        was = ', '.join(f"{key}={baseline['meta'].get(key)}" for key in differs)
+        now = ', '.join(f"{key}={results['meta'][key]}" for key in differs)
+        print(f"\nNote: the baseline was recorded with {was} (this run: {now}); "
+              f"changes are shown but not counted as regressions.")
+    print(f"\n{'Metric':<36}{'Baseline':>14}{'Now':>14}{'Change':>10}")
+    regressions = []
+    for name, now in results['metrics'].items():
+        base = baseline['metrics'].get(name)
+        if base is None or base['value'] == 0:
+            continue
+        change = now['value'] / base['value'] - 1
+        # As a relative slowdown, whichever direction the metric improves in
+        if now['better'] == 'lower':
+            slowdown = change
+        else:
+            slowdown = base['value'] / now['value'] - 1 if now['value'] > 0 else float('inf')
+        flag = ''
+        if slowdown > threshold_for(name, now, default_threshold):
+            flag = '  REGRESSION' if not differs else '  (slower)'
+            if not differs:
+                regressions.append(name)
+        print(f"{name:<36}{base['value']:>14.3f}{now['value']:>14.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def pin_cpus(n):
+    """Pin this process to `n` of its allowed cores where the OS supports it; returns the cores in use."""
+    if not hasattr(os, 'sched_setaffinity'):
+        return os.cpu_count()
+    allowed = sorted(os.sched_getaffinity(0))
+    if n:
+        os.sched_setaffinity(0, allowed[:n])
+    return len(os.sched_getaffinity(0))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(scale=1, seasons=1, games=BASE_GAMES, seed=0, work_dir=None):
+    """Generate the synthetic seasons, run every benchmark and return the results document."""
+    games_per_season = max(int(games * scale), 1)
+    work_dir = work_dir or tempfile.mkdtemp(prefix='nba_bench_')
+    results = Results()
+    print(f"Generating {seasons} season(s) x {games_per_season} games in '{work_dir}'...")
+    csv_paths, rows = write_seasons(os.path.join(work_dir, 'csv'), seasons, games_per_season, seed=seed)
+    print(f"   {rows} plays.")
+
+    store_path = os.path.join(work_dir, 'store.db' if BACKEND == 'sqlite' else 'store')
+    predictors = {}
+    with results.section('ingest'):
+        bench_ingest(results, csv_paths, store_path, work_dir)
+    with results.section('training'):
+        predictors = bench_training(results, os.path.join(work_dir, 'models'))
+    if predictors:
+        with results.section('inference'):
+            bench_inference(results, predictors)
+        with results.section('simulation'):
+            bench_simulation(results, store_path)
+        with results.section('replay'):
+            bench_replay(results, store_path, os.path.join(work_dir, 'season_store'), predictors['lr'])
+
+    return {
+        'meta': {
+            'scale': scale, 'seasons': seasons, 'games_per_season': games_per_season, 'plays': rows,
+            'seed': seed, 'backend': BACKEND, 'commit': git_commit(),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count(),
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        'metrics': results.metrics,
+        'errors': results.errors,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ingest, training, inference and replay on synthetic data")
+    parser.add_argument('--scale', type=float, default=1, help="Multiply the games per season (e.g. 10, 100)")
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--games', type=int, default=BASE_GAMES, help="Games per season at scale 1")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', default=BACKEND, choices=['sqlite', 'parquet'], help="Local store to benchmark")
+    parser.add_argument('--out', default=RESULTS_PATH, help="Write the results JSON here")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Compare against this results file")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="Relative slowdown that fails the run (per-metric overrides in THRESHOLDS)")
+    parser.add_argument('--save-baseline', action='store_true', help="Also write the results as the new baseline")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated CSVs and stores")
+    parser.add_argument('--cpus', type=int, default=CPUS, help="Cores to pin the run to (0 = all allowed)")
+    args = parser.parse_args()
+
+    BACKEND = args.backend
+    print(f"Pinned to {pin_cpus(args.cpus)} CPU(s).")
+    work_dir = tempfile.mkdtemp(prefix='nba_bench_')
+    try:
+        report = run(args.scale, args.seasons, args.games, args.seed, work_dir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to '{args.out}' (peak RSS {report['meta']['peak_rss_mb']:.0f} MB).")
+
+    status = 1 if report['errors'] else 0
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved as the baseline in '{args.baseline}'.")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+            status = 1
+        else:
+            print("\nNo regressions.")
+    sys.exit(status)
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ingest_v6_teams              # noqa: E402
+from synthetic_pbp import generate_games, inject_malformed   # noqa: E402
+
+# --- CONFIGURATION ---
+GAMES = 300
+MALFORMED_RATE = 0.01           # Share of rows with a malformed clock or margin
+# Columns the row-wise transform produced; later columns (Season, GameDate) have no reference
+COLUMNS = ['GameID', 'HomeTeamID', 'AwayTeamID', 'Quarter', 'TimeRemainingSec', 'HomeScore', 'AwayScore', 'HomeWin']
+
+
+# --- REFERENCE: the row-wise transform the vectorized kernels replaced, unchanged ---
+def time_to_seconds(time_str):
+    """Convert time string (MM:SS) to total seconds."""
+    try:
+        if pd.isna(time_str): return 0
+        minutes, seconds = map(int, time_str.split(':'))
+        return minutes * 60 + seconds
+    except:
+        return 0
+
+
+def transform_games_rowwise(df):
+    # --- 1. DERIVE HOME/AWAY TEAMS ---
+    home_events = df.dropna(subset=['HOMEDESCRIPTION', 'PLAYER1_TEAM_ID'])
+    away_events = df.dropna(subset=['VISITORDESCRIPTION', 'PLAYER1_TEAM_ID'])
+
+    home_map = home_events.groupby('GAME_ID')['PLAYER1_TEAM_ID'].agg(
+        lambda x: x.mode().iloc[0] if not x.mode().empty else 0)
+    away_map = away_events.groupby('GAME_ID')['PLAYER1_TEAM_ID'].agg(
+        lambda x: x.mode().iloc[0] if not x.mode().empty else 0)
+
+    df['HomeTeamID'] = df['GAME_ID'].map(home_map).fillna(0).astype(int)
+    df['AwayTeamID'] = df['GAME_ID'].map(away_map).fillna(0).astype(int)
+
+    # --- 2. CLEAN MARGIN & TIME ---
+    df['SCOREMARGIN'] = df['SCOREMARGIN'].astype(str).replace('TIE', '0').replace('nan', np.nan)
+    df['SCOREMARGIN'] = df.groupby('GAME_ID')['SCOREMARGIN'].ffill().fillna('0')
+    df['Margin'] = pd.to_numeric(df['SCOREMARGIN'], errors='coerce').fillna(0)
+
+    df['ClockSeconds'] = df['PCTIMESTRING'].apply(time_to_seconds)
+    df['Quarter'] = df['PERIOD']
+    df['TrueTimeSec'] = ((4 - df['Quarter']) * 720) + df['ClockSeconds']
+    df.loc[df['Quarter'] > 4, 'TrueTimeSec'] = df['ClockSeconds']
+
+    # --- 3. RECONSTRUCT SCORES ---
+    df = df.sort_values(['GAME_ID', 'EVENTNUM'], ascending=[True, True])
+    df['PrevMargin'] = df.groupby('GAME_ID')['Margin'].shift(1).fillna(0)
+    df['Delta'] = df['Margin'] - df['PrevMargin']
+
+    df['HomePoints'] = np.where(df['Delta'] > 0, df['Delta'], 0)
+    df['AwayPoints'] = np.where(df['Delta'] < 0, abs(df['Delta']), 0)
+    df['HomeScore'] = df.groupby('GAME_ID')['HomePoints'].cumsum()
+    df['AwayScore'] = df.groupby('GAME_ID')['AwayPoints'].cumsum()
+
+    # --- 4. DETERMINE WINNER ---
+    final_scores = df.sort_values(['GAME_ID', 'EVENTNUM'], ascending=[True, False]) \
+        .groupby('GAME_ID').head(1)[['GAME_ID', 'HomeScore', 'AwayScore']]
+    final_scores['HomeWin'] = np.where(final_scores['HomeScore'] > final_scores['AwayScore'], 1, 0)
+    df = df.merge(final_scores[['GAME_ID', 'HomeWin']], on='GAME_ID', how='left')
+
+    # --- 5. PREPARE UPLOAD ---
+    upload_df = pd.DataFrame()
+    upload_df['GameID'] = df['GAME_ID'].astype(str)
+    upload_df['HomeTeamID'] = df['HomeTeamID']
+    upload_df['AwayTeamID'] = df['AwayTeamID']
+    upload_df['Quarter'] = df['Quarter']
+    upload_df['TimeRemainingSec'] = df['TrueTimeSec']
+    upload_df['HomeScore'] = df['HomeScore']
+    upload_df['AwayScore'] = df['AwayScore']
+    upload_df['HomeWin'] = df['HomeWin']
+
+    return upload_df.dropna(subset=['Quarter'])
+
+
+# --- CHECK ---
+def compare(games=GAMES, rate=MALFORMED_RATE, seed=0):
+    """Run both transforms on the same fixture CSV; returns (mismatch messages, rows, speedup)."""
+    fixture = inject_malformed(generate_games(games, seed=seed), rate, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Round-trip through a CSV so both transforms see exactly what the ingest reads
+        path = os.path.join(tmp, 'fixture_pbp.csv')
+        fixture.to_csv(path, index=False)
+        raw = pd.read_csv(path, usecols=ingest_v6_teams.read_pbp_columns)
+
+    start = time.perf_counter()
+    expected = transform_games_rowwise(raw.copy()).reset_index(drop=True)
+    rowwise_s = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = ingest_v6_teams.transform_games(raw.copy(), verbose=False)[COLUMNS].reset_index(drop=True)
+    vectorized_s = time.perf_counter() - start
+
+    problems = []
+    if len(expected) != len(actual):
+        problems.append(f"row count {len(actual)} != {len(expected)}")
+    else:
+        for col in COLUMNS:
+            # Values must match; the dtypes may differ (the row-wise scores were floats)
+            same = expected[col].astype(str) == actual[col].astype(str) if col == 'GameID' else \
+                np.asarray(expected[col], dtype=np.float64) == np.asarray(actual[col], dtype=np.float64)
+            if not same.all():
+                first = int(np.flatnonzero(~np.asarray(same))[0])
+                problems.append(f"{col}: {int((~np.asarray(same)).sum())} rows differ, first at row {first} "
+                                f"({actual[col].iloc[first]!r} != {expected[col].iloc[first]!r})")
+    return problems, len(raw), rowwise_s / vectorized_s
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the vectorized ingest transform against the row-wise one")
+    parser.add_argument('--games', type=int, default=GAMES)
+    parser.add_argument('--malformed', type=float, default=MALFORMED_RATE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    problems, rows, speedup = compare(args.games, args.malformed, args.seed)
+    print(f"Compared {rows} plays in {args.games} games ({args.malformed:.1%} malformed clocks/margins).")
+    for problem in problems:
+        print(f"   MISMATCH {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"   Identical output; vectorized transform {speedup:.1f}x faster.")
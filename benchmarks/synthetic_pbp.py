@@ -0,0 +1,156 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+TEAM_IDS = np.arange(1610612737, 1610612767)   # The 30 NBA franchises
+GAMES_PER_SEASON = 1230
+EVENTS_PER_GAME = (420, 500)    # Play-by-play rows per regulation game (uniform range)
+OT_EVENTS = (45, 60)            # Rows per overtime period
+ATTEMPT_RATE = 0.45             # Share of events that end a possession (shot or trip to the line)
+MAKE_RATE = 0.5                 # Chance a possession scores, before strength and home court
+POINTS = np.array([1, 2, 3])
+POINT_WEIGHTS = np.array([0.12, 0.62, 0.26])
+HOME_EDGE = 0.007               # Home court: added to the home side's make rate
+STRENGTH_SD = 0.015             # Spread of per-team strength (added to the make rate)
+UNCREDITED_RATE = 0.05          # Events without a PLAYER1_TEAM_ID (timeouts, period starts, ...)
+SEASON_START = '10-16'          # Month-day of opening night; games spread over 170 days
+SEASON_DAYS = 170
+
+SCORING_TEXT = np.array(['Jump Shot: Made', 'Layup: Made', 'Free Throw 1 of 2', '3PT Jump Shot: Made'])
+OTHER_TEXT = np.array(['MISS Jump Shot', 'Rebound', 'Turnover: Bad Pass', 'Personal Foul', 'Timeout'])
+# Values seen in (or plausible for) hand-edited exports; the ingest must treat them like the old transform did
+BAD_CLOCKS = np.array(['', ' 5:07', '5 : 07', '12', '5:07:00', 'x:30', '5:7a', '-0:05', '+1:00', '--'], dtype=object)
+BAD_MARGINS = np.array(['', 'abc', '+3', ' 4', '-', 'TIE ', '3.0', 'nan'], dtype=object)
+
+
+def _clock_strings(seconds):
+    """'M:SS' for every value, formatted once per distinct second."""
+    uniques, codes = np.unique(seconds, return_inverse=True)
+    labels = np.array([f"{s // 60}:{s % 60:02d}" for s in uniques], dtype=object)
+    return labels[codes]
+
+
+def generate_games(n_games, season=2018, seed=0, first_game=1):
+    """Play-by-play rows for `n_games` of one season, with the columns ingest_v6_teams.py reads.
+
+    Each game gets random home/away teams with a per-team strength and a home court edge, so
+    the label is learnable. Possessions alternate, which keeps final margins NBA-like. Scoring
+    events carry SCOREMARGIN (home minus away, 'TIE' at 0), every other event leaves it empty,
+    and tied games go to overtime until someone leads.
+    """
+    rng = np.random.default_rng([seed, season])
+    strength = rng.normal(0, STRENGTH_SD, len(TEAM_IDS))
+    frames = []
+    yy = season % 100
+    game_ids = 20000000 + yy * 100000 + first_game + np.arange(n_games)
+    dates = pd.Timestamp(f"{season}-{SEASON_START}") + pd.to_timedelta(
+        np.sort(rng.integers(0, SEASON_DAYS, n_games)), unit='D')
+
+    for game_id, date in zip(game_ids, dates):
+        home, away = rng.choice(len(TEAM_IDS), 2, replace=False)
+        edge = HOME_EDGE + strength[home] - strength[away]
+
+        blocks, margin, period_no = [], 0, 0
+        while period_no < 4 or margin == 0:
+            regulation = period_no < 4
+            n = int(rng.integers(*EVENTS_PER_GAME)) // 4 if regulation else int(rng.integers(*OT_EVENTS))
+            length = 720 if regulation else 300
+            clock = length - np.floor(np.sort(rng.uniform(0, length, n))).astype(int)
+            clock[-1] = 0
+            # Possession-ending events alternate sides; rebounds, fouls etc. fall to either team
+            attempt = rng.random(n) < ATTEMPT_RATE
+            home_side = np.where(attempt, (np.cumsum(attempt) + rng.integers(2)) % 2 == 0, rng.random(n) < 0.5)
+            scoring = attempt & (rng.random(n) < np.where(home_side, MAKE_RATE + edge, MAKE_RATE - edge))
+            points = np.where(scoring, rng.choice(POINTS, n, p=POINT_WEIGHTS), 0)
+            if not regulation and margin + (points * np.where(home_side, 1, -1)).sum() == 0:
+                points[-1], scoring[-1] = 1, True   # Settle it at the horn
+            step = points * np.where(home_side, 1, -1)
+            margins = margin + np.cumsum(step)
+            margin = int(margins[-1])
+            period_no += 1
+            blocks.append((np.full(n, period_no), clock, home_side, scoring, margins))
+
+        period = np.concatenate([b[0] for b in blocks])
+        clock = np.concatenate([b[1] for b in blocks])
+        home_side = np.concatenate([b[2] for b in blocks])
+        scoring = np.concatenate([b[3] for b in blocks])
+        margins = np.concatenate([b[4] for b in blocks])
+        n = len(period)
+
+        text = np.where(scoring, SCORING_TEXT[rng.integers(0, len(SCORING_TEXT), n)],
+                        OTHER_TEXT[rng.integers(0, len(OTHER_TEXT), n)]).astype(object)
+        team = np.where(home_side, TEAM_IDS[home], TEAM_IDS[away]).astype(float)
+        team[rng.random(n) < UNCREDITED_RATE] = np.nan
+        score_margin = np.where(margins == 0, 'TIE', margins.astype(str)).astype(object)
+        score_margin[~scoring] = None
+
+        frames.append(pd.DataFrame({
+            'GAME_ID': game_id,
+            'EVENTNUM': np.arange(1, n + 1),
+            'PERIOD': period,
+            'PCTIMESTRING': _clock_strings(clock),
+            'SCOREMARGIN': score_margin,
+            'PLAYER1_TEAM_ID': team,
+            'HOMEDESCRIPTION': np.where(home_side, text, None),
+            'VISITORDESCRIPTION': np.where(home_side, None, text),
+            'GAME_DATE': date.strftime('%Y-%m-%d'),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def inject_malformed(df, rate=0.01, seed=0):
+    """Copy of `df` with malformed clocks and margins in about `rate` of the rows, and some games
+    whose home side is credited to two teams equally often (a tie for the team derivation)."""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    df['PCTIMESTRING'] = df['PCTIMESTRING'].astype(object)
+    df['SCOREMARGIN'] = df['SCOREMARGIN'].astype(object)
+    bad = rng.random(len(df)) < rate
+    df.loc[bad, 'PCTIMESTRING'] = rng.choice(BAD_CLOCKS, bad.sum())
+    bad = rng.random(len(df)) < rate
+    df.loc[bad, 'SCOREMARGIN'] = rng.choice(BAD_MARGINS, bad.sum())
+
+    game_ids = df['GAME_ID'].unique()
+    for game_id in rng.choice(game_ids, max(1, int(len(game_ids) * rate * 10)), replace=False):
+        home = np.flatnonzero((df['GAME_ID'] == game_id).to_numpy() & df['HOMEDESCRIPTION'].notna().to_numpy()
+                              & df['PLAYER1_TEAM_ID'].notna().to_numpy())
+        home = home[:len(home) // 2 * 2]
+        team = df['PLAYER1_TEAM_ID'].iloc[home[0]]
+        other = TEAM_IDS[TEAM_IDS != team][0]
+        df.iloc[home[len(home) // 2:], df.columns.get_loc('PLAYER1_TEAM_ID')] = other
+        df.iloc[home[:len(home) // 2], df.columns.get_loc('PLAYER1_TEAM_ID')] = team
+    return df
+
+
+def write_seasons(out_dir, seasons=1, games_per_season=GAMES_PER_SEASON, first_season=2018, seed=0, malformed=0.0):
+    """One '<season>_pbp.csv' per season in `out_dir`; returns the paths and the total row count.
+
+    `malformed` > 0 runs each season through inject_malformed at that rate.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths, rows = [], 0
+    for season in range(first_season, first_season + seasons):
+        df = generate_games(games_per_season, season=season, seed=seed)
+        if malformed:
+            df = inject_malformed(df, malformed, seed=seed)
+        path = os.path.join(out_dir, f"{season}-{(season + 1) % 100:02d}_pbp.csv")
+        df.to_csv(path, index=False)
+        paths.append(path)
+        rows += len(df)
+    return paths, rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic play-by-play CSVs in the NBA stats export layout")
+    parser.add_argument('out_dir')
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--games', type=int, default=GAMES_PER_SEASON, help="Games per season")
+    parser.add_argument('--first-season', type=int, default=2018)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--malformed', type=float, default=0.0, help="Share of rows with a malformed clock/margin")
+    args = parser.parse_args()
+
+    paths, rows = write_seasons(args.out_dir, args.seasons, args.games, args.first_season, args.seed, args.malformed)
+    print(f"Wrote {rows} plays in {len(paths)} file(s) to '{args.out_dir}'.")
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+import storage
+import instrumentation
+from db_pool import ConnectionPool
+
+# --- CONFIGURATION ---
+WORKERS = 4                        # Parallel writer connections (capped by the store's max_writers)
+BATCH_BYTES = 4 * 1024 * 1024      # Target in-memory size of one insert batch
+WRITE_ATTEMPTS = 3                 # Tries per batch before the load is aborted
+CHECKPOINT_DIR = '.'                # Checkpoints are named after the store they load (see checkpoint_path_for)
+
+
+class LoadValidationError(Exception):
+    """Raised when the staged row counts do not match what was sent; GameStates is left untouched."""
+
+
+def checkpoint_path_for(store, directory=CHECKPOINT_DIR):
+    """Checkpoint file for loads into `store`; loads into different stores never share one."""
+    key = hashlib.sha1(store.identity().encode()).hexdigest()[:12]
+    return os.path.join(directory, f'ingest_checkpoint-{key}.json')
+
+
+class BulkLoader:
+    """Load GameStates into a staging area over parallel writers, validate it, then swap it in.
+
+    Batches are cut by bytes. The store records each batch's id in the same write as its rows,
+    and the checkpoint file keeps the batch size, so an interrupted run restarted with
+    resume=True re-cuts the same batches and only sends what is missing. The live table
+    keeps serving the previous data until the final atomic swap.
+    """
+
+    def __init__(self, store, workers=WORKERS, batch_bytes=BATCH_BYTES, checkpoint_path=None):
+        self.store = store
+        self.workers = max(1, min(workers, store.max_writers))
+        self.batch_bytes = batch_bytes
+        self.checkpoint_path = checkpoint_path or checkpoint_path_for(store)
+        self._checkpoint = None
+
+    # --- CHECKPOINT ---
+    def _read_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def _save_checkpoint(self):
+        tmp = f"{self.checkpoint_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._checkpoint, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    # --- BATCHING ---
+    def _batches(self, frames):
+        """Re-cut incoming frames into batches of a fixed row count derived from BATCH_BYTES."""
+        buffer = []
+        buffered = 0
+        for frame in frames:
+            if not len(frame):
+                continue
+            if self._checkpoint['batch_rows'] is None:
+                bytes_per_row = frame.memory_usage(index=False, deep=True).sum() / len(frame)
+                self._checkpoint['batch_rows'] = max(1000, int(self.batch_bytes / bytes_per_row))
+                self._save_checkpoint()   # Before the first batch is sent, so a resume cuts the same batches
+            batch_rows = self._checkpoint['batch_rows']
+
+            buffer.append(frame)
+            buffered += len(frame)
+            if buffered >= batch_rows:
+                pending = pd.concat(buffer, ignore_index=True)
+                full = len(pending) - len(pending) % batch_rows
+                for start in range(0, full, batch_rows):
+                    yield pending.iloc[start:start + batch_rows]
+                buffer = [pending.iloc[full:]]
+                buffered = len(buffer[0])
+
+        if buffered:
+            yield pd.concat(buffer, ignore_index=True)
+
+    def _write(self, batch_id, batch):
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                with instrumentation.span('ingest.write_batch'):
+                    self.store.write_game_states(batch, staging=True, batch_id=batch_id)
+                break
+            except Exception:
+                instrumentation.inc('ingest.write_retries')
+                if attempt == WRITE_ATTEMPTS - 1:
+                    raise
+                time.sleep(2 ** attempt)
+        return len(batch)
+
+    # --- LOAD ---
+    def load(self, frames, resume=False, metadata=None):
+        """Stage every frame, validate per-game row counts, and publish. Returns rows written.
+
+        `metadata`, if given, is called once every frame is staged and returns the manifest/
+        catalog/blobs keyword arguments that swap_staging publishes together with the data.
+        """
+        identity = self.store.identity()
+        self._checkpoint = self._read_checkpoint() if resume else None
+        if self._checkpoint is not None and self._checkpoint.get('store') != identity:
+            print(f"   Checkpoint '{self.checkpoint_path}' is not for {identity}; starting over.")
+            self._checkpoint = None
+        if self._checkpoint is None:
+            self._checkpoint = {'store': identity, 'batch_rows': None}
+            self.store.begin_staging(resume=False)
+            done = set()
+        else:
+            self.store.begin_staging(resume=True)
+            done = self.store.staged_batches()
+            print(f"   Resuming: {len(done)} batches already staged.")
+        self._save_checkpoint()
+
+        # One pooled connection per writer for the database backends
+        attached_pool = isinstance(self.store, storage.SQLGameStateStore) and self.store.pool is None
+        if attached_pool:
+            self.store.pool = ConnectionPool(self.store.open_connection, max_size=self.workers,
+                                             retryable=self.store.retryable_errors())
+
+        expected = []
+        written = 0
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                pending = set()
+                for batch_id, batch in enumerate(self._batches(frames)):
+                    expected.append(batch['GameID'].value_counts())
+                    if batch_id in done:
+                        continue
+
+                    # Keep at most two batches per worker in memory
+                    if len(pending) >= 2 * self.workers:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        written += sum(f.result() for f in finished)
+                    pending.add(executor.submit(self._write, batch_id, batch))
+
+                finished, _ = wait(pending)
+                written += sum(f.result() for f in finished)
+        finally:
+            if attached_pool:
+                self.store.pool.close()
+                self.store.pool = None
+
+        elapsed = time.perf_counter() - start
+        print(f"   Staged {written} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s, "
+              f"{self.workers} worker(s)).")
+
+        self._validate(expected)
+        self.store.swap_staging(**(metadata() if metadata else {}))
+        os.remove(self.checkpoint_path)
+        return written
+
+    def _validate(self, expected):
+        """Compare staged rows per game with what the pipeline produced."""
+        want = pd.concat(expected).groupby(level=0).sum() if expected else pd.Series(dtype='int64')
+        got = self.store.count_rows_by_game(staging=True)
+        want.index = want.index.astype(str)
+        got.index = got.index.astype(str)
+
+        diff = want.sub(got, fill_value=0)
+        bad = diff[diff != 0]
+        if len(bad):
+            raise LoadValidationError(
+                f"{len(bad)} game(s) have mismatched row counts in staging (e.g. {bad.head(5).to_dict()}); "
+                f"GameStates was not replaced. Re-run with --resume or start over."
+            )
+        print(f"   Validated {int(want.sum())} rows across {len(want)} games.")
@@ -0,0 +1,136 @@
+import os
+import streamlit as st
+import instrumentation
+
+# --- NBA TEAMS DICTIONARY ---
+NBA_TEAMS = {
+    1610612737: "Hawks", 1610612738: "Celtics", 1610612739: "Cavaliers",
+    1610612740: "Pelicans", 1610612741: "Bulls", 1610612742: "Mavericks",
+    1610612743: "Nuggets", 1610612744: "Warriors", 1610612745: "Rockets",
+    1610612746: "Clippers", 1610612747: "Lakers", 1610612748: "Heat",
+    1610612749: "Bucks", 1610612750: "Timberwolves", 1610612751: "Nets",
+    1610612752: "Knicks", 1610612753: "Magic", 1610612754: "Pacers",
+    1610612755: "76ers", 1610612756: "Suns", 1610612757: "Blazers",
+    1610612758: "Kings", 1610612759: "Spurs", 1610612760: "Thunder",
+    1610612761: "Raptors", 1610612762: "Jazz", 1610612763: "Grizzlies",
+    1610612764: "Wizards", 1610612765: "Pistons", 1610612766: "Hornets"
+}
+
+
+def secret(name, default=None):
+    """Read an app secret on first use, so startup never blocks on secrets a tab does not need."""
+    return st.secrets.get(name, default)
+
+
+# --- MODEL ---
+@st.cache_resource
+def load_model():
+    """Load the trained model from its memory-mapped artifact (no sklearn needed at runtime)."""
+    with instrumentation.span('model.load'):
+        import model_artifact
+
+        if os.path.exists(model_artifact.ARTIFACT_PATH):
+            return model_artifact.load_model(model_artifact.ARTIFACT_PATH)
+        if os.path.exists('nba_win_probability_model.pkl'):
+            # Legacy pickle: needs scikit-learn and joblib installed (see requirements-train.txt)
+            import joblib
+            return joblib.load('nba_win_probability_model.pkl')
+        return None
+
+
+@st.cache_resource
+def load_predictor(_model, backend):
+    """Return the object used for inference: the lookup surface, or the model itself."""
+    if _model is None or backend != "lookup":
+        return _model
+    import win_prob_lookup
+    return win_prob_lookup.load_or_build_surface(_model)
+
+
+def get_model_version():
+    """Content id of the loaded model artifact (None for a legacy pickle or no model)."""
+    return getattr(load_model(), 'version', None)
+
+
+def get_predictor():
+    """Inference object for the tabs, loaded by the first tab that scores anything."""
+    # "lookup" serves predictions from the precomputed surface, "model" calls the model directly
+    return load_predictor(load_model(), secret("INFERENCE_BACKEND", "lookup"))
+
+
+@st.cache_resource
+def get_simulator():
+    """Monte Carlo engine shown next to the model on live games (None when SIMULATOR is false)."""
+    if not secret("SIMULATOR", True):
+        return None
+    import monte_carlo
+    return monte_carlo.Simulator(monte_carlo.load_params(secret("SIMULATOR_PARAMS", monte_carlo.PARAMS_PATH)),
+                                 n_sims=int(secret("SIMULATIONS", monte_carlo.N_SIMS)))
+
+
+# --- PERFORMANCE ---
+def bind_session_metrics():
+    """Record this session's timings into a registry kept in session_state (besides the process one)."""
+    if 'perf_metrics' not in st.session_state:
+        st.session_state['perf_metrics'] = instrumentation.Registry()
+    instrumentation.bind_session(st.session_state['perf_metrics'])
+    start_metrics_export(secret("METRICS_PATH"))
+
+
+@st.cache_resource
+def start_metrics_export(path):
+    """Export the process registry to METRICS_PATH periodically (once per process; off when unset)."""
+    if path:
+        instrumentation.start_file_exporter(path, float(secret("METRICS_INTERVAL", instrumentation.EXPORT_INTERVAL)))
+    return path
+
+
+def performance_panel(slot):
+    """Hidden sidebar panel (?perf=1 or SHOW_PERFORMANCE) with p50/p95 of this session's spans."""
+    if not (st.query_params.get("perf") or secret("SHOW_PERFORMANCE", False)):
+        return
+    with slot.container():
+        with st.expander("⏱️ Performance", expanded=True):
+            scope = st.radio("Scope", ["This session", "Process"], horizontal=True, key="perf_scope")
+            registry = st.session_state['perf_metrics'] if scope == "This session" else instrumentation.REGISTRY
+            rows = []
+            for row in registry.summary():
+                label = row['name'] + ''.join(f" [{v}]" for v in row['labels'].values())
+                if 'value' in row:
+                    rows.append({"Metric": label, "Count": row['value'], "p50 ms": None, "p95 ms": None})
+                else:
+                    rows.append({"Metric": label, "Count": row['count'],
+                                 "p50 ms": round(row['p50_s'] * 1000, 2), "p95 ms": round(row['p95_s'] * 1000, 2)})
+            if rows:
+                st.dataframe(rows, hide_index=True)
+            else:
+                st.caption("Nothing measured yet.")
+            st.download_button("Prometheus metrics", instrumentation.REGISTRY.prometheus_text(),
+                               file_name="nba_metrics.prom", mime="text/plain")
+
+
+# --- HELPERS ---
+def format_time_label(seconds_remaining):
+    """Converts total seconds remaining into Quarter and Clock format (e.g., Q4 12:00)."""
+    if seconds_remaining > 2160:
+        q = "Q1"
+    elif seconds_remaining > 1440:
+        q = "Q2"
+    elif seconds_remaining > 720:
+        q = "Q3"
+    else:
+        q = "Q4"
+
+    rem_in_q = seconds_remaining % 720
+    if rem_in_q == 0 and seconds_remaining > 0: rem_in_q = 720
+
+    m = int(rem_in_q // 60)
+    s = int(rem_in_q % 60)
+    return f"{q} {m}:{s:02d}"
+
+
+def parse_iso8601_time(duration_str):
+    """Parses ISO 8601 duration strings (e.g., PT10M00S) from the live API; None if unreadable."""
+    if not duration_str: return 720
+    from live_details import parse_clock
+    return parse_clock(duration_str)
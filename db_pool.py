@@ -0,0 +1,169 @@
+import time
+import queue
+import random
+import threading
+from contextlib import contextmanager
+import instrumentation
+
+# --- CONFIGURATION ---
+MAX_SIZE = 4                # Connections shared by every Streamlit session in the process
+HEALTH_CHECK_AFTER = 30     # Seconds idle before a connection is pinged on checkout
+BACKOFF_BASE = 0.5          # First reconnect delay (seconds), doubled on each failure
+BACKOFF_MAX = 20            # Cap for a single reconnect delay
+CONNECT_ATTEMPTS = 6        # ~40s total, enough for a paused serverless database to resume
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class ConnectionPool:
+    """Thread-safe pool of warm DB-API connections with health checks and backoff reconnects."""
+
+    def __init__(self, connect, max_size=MAX_SIZE, health_check_sql='SELECT 1',
+                 health_check_after=HEALTH_CHECK_AFTER, connect_attempts=CONNECT_ATTEMPTS,
+                 retryable=(Exception,)):
+        self._connect = connect
+        self.max_size = max_size
+        self.health_check_sql = health_check_sql
+        self.health_check_after = health_check_after
+        self.connect_attempts = connect_attempts
+        self.retryable = retryable
+
+        self._idle = queue.LifoQueue()   # (connection, last_used); LIFO keeps the hottest one in use
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._keep_warm = None
+        self._stop = threading.Event()
+        self._stats = {
+            'checkouts': 0, 'wait_total': 0.0, 'wait_max': 0.0,
+            'connects': 0, 'connect_total': 0.0, 'connect_max': 0.0,
+            'connect_failures': 0, 'health_check_failures': 0, 'discarded': 0,
+        }
+
+    # --- CHECKOUT / RETURN ---
+    @contextmanager
+    def connection(self, timeout=30):
+        """Borrow a connection. It goes back to the pool on success and is discarded on error."""
+        conn = self._checkout(timeout)
+        try:
+            yield conn
+        except Exception:
+            self._discard(conn)
+            raise
+        else:
+            self._release(conn)
+        finally:
+            self._slots.release()
+
+    def _checkout(self, timeout):
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolExhausted(f"No database connection available after {timeout}s")
+        waited = time.monotonic() - start
+        self._record('checkouts', 1)
+        self._record_time('wait', waited)
+
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open_with_backoff()
+                if time.monotonic() - last_used < self.health_check_after or self._is_healthy(conn):
+                    return conn
+                self._record('health_check_failures', 1)
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn):
+        """End any implicit transaction left open by a read, then return the connection."""
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    def _open_with_backoff(self):
+        """Open a new connection, retrying with jittered exponential backoff."""
+        for attempt in range(self.connect_attempts):
+            start = time.monotonic()
+            try:
+                with instrumentation.span('db.connect'):
+                    conn = self._connect()
+            except self.retryable:
+                self._record('connect_failures', 1)
+                if attempt == self.connect_attempts - 1:
+                    raise
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                continue
+            self._record('connects', 1)
+            self._record_time('connect', time.monotonic() - start)
+            return conn
+
+    def _is_healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_check_sql)
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        self._record('discarded', 1)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # --- KEEP-WARM ---
+    def start_keep_warm(self, interval):
+        """Ping the database every `interval` seconds from a daemon thread so it never auto-pauses."""
+        if self._keep_warm is not None or not interval:
+            return
+
+        def ping():
+            while not self._stop.wait(interval):
+                try:
+                    with self.connection(timeout=interval) as conn:
+                        if not self._is_healthy(conn):
+                            raise ConnectionError("keep-warm ping failed")
+                except Exception:
+                    pass   # The next checkout reconnects with backoff
+
+        self._keep_warm = threading.Thread(target=ping, name="db-keep-warm", daemon=True)
+        self._keep_warm.start()
+
+    def close(self):
+        """Stop the keep-warm thread and close every idle connection."""
+        self._stop.set()
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    # --- METRICS ---
+    def _record(self, key, value):
+        with self._lock:
+            self._stats[key] += value
+
+    def _record_time(self, prefix, seconds):
+        with self._lock:
+            self._stats[f'{prefix}_total'] += seconds
+            self._stats[f'{prefix}_max'] = max(self._stats[f'{prefix}_max'], seconds)
+
+    def stats(self):
+        """Snapshot of pool counters, including average wait and connection setup time."""
+        with self._lock:
+            snap = dict(self._stats)
+        snap['idle'] = self._idle.qsize()
+        snap['wait_avg'] = snap['wait_total'] / snap['checkouts'] if snap['checkouts'] else 0.0
+        snap['connect_avg'] = snap['connect_total'] / snap['connects'] if snap['connects'] else 0.0
+        return snap
@@ -0,0 +1,55 @@
+import zlib
+import struct
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+# One record per game: the team IDs once, then the replay columns as zlib-compressed int16 deltas
+MAGIC = b'NBG'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<3sBqqI')   # magic, version, HomeTeamID, AwayTeamID, plays
+SERIES = ['TimeRemainingSec', 'HomeScore', 'AwayScore', 'Quarter']
+COMPRESSION_LEVEL = 9
+
+
+def encode_game(game):
+    """Pack one game's GameStates rows (any order) into a blob, plays in replay order."""
+    # Same order as read_game (storage.REPLAY_ORDER): clock descending, then quarter and scores
+    order = np.lexsort((game['AwayScore'].to_numpy(), game['HomeScore'].to_numpy(),
+                        game['Quarter'].to_numpy(), -game['TimeRemainingSec'].to_numpy()))
+    values = np.stack([game[c].to_numpy(dtype=np.int64)[order] for c in SERIES])
+    deltas = np.diff(values, axis=1, prepend=0)
+    if len(game) and (deltas.min() < -32768 or deltas.max() > 32767):
+        raise ValueError(f"Game {game['GameID'].iloc[0]} does not fit the int16 delta encoding")
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, int(game['HomeTeamID'].iloc[0]),
+                         int(game['AwayTeamID'].iloc[0]), len(game))
+    return header + zlib.compress(deltas.astype('<i2').tobytes(), COMPRESSION_LEVEL)
+
+
+def encode_games(df):
+    """One (GameID, Blob) row per game of a GameStates frame."""
+    if not len(df):
+        return pd.DataFrame(columns=['GameID', 'Blob'])
+    game_ids = df['GameID'].astype(str)
+    blobs = [(game_id, encode_game(game)) for game_id, game in df.groupby(game_ids, sort=True)]
+    return pd.DataFrame(blobs, columns=['GameID', 'Blob'])
+
+
+def decode_game(blob):
+    """Unpack a blob into the replay columns (REPLAY_COLUMNS), ordered like read_game."""
+    magic, version, home_id, away_id, plays = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} game blob")
+    # frombuffer wraps the decompressed bytes without copying; the cumsum is the only pass over them
+    deltas = np.frombuffer(zlib.decompress(blob[HEADER.size:]), dtype='<i2').reshape(len(SERIES), plays)
+    values = np.cumsum(deltas, axis=1, dtype=np.int32)
+
+    return pd.DataFrame({
+        'TimeRemainingSec': values[0],
+        'HomeScore': values[1],
+        'AwayScore': values[2],
+        'Quarter': values[3],
+        'HomeTeamID': np.full(plays, home_id),
+        'AwayTeamID': np.full(plays, away_id),
+    })
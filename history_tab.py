@@ -0,0 +1,277 @@
+import time
+import logging
+import pandas as pd
+import streamlit as st
+import storage
+import game_blobs
+import season_store
+from db_pool import ConnectionPool
+import replay_engine
+from replay_chart import ReplayChart
+from dashboard_common import NBA_TEAMS, secret, get_predictor, get_model_version, format_time_label
+
+# --- CONFIGURATION ---
+GAMES_PER_PAGE = 50   # Games per page of the game picker
+
+log = logging.getLogger(__name__)
+
+# --- DATABASE ---
+@st.cache_resource
+def get_store():
+    """Open the GameStates store, backed by one process-wide pool of warm connections.
+
+    Azure credentials are read from secrets only when the Azure backend is used.
+    """
+    # "azure" (default) or a local "sqlite"/"parquet" store for offline development
+    storage_backend = secret("STORAGE_BACKEND", "azure")
+    if storage_backend != "azure":
+        store = storage.open_store(storage_backend, path=secret("LOCAL_STORE_PATH"))
+    else:
+        # Load secrets securely
+        store = storage.AzureSQLStore(
+            server=st.secrets["DB_SERVER"],
+            database=st.secrets["DB_DATABASE"],
+            username=st.secrets["DB_USERNAME"],
+            password=st.secrets["DB_PASSWORD"],
+        )
+
+    if isinstance(store, storage.SQLGameStateStore):
+        store.pool = ConnectionPool(
+            store.open_connection,
+            max_size=int(secret("DB_POOL_SIZE", 4)),
+            retryable=store.retryable_errors(),
+        )
+        # Periodic ping so the serverless tier does not auto-pause between visitors (0 disables)
+        store.pool.start_keep_warm(int(secret("DB_KEEP_WARM_SECONDS", 300)))
+    return store
+
+
+@st.cache_data(ttl=60)
+def get_game_versions():
+    """GameID -> version stamp of its last ingest; used to invalidate the per-game caches below."""
+    try:
+        manifest = get_store().read_manifest()
+    except Exception:
+        log.exception("Could not read the ingest manifest; per-game caches will not be invalidated")
+        return {}
+    return dict(zip(manifest['GameID'].astype(str), manifest['Version'].astype(int)))
+
+
+@st.cache_data(ttl=600)
+def has_games_catalog(data_version=0):
+    """Whether the store has the Games catalog the game picker reads (created by the ingest, not here)."""
+    return get_store().has_catalog()
+
+
+@st.cache_data(ttl=600)
+def get_seasons(data_version=0):
+    """Seasons in the Games catalog with their game counts and known date range."""
+    return get_store().list_seasons()
+
+
+@st.cache_data(ttl=600)
+def get_available_games(team_id=None, season=None, date_range=(), after=None, data_version=0):
+    """One page of games matching the filters: (label -> (GameID, HomeTeamID, AwayTeamID), has_more)."""
+    date_from, date_to = date_range if len(date_range) == 2 else (None, None)
+    # One extra row tells whether a next page exists
+    df = get_store().search_games(team_id=team_id, season=season, date_from=date_from, date_to=date_to,
+                                  after=after, limit=GAMES_PER_PAGE + 1)
+    has_more = len(df) > GAMES_PER_PAGE
+    df = df.head(GAMES_PER_PAGE)
+
+    # Format labels for the dropdown
+    h_names = df['HomeTeamID'].map(NBA_TEAMS).fillna("Home")
+    a_names = df['AwayTeamID'].map(NBA_TEAMS).fillna("Away")
+    dates = (' (' + df['GameDate'].astype(str) + ')').where(df['GameDate'].notna(), '')
+    labels = df['GameID'].astype(str) + ': ' + h_names + ' vs ' + a_names + dates
+    game_options = dict(zip(labels, zip(df['GameID'], df['HomeTeamID'], df['AwayTeamID'])))
+    return game_options, has_more
+
+
+def game_filters(data_version):
+    """Team / season / date filters; returns the search arguments for get_available_games."""
+    seasons = get_seasons(data_version)
+    teams = {"All teams": None, **{name: team_id for team_id, name in sorted(NBA_TEAMS.items(), key=lambda t: t[1])}}
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        team_id = teams[st.selectbox("Team", list(teams))]
+    with col2:
+        season = st.selectbox("Season", [None] + seasons['Season'].dropna().astype(int).tolist(),
+                              format_func=lambda s: "All seasons" if s is None else f"{s}-{(s + 1) % 100:02d}")
+    with col3:
+        first, last = pd.to_datetime(seasons['FirstDate']).min(), pd.to_datetime(seasons['LastDate']).max()
+        # Only offered when the ingested CSVs carried game dates
+        bounds = {} if pd.isna(first) else {'min_value': first.date(), 'max_value': last.date()}
+        date_range = tuple(str(d) for d in st.date_input("Played between", value=(), disabled=not bounds, **bounds))
+    return team_id, season, date_range
+
+
+def page_cursor(filters):
+    """Keyset cursor (last GameID of the previous page) for the current filters; resets when they change."""
+    if st.session_state.get('games_filters') != filters:
+        st.session_state['games_filters'] = filters
+        st.session_state['games_cursors'] = [None]
+    return st.session_state['games_cursors'][-1]
+
+
+@st.cache_resource
+def get_season_store():
+    """Process-wide memory-mapped copy of every stored play (shared by worker processes on one host)."""
+    return season_store.SeasonStore(secret("SEASON_STORE_PATH", season_store.SEASON_STORE_PATH))
+
+
+def refresh_season_store(data_version):
+    """Bring the resident plays up to the latest ingest version; replays fall back to the store on failure
+    (retried only once a newer version is ingested)."""
+    if not secret("RESIDENT_GAMES", True):
+        return
+    try:
+        get_season_store().refresh(get_store(), data_version)
+    except Exception:
+        log.exception("Season store refresh to version %s failed; replays read from the store", data_version)
+
+
+def get_game_data(game_id, version=0):
+    """Plays of one game: a zero-copy slice of the resident season store when it holds the game,
+    otherwise a fetch from the database."""
+    if secret("RESIDENT_GAMES", True):
+        plays = get_season_store().game(game_id)
+        if plays is not None:
+            return plays
+    return fetch_game_data(game_id, version)
+
+
+@st.cache_data(ttl=600)
+def fetch_game_data(game_id, version=0):
+    """Fetch play-by-play data for a specific game: its packed blob when the ingest wrote one,
+    otherwise one row per play."""
+    store = get_store()
+    try:
+        blob = store.read_game_blob(game_id)
+    except Exception:
+        blob = None   # Table not created yet: fall back to the row read
+    if blob is not None:
+        return game_blobs.decode_game(blob)
+    return store.read_game(game_id)
+
+
+@st.cache_data(ttl=600)
+def get_win_curve(game_id, version=0):
+    """Replay frames for a game: the materialized curve when score_win_probability.py has
+    scored it with the current model, otherwise the whole game scored here in one batch."""
+    model_version = get_model_version()
+    if model_version:
+        try:
+            scored = get_store().read_win_curve(game_id, model_version, source_version=version or None)
+        except Exception:
+            scored = None   # Tables not created yet: fall back to live scoring
+        if scored is not None and len(scored):
+            return replay_engine.curve_frames(scored, scored['Probability'])
+    return replay_engine.compute_win_curve(get_predictor(), get_game_data(game_id, version))
+
+
+def render():
+    """Historical tab: pick a stored game and replay its win probability curve."""
+    st.header("Game Settings")
+
+    # Re-ingested games get a new version stamp, which changes the cache keys below
+    game_versions = get_game_versions()
+    data_version = max(game_versions.values(), default=0)
+    refresh_season_store(data_version)
+    if not has_games_catalog(data_version):
+        st.error("This database has no Games catalog yet. Create it with "
+                 "`python ingest_v6_teams.py --migrate` (or any ingest), then reload the page.")
+        return
+    try:
+        filters = game_filters(data_version)
+        game_dict, has_more = get_available_games(*filters, after=page_cursor(filters), data_version=data_version)
+    except Exception:
+        log.exception("Could not list games")
+        game_dict, has_more = {}, False
+
+    cursors = st.session_state.get('games_cursors', [None])
+    prev_col, page_col, next_col = st.columns([1, 4, 1])
+    if prev_col.button("◀ Prev", disabled=len(cursors) < 2):
+        cursors.pop()
+        st.rerun()
+    page_col.caption(f"Page {len(cursors)}")
+    if next_col.button("Next ▶", disabled=not has_more):
+        cursors.append(game_dict[list(game_dict)[-1]][0])
+        st.rerun()
+
+    if game_dict:
+        selected_label = st.selectbox("Select Game", list(game_dict.keys()))
+        selected_game_id, h_id, a_id = game_dict[selected_label]
+        speed = st.slider("Replay Speed", 0.01, 1.0, 0.05)
+        start_btn = st.button("▶️ Start Replay")
+
+        # Initialize the chart placeholder inside the tab
+        chart_placeholder = st.empty()
+
+        if start_btn:
+            game_version = game_versions.get(str(selected_game_id), 0)
+
+            # Get Team Names (IDs come from the game list, so no play-level read is needed here)
+            home_name = NBA_TEAMS.get(h_id, "Home")
+            away_name = NBA_TEAMS.get(a_id, "Away")
+
+            # Generate Dynamic Logo URLs
+            home_logo_url = f"https://cdn.nba.com/logos/nba/{h_id}/global/L/logo.svg"
+            away_logo_url = f"https://cdn.nba.com/logos/nba/{a_id}/global/L/logo.svg"
+
+            # Layout setup inside the button to draw logos first
+            col1, col2, col3 = st.columns([1, 2, 1])  # Ratios: Middle column wider for the metric
+
+            with col1:
+                st.image(home_logo_url, width=80)
+                home_metric = st.empty()  # Placeholder for score
+
+            with col2:
+                st.write("")  # Spacer
+                st.write("")
+                prob_metric = st.empty()  # Placeholder for probability
+
+            with col3:
+                st.image(away_logo_url, width=80)
+                away_metric = st.empty()  # Placeholder for score
+
+            # Prepare Graph Data (scored once per game, shared by every viewer)
+            stream_data = get_win_curve(selected_game_id, game_version)
+            replay_chart = ReplayChart(chart_placeholder, capacity=len(stream_data) + 1)  # +1 for FINAL
+
+            for t, h_score, a_score, margin, elapsed_min, prob in zip(
+                    stream_data['TimeRemainingSec'], stream_data['HomeScore'], stream_data['AwayScore'],
+                    stream_data['Margin'], stream_data['Elapsed'], stream_data['Probability']):
+                # Update Metrics
+                # Update the empty placeholders created above
+                home_metric.metric(home_name, h_score)
+                away_metric.metric(away_name, a_score)
+
+                # Detailed probability metric
+                prob_metric.metric(
+                    f"{home_name} Win Probability",
+                    f"{prob:.1%}",
+                    delta=f"{margin} pts",
+                    delta_color="normal"
+                )
+
+                # Update Graph Data (append-only; the chart redraw is throttled)
+                replay_chart.append(elapsed_min, prob, format_time_label(t))
+                replay_chart.flush()
+                time.sleep(speed)
+
+            # --- FINAL WHISTLE LOGIC ---
+            final_margin = stream_data.iloc[-1]['HomeScore'] - stream_data.iloc[-1]['AwayScore']
+            final_prob = 1.0 if final_margin > 0 else 0.0
+            replay_chart.append(48.0, final_prob, "FINAL")
+            replay_chart.flush(force=True)
+
+            if final_margin > 0:
+                st.success(f"  FINAL: {home_name} Wins!")
+                prob_metric.metric(f"{home_name} Win %", "100.0%", delta="Winner")
+            else:
+                st.error(f"  FINAL: {away_name} Wins!")
+                prob_metric.metric(f"{home_name} Win %", "0.0%", delta="Loser")
+    else:
+        st.warning("No historical games found or database connection failed.")   # if nothing can be found
@@ -1,6 +1,15 @@
-import pyodbc
+import os
+import time
+import hashlib
+import argparse
+import tracemalloc
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
+import storage
+import bulk_loader
+import game_blobs
+import instrumentation
 
 # --- CONFIGURATION ---
 CSV_PATH = r"C:\Users\brian\Downloads\2018-19_pbp.csv"   # Check path before execution
@@ -9,133 +18,348 @@ SERVER = 'UPDATE-INFO-HERE'
 DATABASE = 'UPDATE-INFO-HERE'
 USERNAME = 'UPDATE-INFO-HERE'
 DRIVER = '{ODBC Driver 18 for SQL Server}'
+STORAGE_BACKEND = os.environ.get('NBA_STORAGE_BACKEND', 'azure')   # 'azure', 'sqlite' or 'parquet'
+LOCAL_STORE_PATH = os.environ.get('NBA_LOCAL_STORE')              # File/directory for local backends
+STREAM_CHUNK_ROWS = 200000     # CSV rows per chunk in --stream mode
 
+# Columns required for team identification and score reconstruction
+CSV_COLUMNS = [
+    'GAME_ID', 'PERIOD', 'PCTIMESTRING', 'SCOREMARGIN', 'EVENTNUM',
+    'PLAYER1_TEAM_ID', 'HOMEDESCRIPTION', 'VISITORDESCRIPTION',
+    'GAME_DATE',   # Optional: fills Games.GameDate when the export has it
+]
 
-def get_db_connection():
-    """Establish connection to Azure SQL Database."""
-    conn_str = (
-        f'DRIVER={DRIVER};'
-        f'SERVER={SERVER},1433;' 
-        f'DATABASE={DATABASE};'
-        f'UID={USERNAME};'
-        f'PWD={PASSWORD};'
-        'Encrypt=yes;'
-        'TrustServerCertificate=yes;'
-        'Connection Timeout=30;'
+
+def get_store():
+    """Open the GameStates store (Azure SQL unless a local backend is configured)."""
+    return storage.open_store(
+        STORAGE_BACKEND, path=LOCAL_STORE_PATH,
+        server=SERVER, database=DATABASE, username=USERNAME, password=PASSWORD,
+        driver='pyodbc', odbc_driver=DRIVER
     )
-    return pyodbc.connect(conn_str)
 
 
-def time_to_seconds(time_str):
-    """Convert time string (MM:SS) to total seconds."""
-    try:
-        if pd.isna(time_str): return 0
-        minutes, seconds = map(int, time_str.split(':'))
-        return minutes * 60 + seconds
-    except:
-        return 0
+def clock_to_seconds(clock):
+    """Vectorized time_to_seconds for a whole column (malformed or missing clocks become 0).
 
+    A season only has ~720 distinct clock strings, so each is parsed once and broadcast back.
+    """
+    codes, uniques = pd.factorize(clock)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(r'^\s*([+-]?\d+)\s*:\s*([+-]?\d+)\s*$')
+    minutes = pd.to_numeric(parts[0]).fillna(0).to_numpy(dtype=np.int64)
+    seconds = pd.to_numeric(parts[1]).fillna(0).to_numpy(dtype=np.int64)
+    valid = parts[0].notna().to_numpy()
+    lookup = np.where(valid, minutes * 60 + seconds, 0)
+    return np.where(codes >= 0, lookup[codes], 0) if len(lookup) else np.zeros(len(codes), dtype=np.int64)
 
-def ingest_teams_fix():
-    print("Reading CSV file...")
 
-    # Load specific columns required for team identification and score reconstruction
-    cols = [
-        'GAME_ID', 'PERIOD', 'PCTIMESTRING', 'SCOREMARGIN', 'EVENTNUM',
-        'PLAYER1_TEAM_ID', 'HOMEDESCRIPTION', 'VISITORDESCRIPTION'
-    ]
-    # Use a lambda to ensure only existing columns are loaded
-    df = pd.read_csv(CSV_PATH, usecols=lambda c: c in cols)
+def parse_margins(margin, game_ids):
+    """Integer home margin per play from SCOREMARGIN ('TIE' -> 0, gaps forward-filled within a game)."""
+    codes, uniques = pd.factorize(margin)
+    text = pd.Series(uniques, dtype=object).astype(str)
+    values = pd.to_numeric(text.where(text != 'TIE', '0'), errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    parsed = pd.Series(np.where(codes >= 0, values[codes] if len(values) else 0, np.nan), index=margin.index)
+    return parsed.groupby(game_ids).ffill().fillna(0).to_numpy(dtype=np.int64)
 
-    print(f"   Loaded {len(df)} rows. Starting team identification...")
 
-    # --- 1. DERIVE HOME/AWAY TEAMS ---
-    # Create temp dataframes for Home and Away events
-    home_events = df.dropna(subset=['HOMEDESCRIPTION', 'PLAYER1_TEAM_ID'])
-    away_events = df.dropna(subset=['VISITORDESCRIPTION', 'PLAYER1_TEAM_ID'])
+def team_mode_by_game(events):
+    """Most frequent PLAYER1_TEAM_ID per game (smallest ID on ties, like Series.mode)."""
+    counts = events.groupby(['GAME_ID', 'PLAYER1_TEAM_ID']).size().reset_index(name='Plays')
+    # Rows are sorted by team within each game, so idxmax picks the smallest ID among ties
+    best = counts.loc[counts.groupby('GAME_ID')['Plays'].idxmax()]
+    return best.set_index('GAME_ID')['PLAYER1_TEAM_ID']
+
+
+def season_from_game_id(game_ids):
+    """Season start year from NBA GameIDs laid out as 00 + type + YY + game number (0021800001 -> 2018)."""
+    yy = (pd.to_numeric(pd.Series(game_ids)).to_numpy(dtype=np.int64) // 100000) % 100
+    return np.where(yy < 50, 2000 + yy, 1900 + yy)
+
+
+def build_manifest(upload_df, version):
+    """One manifest row per game: season, a SHA-1 of its GameStates rows, and the run's version stamp."""
+    row_hashes = pd.util.hash_pandas_object(upload_df[storage.GAME_STATE_COLUMNS], index=False).to_numpy()
+    codes, game_ids = pd.factorize(upload_df['GameID'])
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(game_ids) + 1))
+    first_rows = order[bounds[:-1]]
+
+    return pd.DataFrame({
+        'GameID': np.asarray(game_ids, dtype=object),
+        'Season': upload_df['Season'].to_numpy()[first_rows],
+        'ContentHash': [hashlib.sha1(row_hashes[order[a:b]].tobytes()).hexdigest()
+                        for a, b in zip(bounds[:-1], bounds[1:])],
+        'Version': version,
+    })
+
+
+class StageProfiler:
+    """Wall time and peak traced memory per pipeline stage (accumulated across streamed batches).
+
+    Stage timings always go to the ingest.stage histogram; the table and memory tracing are opt-in.
+    """
 
-    # Find the most common TeamID for Home/Away per Game
-    home_map = home_events.groupby('GAME_ID')['PLAYER1_TEAM_ID'].agg(
-        lambda x: x.mode().iloc[0] if not x.mode().empty else 0)
-    away_map = away_events.groupby('GAME_ID')['PLAYER1_TEAM_ID'].agg(
-        lambda x: x.mode().iloc[0] if not x.mode().empty else 0)
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stats = {}
 
-    # Map these back to the main dataframe
-    df['HomeTeamID'] = df['GAME_ID'].map(home_map).fillna(0).astype(int)
-    df['AwayTeamID'] = df['GAME_ID'].map(away_map).fillna(0).astype(int)
+    @contextmanager
+    def stage(self, name):
+        with instrumentation.span('ingest.stage', stage=name):
+            if not self.enabled:
+                yield
+                return
+            with self._traced(name):
+                yield
+
+    @contextmanager
+    def _traced(self, name):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            total, prev_peak, calls = self.stats.get(name, (0.0, 0, 0))
+            self.stats[name] = (total + elapsed, max(prev_peak, peak), calls + 1)
+
+    def start(self):
+        if self.enabled:
+            tracemalloc.start()
+
+    def report(self):
+        if not self.enabled:
+            return
+        tracemalloc.stop()
+        print("\nStage profile:")
+        print(f"   {'Stage':<28}{'Wall (s)':>10}{'Peak MB':>10}{'Calls':>7}")
+        for name, (total, peak, calls) in self.stats.items():
+            print(f"   {name:<28}{total:>10.2f}{peak / 1e6:>10.1f}{calls:>7}")
+
+
+def read_pbp_columns(col):
+    """Column filter for pd.read_csv: only the fields needed for teams and score reconstruction."""
+    return col in CSV_COLUMNS
 
-    print("   Teams identified for each game.")
+
+def transform_games(df, verbose=True, profiler=None):
+    """Turn raw play-by-play rows for one or more complete games into GameStates rows."""
+    profiler = profiler or StageProfiler()
+
+    # --- 1. DERIVE HOME/AWAY TEAMS ---
+    with profiler.stage("1. Derive home/away teams"):
+        # Home/Away events are plays with a description on that side and a credited team
+        home_events = df.loc[df['HOMEDESCRIPTION'].notna() & df['PLAYER1_TEAM_ID'].notna(),
+                             ['GAME_ID', 'PLAYER1_TEAM_ID']]
+        away_events = df.loc[df['VISITORDESCRIPTION'].notna() & df['PLAYER1_TEAM_ID'].notna(),
+                             ['GAME_ID', 'PLAYER1_TEAM_ID']]
+
+        # Find the most common TeamID for Home/Away per Game and map it back
+        df['HomeTeamID'] = df['GAME_ID'].map(team_mode_by_game(home_events)).fillna(0).astype(int)
+        df['AwayTeamID'] = df['GAME_ID'].map(team_mode_by_game(away_events)).fillna(0).astype(int)
+
+    if verbose: print("   Teams identified for each game.")
 
     # --- 2. CLEAN MARGIN & TIME ---
-    df['SCOREMARGIN'] = df['SCOREMARGIN'].astype(str).replace('TIE', '0').replace('nan', np.nan)
-    df['SCOREMARGIN'] = df['SCOREMARGIN'].ffill().fillna('0')
-    df['Margin'] = pd.to_numeric(df['SCOREMARGIN'], errors='coerce').fillna(0)
+    with profiler.stage("2. Clean margin & time"):
+        # Forward-fill within each game so a game never inherits the previous game's final margin
+        df['Margin'] = parse_margins(df['SCOREMARGIN'], df['GAME_ID'])
 
-    df['ClockSeconds'] = df['PCTIMESTRING'].apply(time_to_seconds)
-    df['Quarter'] = df['PERIOD']
-    df['TrueTimeSec'] = ((4 - df['Quarter']) * 720) + df['ClockSeconds']
-    df.loc[df['Quarter'] > 4, 'TrueTimeSec'] = df['ClockSeconds']
+        df['ClockSeconds'] = clock_to_seconds(df['PCTIMESTRING'])
+        df['Quarter'] = df['PERIOD']
+        df['TrueTimeSec'] = np.where(df['Quarter'] > 4, df['ClockSeconds'],
+                                     ((4 - df['Quarter']) * 720) + df['ClockSeconds'])
 
     # --- 3. RECONSTRUCT SCORES ---
-    print("   Reconstructing Scoreboard...")
-    df = df.sort_values(['GAME_ID', 'EVENTNUM'], ascending=[True, True])
-    df['PrevMargin'] = df.groupby('GAME_ID')['Margin'].shift(1).fillna(0)
-    df['Delta'] = df['Margin'] - df['PrevMargin']
+    if verbose: print("   Reconstructing Scoreboard...")
+    with profiler.stage("3. Reconstruct scores"):
+        df = df.sort_values(['GAME_ID', 'EVENTNUM'], ascending=[True, True])
+        df['PrevMargin'] = df.groupby('GAME_ID')['Margin'].shift(1, fill_value=0)
+        df['Delta'] = df['Margin'] - df['PrevMargin']
 
-    df['HomePoints'] = np.where(df['Delta'] > 0, df['Delta'], 0)
-    df['AwayPoints'] = np.where(df['Delta'] < 0, abs(df['Delta']), 0)
-    df['HomeScore'] = df.groupby('GAME_ID')['HomePoints'].cumsum()
-    df['AwayScore'] = df.groupby('GAME_ID')['AwayPoints'].cumsum()
+        df['HomePoints'] = np.where(df['Delta'] > 0, df['Delta'], 0)
+        df['AwayPoints'] = np.where(df['Delta'] < 0, -df['Delta'], 0)
+        df['HomeScore'] = df.groupby('GAME_ID')['HomePoints'].cumsum()
+        df['AwayScore'] = df.groupby('GAME_ID')['AwayPoints'].cumsum()
 
     # --- 4. DETERMINE WINNER ---
-    final_scores = df.sort_values(['GAME_ID', 'EVENTNUM'], ascending=[True, False]) \
-        .groupby('GAME_ID').head(1)[['GAME_ID', 'HomeScore', 'AwayScore']]
-    final_scores['HomeWin'] = np.where(final_scores['HomeScore'] > final_scores['AwayScore'], 1, 0)
-    df = df.merge(final_scores[['GAME_ID', 'HomeWin']], on='GAME_ID', how='left')
+    with profiler.stage("4. Determine winner"):
+        final_scores = df.sort_values(['GAME_ID', 'EVENTNUM'], ascending=[True, False]) \
+            .groupby('GAME_ID').head(1)[['GAME_ID', 'HomeScore', 'AwayScore']]
+        home_win = pd.Series(np.where(final_scores['HomeScore'] > final_scores['AwayScore'], 1, 0),
+                             index=final_scores['GAME_ID'])
+        df['HomeWin'] = df['GAME_ID'].map(home_win)
 
     # --- 5. PREPARE UPLOAD ---
-    upload_df = pd.DataFrame()
-    upload_df['GameID'] = df['GAME_ID'].astype(str)
-    upload_df['HomeTeamID'] = df['HomeTeamID']
-    upload_df['AwayTeamID'] = df['AwayTeamID']
-    upload_df['Quarter'] = df['Quarter']
-    upload_df['TimeRemainingSec'] = df['TrueTimeSec']
-    upload_df['HomeScore'] = df['HomeScore']
-    upload_df['AwayScore'] = df['AwayScore']
-    upload_df['HomeWin'] = df['HomeWin']
-
-    upload_df = upload_df.dropna(subset=['Quarter'])
-
-    print(f"Uploading {len(upload_df)} rows with detected teams to Azure...")
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.fast_executemany = True
-
-    cursor.execute("TRUNCATE TABLE GameStates")
-    conn.commit()
-
-    records = upload_df.values.tolist()
-    query = """
-        INSERT INTO GameStates 
-        (GameID, HomeTeamID, AwayTeamID, Quarter, TimeRemainingSec, 
-         HomeScore, AwayScore, HomeWin, GameDate)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, GETDATE())
+    with profiler.stage("5. Prepare upload"):
+        # Stringify each distinct GAME_ID once rather than once per play
+        game_codes, game_ids = pd.factorize(df['GAME_ID'])
+        upload_df = pd.DataFrame({
+            'GameID': np.asarray(game_ids.astype(str), dtype=object)[game_codes],
+            'Season': season_from_game_id(game_ids)[game_codes],
+            'HomeTeamID': df['HomeTeamID'],
+            'AwayTeamID': df['AwayTeamID'],
+            'Quarter': df['Quarter'],
+            'TimeRemainingSec': df['TrueTimeSec'],
+            'HomeScore': df['HomeScore'],
+            'AwayScore': df['AwayScore'],
+            'HomeWin': df['HomeWin'],
+        })
+        if 'GAME_DATE' in df:
+            # Carried for the Games catalog only; GameStates.GameDate stays the store's load stamp
+            upload_df['GameDate'] = pd.to_datetime(df['GAME_DATE'], errors='coerce').to_numpy()
+        upload_df = upload_df.dropna(subset=['Quarter']).reset_index(drop=True)
+
+    return upload_df
+
+
+def iter_game_chunks(csv_path, chunksize=STREAM_CHUNK_ROWS):
+    """Read a play-by-play CSV in chunks and yield frames that only contain complete games.
+
+    The last game of each chunk may continue in the next one, so its rows are carried over.
+    Play-by-play files list each game's rows together; a game that reappears after it was
+    already emitted is an error (use the non-streaming mode for such files).
     """
+    carry = None
+    emitted = set()
 
-    chunk_size = 5000
-    for i in range(0, len(records), chunk_size):
-        chunk = records[i:i + chunk_size]
-        try:
-            cursor.executemany(query, chunk)
-            conn.commit()
-            if i % 50000 == 0: print(f"   ...Uploaded chunk {i}")
-        except Exception as e:
-            print(f"   Error: {e}")
+    for chunk in pd.read_csv(csv_path, usecols=read_pbp_columns, chunksize=chunksize):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+
+        is_tail = chunk['GAME_ID'] == chunk['GAME_ID'].iloc[-1]
+        complete = chunk[~is_tail]
+        carry = chunk[is_tail]
+
+        game_ids = set(complete['GAME_ID'].unique())
+        if game_ids & emitted:
+            raise ValueError(f"{csv_path} is not grouped by GAME_ID; run without --stream")
+        emitted |= game_ids
+
+        if len(complete):
+            yield complete.copy()
+
+    if carry is not None and len(carry):
+        if carry['GAME_ID'].iloc[0] in emitted:
+            raise ValueError(f"{csv_path} is not grouped by GAME_ID; run without --stream")
+        yield carry.copy()
+
+
+def upsert_changed_games(store, frames, version):
+    """Upsert only the games whose content hash is new or differs from the manifest."""
+    manifest = store.read_manifest()
+    known = dict(zip(manifest['GameID'].astype(str), manifest['ContentHash']))
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+
+    for frame in frames:
+        incoming = build_manifest(frame, version)
+        previous = incoming['GameID'].map(known)
+        todo = incoming[previous != incoming['ContentHash']]
+
+        counts['new'] += int(previous.isna().sum())
+        counts['changed'] += len(todo) - int(previous.isna().sum())
+        counts['unchanged'] += len(incoming) - len(todo)
+        if len(todo):
+            store.upsert_games(frame[frame['GameID'].isin(todo['GameID'])], todo)
+            known.update(zip(todo['GameID'], todo['ContentHash']))
+
+    print(f"   {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged games.")
+    return counts
+
+
+def ingest_teams_fix(csv_paths=None, streaming=False, chunksize=STREAM_CHUNK_ROWS, profile=False,
+                     workers=bulk_loader.WORKERS, resume=False, incremental=False, metrics_path=None,
+                     checkpoint_path=None):
+    """Rebuild GameStates from one or more season CSVs.
+
+    Rows are bulk-loaded into a staging table by parallel workers and swapped in atomically,
+    so the dashboard keeps serving the previous data until the new load is complete.
+    With incremental=True nothing is rebuilt: only games that are new or whose content hash
+    changed are upserted, so a nightly run costs time proportional to that night's games.
+    With streaming=True the CSVs are read in chunks and each batch of finished games is
+    transformed and uploaded before the next is read, so memory stays flat.
+    With profile=True a wall time / peak memory table per stage is printed at the end.
+    With resume=True an interrupted load continues from its checkpoint (checkpoint_path, default
+    one per store next to the working directory; see bulk_loader.checkpoint_path_for).
+    With metrics_path set, stage/write timings are exported there (see instrumentation.export).
+    """
+    csv_paths = csv_paths or [CSV_PATH]
+    store = get_store()
+    store.ensure_schema()
+    version = time.time_ns() // 1000   # Stamp shared by every game written in this run
+    profiler = StageProfiler(enabled=profile)
+    profiler.start()
+
+    if streaming:
+        print(f"Streaming {len(csv_paths)} CSV file(s) in chunks of {chunksize} rows...")
+        frames = (
+            transform_games(games, verbose=False, profiler=profiler)
+            for path in csv_paths
+            for games in iter_game_chunks(path, chunksize)
+        )
+    else:
+        print("Reading CSV file...")
+        # Load specific columns required for team identification and score reconstruction
+        with profiler.stage("0. Read CSV"):
+            df = pd.concat([pd.read_csv(path, usecols=read_pbp_columns) for path in csv_paths],
+                           ignore_index=True)
+        print(f"   Loaded {len(df)} rows. Starting team identification...")
+        upload_df = transform_games(df, profiler=profiler)
+        del df
+        print(f"Uploading {len(upload_df)} rows with detected teams to {STORAGE_BACKEND}...")
+        frames = [upload_df]
+
+    if incremental:
+        with instrumentation.span('ingest.upsert'):
+            upsert_changed_games(store, frames, version)
+    else:
+        manifests, catalogs, blobs = [], [], []
+
+        def track(frames):
+            for frame in frames:
+                manifests.append(build_manifest(frame, version))
+                catalogs.append(storage.build_catalog(frame))
+                blobs.append(game_blobs.encode_games(frame))
+                yield frame
+
+        def metadata():
+            # Published in the same swap as the rows, so a failure cannot leave them describing the old load
+            return {'manifest': pd.concat(manifests, ignore_index=True),
+                    'catalog': pd.concat(catalogs, ignore_index=True),
+                    'blobs': pd.concat(blobs, ignore_index=True)}
+
+        loader = bulk_loader.BulkLoader(store, workers=workers, checkpoint_path=checkpoint_path)
+        total = loader.load(track(frames), resume=resume, metadata=metadata)
+        print(f"   {total} rows written to {STORAGE_BACKEND}.")
 
-    conn.close()
     print("SUCCESS! Team IDs have been successfully reverse-engineered and saved.")
+    profiler.report()
+    if metrics_path:
+        instrumentation.export(metrics_path)
+        print(f"Metrics written to '{metrics_path}'.")
 
 
 if __name__ == "__main__":
-    ingest_teams_fix()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load play-by-play CSVs into GameStates.")
+    parser.add_argument('csv', nargs='*', help=f"Season CSV files (default: {CSV_PATH})")
+    parser.add_argument('--stream', action='store_true', help="Bounded-memory chunked ingest")
+    parser.add_argument('--chunksize', type=int, default=STREAM_CHUNK_ROWS, help="Rows per CSV chunk")
+    parser.add_argument('--profile', action='store_true', help="Report wall time and peak memory per stage")
+    parser.add_argument('--workers', type=int, default=bulk_loader.WORKERS, help="Parallel upload connections")
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted load from its checkpoint")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only upsert new or changed games instead of rebuilding the table")
+    parser.add_argument('--metrics', help="Write timings to this file (*.prom: Prometheus text, else JSON lines)")
+    parser.add_argument('--migrate', action='store_true',
+                        help="Only create/backfill missing tables and indexes (e.g. the Games catalog), then exit")
+    args = parser.parse_args()
+
+    if args.migrate:
+        print(f"Migrating the {STORAGE_BACKEND} schema...")
+        get_store().ensure_schema()
+        print("SUCCESS! Schema is up to date.")
+    else:
+        ingest_teams_fix(args.csv, streaming=args.stream, chunksize=args.chunksize, profile=args.profile,
+                         workers=args.workers, resume=args.resume, incremental=args.incremental,
+                         metrics_path=args.metrics)
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import bisect
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# --- CONFIGURATION ---
+# Latency histogram bucket bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SAMPLES = 1024              # Recent observations kept per series for p50/p95
+METRIC_PREFIX = 'nba_'
+EXPORT_INTERVAL = 15        # Seconds between writes of the background file exporter
+EXPORT_MAX_BYTES = 16 * 1024 * 1024   # A JSON lines export past this size is rotated to '<path>.1'
+
+
+class Series:
+    """One latency histogram: cumulative-style buckets for export plus recent samples for percentiles."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)   # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=SAMPLES)
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.samples.append(seconds)
+
+    def percentile(self, q):
+        """Nearest-rank percentile (0-100) of the recent samples, or None without any."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class Registry:
+    """Counters and latency histograms keyed by (name, labels). Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, labels=()):
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, labels=()):
+        with self._lock:
+            key = (name, labels)
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = Series()
+            series.observe(seconds)
+
+    def summary(self):
+        """One dict per series: name, labels, count, total/p50/p95/max seconds (counters have value)."""
+        with self._lock:
+            rows = [{'name': name, 'labels': dict(labels), 'count': s.count, 'total_s': s.sum,
+                     'p50_s': s.percentile(50), 'p95_s': s.percentile(95), 'max_s': max(s.samples, default=None)}
+                    for (name, labels), s in sorted(self.histograms.items())]
+            rows += [{'name': name, 'labels': dict(labels), 'value': value}
+                     for (name, labels), value in sorted(self.counters.items())]
+        return rows
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (histograms in seconds, counters as _total)."""
+        lines = []
+        with self._lock:
+            for name in sorted({n for n, _ in self.histograms}):
+                metric = _metric_name(name) + '_seconds'
+                lines.append(f"# TYPE {metric} histogram")
+                for (n, labels), s in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, hits in zip(BUCKETS + ('+Inf',), s.buckets):
+                        cumulative += hits
+                        lines.append(f"{metric}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_labels(labels)} {s.sum:.6f}")
+                    lines.append(f"{metric}_count{_labels(labels)} {s.count}")
+            for name in sorted({n for n, _ in self.counters}):
+                metric = _metric_name(name) + '_total'
+                lines.append(f"# TYPE {metric} counter")
+                lines += [f"{metric}{_labels(labels)} {value}"
+                          for (n, labels), value in sorted(self.counters.items()) if n == name]
+        return '\n'.join(lines) + '\n'
+
+
+def _metric_name(name):
+    return METRIC_PREFIX + ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# --- PROCESS + SESSION REGISTRIES ---
+REGISTRY = Registry()
+# Optional second registry for the current context (the app binds one per Streamlit session)
+_session = contextvars.ContextVar('instrumentation_session', default=None)
+
+
+def bind_session(registry):
+    """Also record this thread's measurements into `registry` (e.g. one kept in st.session_state)."""
+    _session.set(registry)
+
+
+def _targets():
+    session = _session.get()
+    return (REGISTRY,) if session is None else (REGISTRY, session)
+
+
+def inc(name, value=1, **labels):
+    key = tuple(sorted(labels.items()))
+    for registry in _targets():
+        registry.inc(name, value, key)
+
+
+def observe(name, seconds, **labels):
+    key = tuple(sorted(labels.items()))
+    for registry in _targets():
+        registry.observe(name, seconds, key)
+
+
+@contextmanager
+def span(name, **labels):
+    """Time the block into the `name` histogram; failures also count into `<name>.errors`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        inc(f'{name}.errors', **labels)
+        raise
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timed(name, **labels):
+    """Decorator form of span()."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# --- EXPORT ---
+_exported = {}   # JSON lines path -> {series key: count or value as last written there}
+_export_lock = threading.Lock()
+
+
+def export(path, registry=REGISTRY, max_bytes=EXPORT_MAX_BYTES):
+    """Write the registry to `path`.
+
+    *.prom files get the Prometheus text format, replaced atomically so a textfile collector
+    never reads a partial write. Any other path gets one JSON line appended per series that
+    changed since this process last exported there (values stay cumulative, so the latest line
+    of a series is its current state). Past max_bytes the file is moved to '<path>.1' and the
+    new one starts with every series.
+    """
+    if path.endswith('.prom'):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(registry.prometheus_text())
+        os.replace(tmp, path)
+        return
+    stamp = time.time()
+    with _export_lock:
+        written = _exported.get(os.path.abspath(path), {})
+        if os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+            os.replace(path, f"{path}.1")
+            written = {}
+        current = {}
+        with open(path, 'a') as f:
+            for row in registry.summary():
+                key = (row['name'], tuple(sorted(row['labels'].items())), 'value' in row)
+                current[key] = row['value'] if 'value' in row else row['count']
+                if written.get(key) != current[key]:
+                    f.write(json.dumps({'ts': stamp, 'pid': os.getpid(), **row}) + '\n')
+        _exported[os.path.abspath(path)] = current
+
+
+def start_file_exporter(path, interval=EXPORT_INTERVAL):
+    """Daemon thread that re-exports the process registry every `interval` seconds."""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                export(path)
+            except OSError:
+                pass
+    thread = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+    thread.start()
+    return thread
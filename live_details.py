@@ -0,0 +1,357 @@
+import os
+import re
+import sys
+import json
+import glob
+import time
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+import instrumentation
+
+# --- CONFIGURATION ---
+FEEDS = ('playbyplay', 'boxscore')
+CDN_LIVE_BASE = 'https://cdn.nba.com/static/json/liveData'   # <base>/<feed>/<feed>_<gameId>.json
+MAX_CONCURRENCY = 8         # Feed requests in flight at once (two feeds per live game)
+REQUEST_TIMEOUT = 2.0       # Seconds before a single feed request is abandoned
+REFRESH_BUDGET = 2.5        # Longest a refresh waits; requests still running land on the next refresh
+PERIOD_SECONDS = 720
+OVERTIME_SECONDS = 300
+CLOCK_PATTERN = re.compile(r'PT(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?')
+
+
+# --- CLOCK ---
+def parse_clock(clock):
+    """Seconds left in the period from an ISO 8601 clock (e.g., PT05M12.40S); None if it cannot be read."""
+    match = CLOCK_PATTERN.fullmatch(clock.strip()) if isinstance(clock, str) else None
+    if not match or not any(match.groups()):
+        return None
+    return int(match.group(1) or 0) * 60 + float(match.group(2) or 0)
+
+
+def time_remaining(period, clock_seconds):
+    """TimeRemainingSec as GameStates stores it: game time left in regulation, period time left in overtime."""
+    if period > 4:
+        return min(clock_seconds, OVERTIME_SECONDS)
+    return (4 - max(period, 1)) * PERIOD_SECONDS + min(clock_seconds, PERIOD_SECONDS)
+
+
+# --- FETCHERS ---
+# A detail fetcher is any callable (feed, game_id, timeout) returning the feed document
+# ({"game": {...}} as the CDN serves it), or None when it has not changed since the last call
+def nba_api_fetcher(feed, game_id, timeout):
+    """Fetch a live feed through nba_api (imported on first use)."""
+    from nba_api.live.nba.endpoints import boxscore, playbyplay
+    endpoint = playbyplay.PlayByPlay if feed == 'playbyplay' else boxscore.BoxScore
+    return endpoint(game_id, timeout=timeout).get_dict()
+
+
+def http_fetcher(base=CDN_LIVE_BASE):
+    """Fetch feeds from the CDN (or a fake serving the same paths), skipping unchanged ones via ETag."""
+    etags = {}
+
+    def fetch(feed, game_id, timeout):
+        url = f"{base.rstrip('/')}/{feed}/{feed}_{game_id}.json"
+        headers = {'If-None-Match': etags[url]} if url in etags else {}
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as resp:
+                if resp.headers.get('ETag'):
+                    etags[url] = resp.headers['ETag']
+                return json.load(resp)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+    return fetch
+
+
+def fixture_fetcher(directory):
+    """Replay recorded '<feed>_<gameId>_<n>.json' files in name order per game, holding on the last."""
+    counters = {}
+    lock = threading.Lock()
+
+    def fetch(feed, game_id, timeout):
+        paths = sorted(glob.glob(os.path.join(directory, f'{feed}_{game_id}_*.json')))
+        if not paths:
+            raise FileNotFoundError(f"No {feed} fixtures for game {game_id} in '{directory}'")
+        with lock:
+            i = counters.get((feed, game_id), 0)
+            counters[(feed, game_id)] = i + 1
+        with open(paths[min(i, len(paths) - 1)]) as f:
+            return json.load(f)
+    return fetch
+
+
+def fetcher_from_source(source):
+    """'nba_api' (default), an http(s) base URL, a fixture directory, or 'off' (returns None)."""
+    if source == 'off':
+        return None
+    if not source or source == 'nba_api':
+        return nba_api_fetcher
+    if source.startswith(('http://', 'https://')):
+        return http_fetcher(source)
+    return fixture_fetcher(source)
+
+
+# --- INCREMENTAL STATE ---
+class GameTracker:
+    """Running live features of one game, updated from its feeds.
+
+    Only play-by-play actions newer than the last one seen are processed, so each refresh
+    costs the few actions since the previous one rather than the whole game. The boxscore
+    supplies the current clock, score and timeouts; actions supply possession and fill in
+    the clock and score when the boxscore is missing or behind.
+    """
+
+    def __init__(self, game_id, home_id, away_id):
+        self.game_id = game_id
+        self.home_id = home_id
+        self.away_id = away_id
+        self.last_action = 0
+        self.timeouts_taken = {home_id: 0, away_id: 0}
+        self.state = {}
+        self.lock = threading.Lock()
+
+    def apply(self, feed, doc):
+        """Fold one feed document in; returns the number of new actions processed."""
+        game = doc.get('game', doc)
+        with self.lock:
+            if feed == 'boxscore':
+                self._apply_boxscore(game)
+                return 0
+            return self._apply_actions(game.get('actions', []))
+
+    def _apply_actions(self, actions):
+        new = sorted((a for a in actions if a.get('actionNumber', 0) > self.last_action),
+                     key=lambda a: a['actionNumber'])
+        for action in new:
+            if action.get('actionType') == 'timeout' and action.get('teamId') in self.timeouts_taken:
+                self.timeouts_taken[action['teamId']] += 1
+        if not new:
+            return 0
+        last = new[-1]
+        self.last_action = last['actionNumber']
+        team = last.get('possession')
+        self.state['possession'] = 1 if team == self.home_id else -1 if team == self.away_id else 0
+        self._set_clock(last.get('period'), last.get('clock'), source='playbyplay')
+        if last.get('scoreHome') not in (None, ''):
+            # Boxscore scores win (they include corrections); actions only move them forward
+            self.state['home_score'] = max(int(last['scoreHome']), self.state.get('home_score', 0))
+            self.state['away_score'] = max(int(last['scoreAway']), self.state.get('away_score', 0))
+        return len(new)
+
+    def _apply_boxscore(self, game):
+        self._set_clock(game.get('period'), game.get('gameClock'), source='boxscore')
+        home, away = game.get('homeTeam', {}), game.get('awayTeam', {})
+        if 'score' in home and 'score' in away:
+            self.state.update(home_score=int(home['score']), away_score=int(away['score']))
+        self.state['home_timeouts'] = home.get('timeoutsRemaining')
+        self.state['away_timeouts'] = away.get('timeoutsRemaining')
+
+    def _set_clock(self, period, clock, source):
+        seconds = parse_clock(clock)
+        if not period or seconds is None:
+            return
+        # An action's clock is when it happened; never let it move the boxscore's clock backwards
+        if source == 'playbyplay' and self.state.get('clock_source') == 'boxscore' and (
+                (period, -seconds) <= (self.state['period'], -self.state['clock_seconds'])):
+            return
+        self.state.update(period=period, clock_seconds=seconds, clock_source=source)
+
+    def features(self):
+        """Model-ready features, or None until a clock has been seen."""
+        with self.lock:
+            s = dict(self.state)
+        if 'period' not in s:
+            return None
+        return {
+            'period': s['period'],
+            'overtime': s['period'] > 4,
+            'clock_seconds': s['clock_seconds'],
+            'seconds_remaining': time_remaining(s['period'], s['clock_seconds']),
+            'home_score': s.get('home_score'),
+            'away_score': s.get('away_score'),
+            'possession': s.get('possession', 0),
+            'home_timeouts': s.get('home_timeouts'),
+            'away_timeouts': s.get('away_timeouts'),
+            'home_timeouts_taken': self.timeouts_taken[self.home_id],
+            'away_timeouts_taken': self.timeouts_taken[self.away_id],
+            'last_action': self.last_action,
+        }
+
+
+# --- FETCH STAGE ---
+class LiveDetails:
+    """Fetches the play-by-play and boxscore feeds of every live game concurrently.
+
+    One instance per process: refresh() is keyed by the scoreboard snapshot version, so however
+    many sessions call it, each snapshot triggers one round of requests. Requests run on a
+    bounded thread pool with a per-request timeout; a refresh waits at most `budget` seconds,
+    and anything slower is applied in the background and shows up on the next refresh.
+    """
+
+    def __init__(self, fetch, max_concurrency=MAX_CONCURRENCY, timeout=REQUEST_TIMEOUT, budget=REFRESH_BUDGET):
+        self.fetch = fetch
+        self.timeout = timeout
+        self.budget = budget
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='live-details')
+        self._lock = threading.Lock()
+        self._trackers = {}
+        self._inflight = set()
+        self._version = None
+        self.errors = {}
+
+    def refresh(self, games, version=None):
+        """Fetch new feed data for `games` (scoreboard dicts of the live games); returns features()."""
+        with self._lock:
+            fresh = version is None or version != self._version
+            self._version = version
+        if not fresh:
+            return self.features()
+        with self._lock:
+            live_ids = {g['gameId'] for g in games}
+            for game_id in set(self._trackers) - live_ids:
+                del self._trackers[game_id]   # Finished or no longer on the board
+            tasks = []
+            for game in games:
+                if game['gameId'] not in self._trackers:
+                    self._trackers[game['gameId']] = GameTracker(
+                        game['gameId'], game['homeTeam']['teamId'], game['awayTeam']['teamId'])
+                for feed in FEEDS:
+                    key = (game['gameId'], feed)
+                    if key not in self._inflight:   # A slow request from the last round is still running
+                        self._inflight.add(key)
+                        tasks.append(key)
+            futures = [self._pool.submit(self._fetch_one, self._trackers[game_id], feed) for game_id, feed in tasks]
+
+        with instrumentation.span('live.refresh'):
+            done, pending = wait(futures, timeout=self.budget)
+        if pending:
+            instrumentation.inc('live.over_budget', len(pending))
+        return self.features()
+
+    def _fetch_one(self, tracker, feed):
+        key = (tracker.game_id, feed)
+        try:
+            with instrumentation.span('live.fetch', feed=feed):
+                doc = self.fetch(feed, tracker.game_id, self.timeout)
+            if doc is not None:
+                instrumentation.inc('live.actions', tracker.apply(feed, doc))
+            self.errors.pop(key, None)
+        except Exception as e:
+            self.errors[key] = f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def features(self):
+        """{gameId: GameTracker.features()} for every tracked game with a known clock."""
+        with self._lock:
+            trackers = list(self._trackers.values())
+        features = {t.game_id: t.features() for t in trackers}
+        return {game_id: f for game_id, f in features.items() if f is not None}
+
+
+# --- FIXTURES ---
+def record(out_dir, scoreboard_fetch, fetch):
+    """Save the scoreboard and both feeds of every game on it as the next fixture in `out_dir`."""
+    os.makedirs(out_dir, exist_ok=True)
+    n = len(glob.glob(os.path.join(out_dir, 'scoreboard_*.json')))
+    games = scoreboard_fetch()
+    with open(os.path.join(out_dir, f'scoreboard_{n:03d}.json'), 'w') as f:
+        json.dump({'scoreboard': {'games': games}}, f)
+    for game in games:
+        for feed in FEEDS:
+            with open(os.path.join(out_dir, f"{feed}_{game['gameId']}_{n:03d}.json"), 'w') as f:
+                json.dump(fetch(feed, game['gameId'], REQUEST_TIMEOUT), f)
+    return games
+
+
+def serve(directory, port, delay=0.0):
+    """Fake CDN: /scoreboard and /<feed>/<feed>_<gameId>.json from fixtures, ETags included."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import scoreboard_poller
+
+    fetch = fixture_fetcher(directory)
+    scoreboard = scoreboard_poller.fixture_fetcher(os.path.join(directory, 'scoreboard_*.json'))
+    feed_path = re.compile(r'/(\w+)/\1_(\w+)\.json')
+
+    class FakeLiveData(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)   # Upstream latency, to see what concurrency buys
+            match = feed_path.fullmatch(self.path)
+            try:
+                if match and match.group(1) in FEEDS:
+                    doc = fetch(match.group(1), match.group(2), None)
+                else:
+                    doc = {'scoreboard': {'games': scoreboard()}}
+            except FileNotFoundError:
+                self.send_error(404)
+                return
+            body = json.dumps(doc).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *a):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeLiveData)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    import scoreboard_poller
+
+    parser = argparse.ArgumentParser(description="Record, serve and benchmark the live detail feeds")
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help="Save the scoreboard and every game's feeds as the next fixture")
+    rec.add_argument('out')
+    rec.add_argument('--source', default='nba_api', help="Detail source (nba_api or a base URL)")
+    rec.add_argument('--scoreboard-source', default='nba_api')
+    srv = sub.add_parser('serve', help="Serve a fixture directory as a fake CDN, advancing one file per request")
+    srv.add_argument('directory')
+    srv.add_argument('--port', type=int, default=8766)
+    srv.add_argument('--delay', type=float, default=0.0, help="Seconds to hold every response")
+    bench = sub.add_parser('bench', help="Time one refresh of every game, one at a time vs concurrently")
+    bench.add_argument('directory', help="Fixture directory (served locally with --delay latency)")
+    bench.add_argument('--delay', type=float, default=0.3)
+    bench.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        games = record(args.out, scoreboard_poller.fetcher_from_source(args.scoreboard_source),
+                       fetcher_from_source(args.source))
+        print(f"Recorded the scoreboard and {len(games) * len(FEEDS)} feeds to '{args.out}'.")
+    elif args.command == 'serve':
+        print(f"Serving '{args.directory}' on http://127.0.0.1:{args.port} "
+              f"(set SCOREBOARD_SOURCE to /scoreboard and LIVE_DETAILS_SOURCE to the base URL)")
+        serve(args.directory, args.port, args.delay).serve_forever()
+    else:
+        server = serve(args.directory, 0, args.delay)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        games = scoreboard_poller.http_fetcher(f"{base}/scoreboard")()
+        print(f"{len(games)} games x {len(FEEDS)} feeds, {args.delay * 1000:.0f} ms per request:")
+        for concurrency in (1, args.concurrency):
+            # Fresh fetcher each time so ETags from the previous run do not turn requests into 304s
+            details = LiveDetails(http_fetcher(base), max_concurrency=concurrency, budget=None)
+            start = time.perf_counter()
+            features = details.refresh(games)
+            elapsed = time.perf_counter() - start
+            print(f"   concurrency {concurrency:>2}: {elapsed * 1000:7.0f} ms, {len(features)} games with features, "
+                  f"{len(details.errors)} errors")
+        if elapsed > scoreboard_poller.POLL_INTERVAL:
+            sys.exit(1)
@@ -0,0 +1,262 @@
+import time
+import pandas as pd
+import streamlit as st
+import scoreboard_poller
+import live_details
+import instrumentation
+from dashboard_common import secret, get_predictor, get_simulator, parse_iso8601_time
+
+# --- CONFIGURATION ---
+FIRST_SNAPSHOT_TIMEOUT = 10   # Seconds a session waits for the poller's very first fetch
+AUTO_REFRESH_SECONDS = 3      # Longest a session waits for a new snapshot before re-checking
+AUTO_REFRESH_MINUTES = 60     # Auto-refresh stops after this long; toggling it again restarts it
+
+
+@st.cache_resource
+def get_poller():
+    """One scoreboard poller per process; every session reads its snapshot instead of the API.
+
+    SCOREBOARD_SOURCE is "nba_api" (default), a URL serving scoreboard JSON, or a fixture file/glob.
+    """
+    fetch = scoreboard_poller.fetcher_from_source(secret("SCOREBOARD_SOURCE", "nba_api"))
+    interval = float(secret("SCOREBOARD_INTERVAL", scoreboard_poller.POLL_INTERVAL))
+    return scoreboard_poller.ScoreboardPoller(fetch, interval=interval).start()
+
+
+@st.cache_resource
+def get_live_details():
+    """One detail-feed stage per process (None when LIVE_DETAILS_SOURCE is "off").
+
+    LIVE_DETAILS_SOURCE is "nba_api" (default), a base URL serving the CDN liveData paths, or a
+    fixture directory recorded with `python live_details.py record`.
+    """
+    fetch = live_details.fetcher_from_source(secret("LIVE_DETAILS_SOURCE", "nba_api"))
+    if fetch is None:
+        return None
+    return live_details.LiveDetails(fetch, max_concurrency=int(secret("LIVE_DETAILS_CONCURRENCY",
+                                                                      live_details.MAX_CONCURRENCY)))
+
+
+def fetch_details(games, version):
+    """Play-by-play/boxscore features of every live game, keyed by gameId ({} when disabled)."""
+    details = get_live_details()
+    if details is None:
+        return {}
+    return details.refresh([g for g in games if is_live(g)], version)
+
+
+def card_state(game, detail=None):
+    """The fields a game card shows; a card is redrawn only when these change."""
+    detail = detail or {}
+    return (game['homeTeam']['score'], game['awayTeam']['score'], game['period'],
+            game['gameClock'], game['gameStatusText'], detail.get('possession'),
+            detail.get('home_timeouts'), detail.get('away_timeouts'), detail.get('seconds_remaining'))
+
+
+def is_live(game):
+    status = game['gameStatusText']
+    return "Final" not in status and ("Live" in status or game['period'] >= 1)
+
+
+def game_state(game, detail=None):
+    """(margin, seconds left, period, possession) of a live game, home perspective.
+
+    Uses the detail feeds when available (exact clock, possession); otherwise the scoreboard,
+    whose clock gives no possession. Seconds follow GameStates: overtime counts down from 300.
+    Returns None when neither has a readable clock.
+    """
+    # Calculate Inputs
+    margin = game['homeTeam']['score'] - game['awayTeam']['score']  # Home Perspective
+    if detail:
+        if detail['home_score'] is not None:
+            margin = detail['home_score'] - detail['away_score']
+        return margin, detail['seconds_remaining'], detail['period'], detail['possession']
+
+    seconds_left_in_q = parse_iso8601_time(game['gameClock'])  # PT10M00S
+    if seconds_left_in_q is None:
+        return None
+    return margin, live_details.time_remaining(game['period'], seconds_left_in_q), game['period'], 0
+
+
+def score_games(games, details=None):
+    """Home win probability for every live game in one batched model call, keyed by gameId."""
+    details = details or {}
+    states = {g['gameId']: game_state(g, details.get(g['gameId'])) for g in games if is_live(g)}
+    live = [g for g in games if states.get(g['gameId'])]
+    if not live:
+        return {}
+
+    rows = [states[game['gameId']][:2] for game in live]
+
+    # Predict
+    input_df = pd.DataFrame(rows, columns=['ScoreMargin', 'TimeRemainingSec'])
+    predictor = get_predictor()
+    with instrumentation.span('model.predict', source='live'):
+        probs = predictor.predict_proba(input_df)[:, 1]
+    return {g['gameId']: p for g, p in zip(live, probs)}
+
+
+def simulate_games(games, details=None):
+    """Monte Carlo outlook for every live game in one vectorized call, keyed by gameId.
+
+    Each value is (win prob, CI low, CI high, 5th / 50th / 95th percentile final margin).
+    """
+    simulator = get_simulator()
+    details = details or {}
+    states = {g['gameId']: game_state(g, details.get(g['gameId'])) for g in games if is_live(g)}
+    live = [g for g in games if states.get(g['gameId'])]
+    if simulator is None or not live:
+        return {}
+    margins, seconds, periods, possessions = zip(*(states[game['gameId']] for game in live))
+    with instrumentation.span('model.simulate', source='live'):
+        result = simulator.simulate(margins, seconds, periods, possessions)
+    q = result['margin_quantiles']
+    return {g['gameId']: (result['win_prob'][i], result['ci_low'][i], result['ci_high'][i], q[i, 0], q[i, 2], q[i, -1])
+            for i, g in enumerate(live)}
+
+
+def render_card(game, prob=None, sim=None, detail=None):
+    """Draw one game card; `prob` is the home win probability for a live game, `sim` its
+    simulate_games entry and `detail` its live_details features."""
+    # 1. Parse Data & Logos
+    home_team = game['homeTeam']['teamName']
+    home_id = game['homeTeam']['teamId']
+    home_logo = f"https://cdn.nba.com/logos/nba/{home_id}/global/L/logo.svg"
+
+    away_team = game['awayTeam']['teamName']
+    away_id = game['awayTeam']['teamId']
+    away_logo = f"https://cdn.nba.com/logos/nba/{away_id}/global/L/logo.svg"
+
+    h_score = game['homeTeam']['score']
+    a_score = game['awayTeam']['score']
+    status = game['gameStatusText']
+
+    # 2. Render Game Card
+    with st.container():
+        # Layout: Away Logo | Away Name/Score | Status | Home Name/Score | Home Logo
+        col1, col2, col3, col4, col5 = st.columns([1, 2, 2, 2, 1])
+
+        with col1:
+            st.image(away_logo, width=60)
+        with col2:
+            st.metric(away_team, a_score)
+
+        with col3:
+            st.markdown(f"<h3 style='text-align: center;'>{status}</h3>", unsafe_allow_html=True)
+
+        with col4:
+            st.metric(home_team, h_score)
+        with col5:
+            st.image(home_logo, width=60)
+
+        # 3. Decision Logic
+        # CASE A: Game is Final
+        if "Final" in status:
+            if h_score > a_score:
+                prob = 1.0
+                st.success(f"✅ FINAL: {home_team} Won")
+            else:
+                prob = 0.0
+                st.error(f"❌ FINAL: {away_team} Won")
+            st.progress(prob)
+
+        # CASE B: Game is Active (Live)
+        elif is_live(game):
+            if prob is None:
+                st.caption("Win probability unavailable: the game clock could not be read.")
+            else:
+                st.progress(float(prob))
+                st.caption(f"Home Win Probability: **{prob:.1%}**")
+            if detail:
+                ball = {1: home_team, -1: away_team}.get(detail['possession'])
+                period = f"OT{detail['period'] - 4}" if detail['overtime'] else f"Q{detail['period']}"
+                clock = f"{int(detail['clock_seconds'] // 60)}:{detail['clock_seconds'] % 60:04.1f}"
+                timeouts = (f" · Timeouts left {away_team} {detail['away_timeouts']}, {home_team} {detail['home_timeouts']}"
+                            if detail['home_timeouts'] is not None else "")
+                st.caption(f"{period} {clock}" + (f" · 🏀 {ball} ball" if ball else "") + timeouts)
+            if sim is not None:
+                win, low, high, q05, q50, q95 = sim
+                st.caption(f"Simulated: {win:.1%} ({low:.1%}–{high:.1%}) · "
+                           f"projected home margin {q50:+.0f} ({q05:+.0f} to {q95:+.0f})")
+
+        # CASE C: Game hasn't started
+        else:
+            st.info(f"Tip-off scheduled for {status}")
+
+        st.divider()
+
+
+def latest_snapshot(poller):
+    """Current snapshot, waiting briefly for the poller's first fetch."""
+    version, games, fetched_at = poller.snapshot()
+    if version == 0:
+        version, games, fetched_at = poller.wait_for_version(0, timeout=FIRST_SNAPSHOT_TIMEOUT)
+    if version == 0:
+        raise RuntimeError(poller.last_error or "scoreboard not available yet")
+    return version, games, fetched_at
+
+
+def show_freshness(slot, poller, fetched_at):
+    if poller.last_error:
+        slot.warning(f"Showing the last good scoreboard; latest fetch failed ({poller.last_error}).")
+    else:
+        slot.caption(f"Scoreboard updated {time.time() - fetched_at:.0f}s ago.")
+
+
+def auto_refresh(poller):
+    """Keep the cards current: each new snapshot is diffed by gameId and only changed cards are redrawn."""
+    version, games, fetched_at = latest_snapshot(poller)
+    freshness = st.empty()
+    if not games:
+        st.warning("No games found for today yet.")
+    # One placeholder per card; redrawing one replaces only that card in the browser
+    placeholders = {game['gameId']: st.empty() for game in games}
+    shown = {}
+
+    deadline = time.monotonic() + AUTO_REFRESH_MINUTES * 60
+    while time.monotonic() < deadline:
+        details = fetch_details(games, version)
+        changed = [g for g in games if shown.get(g['gameId']) != card_state(g, details.get(g['gameId']))]
+        probs = score_games(changed, details)
+        sims = simulate_games(changed, details)
+        for game in changed:
+            detail = details.get(game['gameId'])
+            with placeholders[game['gameId']].container():
+                render_card(game, probs.get(game['gameId']), sims.get(game['gameId']), detail)
+            shown[game['gameId']] = card_state(game, detail)
+        show_freshness(freshness, poller, fetched_at)
+
+        version, games, fetched_at = poller.wait_for_version(version, timeout=AUTO_REFRESH_SECONDS)
+        if {g['gameId'] for g in games} != set(placeholders):
+            st.rerun()   # Games were added or removed: rebuild the layout
+
+    freshness.info("Auto-refresh paused. Toggle it off and on to resume.")
+
+
+def render():
+    """Live tab: today's scoreboard with a win probability for every game in progress."""
+    st.header("Today's Live Predictions")
+    auto = st.toggle("Auto-refresh", help="Update changed games as new scores arrive")
+
+    if auto or st.button("🔄 Refresh Live Scores"):
+        try:
+            # Shared snapshot: no upstream call per click (the poller starts on the first one)
+            poller = get_poller()
+            if auto:
+                auto_refresh(poller)
+                return
+
+            version, games, fetched_at = latest_snapshot(poller)
+            show_freshness(st.empty(), poller, fetched_at)
+
+            if not games:
+                st.warning("No games found for today yet.")
+
+            details = fetch_details(games, version)
+            probs = score_games(games, details)
+            sims = simulate_games(games, details)
+            for game in games:
+                render_card(game, probs.get(game['gameId']), sims.get(game['gameId']), details.get(game['gameId']))
+
+        except Exception as e:
+            st.error(f"Error fetching live data: {e}")
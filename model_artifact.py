@@ -0,0 +1,346 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import numpy as np
+
+# --- CONFIGURATION ---
+ARTIFACT_PATH = 'nba_win_probability_model'   # Directory: manifest.json + one .npy per array
+FORMAT_VERSION = 1
+FEATURES = ['ScoreMargin', 'TimeRemainingSec']
+PARITY_TOLERANCE = 1e-6
+CHUNK_ROWS = 16384    # Rows per tree traversal pass; bounds the (rows x trees) working arrays
+MAX_SLOWDOWN = 6.0    # Export fails if batch predict_proba is this many times slower than sklearn's...
+LATENCY_FLOOR_US = 25.0   # ...and above this per row (shallow boosted trees are mostly numpy call overhead)
+LATENCY_ROWS = 10000
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact is missing, from an unknown format version, or fails its checksum."""
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _features(X):
+    """Feature matrix from a DataFrame/dict with FEATURES columns, or an (n, 2) array."""
+    if hasattr(X, 'columns') or isinstance(X, dict):
+        return np.column_stack([np.asarray(X[f], dtype=np.float64) for f in FEATURES])
+    return np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+
+# --- PREDICTORS ---
+class LinearPredictor:
+    """Logistic regression from its coefficients: P(home) = sigmoid(X . coef + intercept)."""
+
+    kind = 'linear'
+
+    def __init__(self, arrays):
+        self.coef = arrays['coef']
+        self.intercept = float(arrays['intercept'][0])
+
+    def predict_proba(self, X):
+        p_home = _sigmoid(_features(X) @ self.coef + self.intercept)
+        return np.column_stack([1 - p_home, p_home])
+
+
+class TreeEnsemblePredictor:
+    """Forest or boosted trees evaluated from flattened node arrays, all rows and trees at once.
+
+    Every tree's nodes are concatenated; `roots` holds each tree's first node. Leaves have
+    left == right == -1. Forests average leaf P(home); boosting sums leaf values into log-odds.
+    """
+
+    kind = 'trees'
+
+    def __init__(self, arrays, meta):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        # (left, right) of node i at 2i, 2i+1: one gather per level picks the branch taken
+        self.children = np.column_stack([arrays['left'], arrays['right']]).ravel()
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(meta['max_depth'])
+        self.aggregation = meta['aggregation']   # 'mean_proba' or 'sum_logit'
+        self.init = float(meta.get('init', 0.0))
+        self.scale = float(meta.get('scale', 1.0))
+
+    def leaves(self, X):
+        """Leaf node index for every (row, tree).
+
+        Pairs that reach a leaf drop out of the active set, so each level only walks the pairs
+        still at internal nodes instead of all of them for max_depth levels.
+        """
+        # sklearn compares float32 inputs against float64 thresholds; match it exactly
+        X = _features(X).astype(np.float32).astype(np.float64)
+        n_trees = len(self.roots)
+        nodes = np.tile(np.asarray(self.roots, dtype=np.int64), len(X))
+        flat = X.ravel()
+        active = np.flatnonzero(self.children[2 * nodes] != -1)
+        node = nodes[active]
+        offset = active // n_trees * X.shape[1]   # Start of each pair's row in `flat`
+        while len(active):
+            go_right = flat[offset + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+            leaf = self.children[2 * node] == -1
+            if leaf.any():
+                nodes[active[leaf]] = node[leaf]
+                keep = ~leaf
+                active, node, offset = active[keep], node[keep], offset[keep]
+        return nodes.reshape(len(X), n_trees)
+
+    def predict_proba(self, X):
+        X = _features(X)
+        p_home = np.empty(len(X))
+        for start in range(0, len(X), CHUNK_ROWS):
+            values = self.value[self.leaves(X[start:start + CHUNK_ROWS])]
+            if self.aggregation == 'mean_proba':
+                p_home[start:start + CHUNK_ROWS] = values.mean(axis=1)
+            else:
+                p_home[start:start + CHUNK_ROWS] = _sigmoid(self.init + self.scale * values.sum(axis=1))
+        return np.column_stack([1 - p_home, p_home])
+
+
+# --- EXPORT ---
+def _positive_index(model):
+    classes = list(model.classes_)
+    if classes != [0, 1] and classes != [False, True]:
+        raise ValueError(f"Expected a binary HomeWin model, got classes {classes}")
+    return 1
+
+
+def _flatten_trees(trees, leaf_value):
+    """Concatenate sklearn tree_ structures into one set of node arrays."""
+    parts = {k: [] for k in ['feature', 'threshold', 'left', 'right', 'value']}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        t = tree.tree_
+        roots.append(offset)
+        is_leaf = t.children_left == -1
+        parts['feature'].append(np.where(is_leaf, 0, t.feature).astype(np.int32))
+        parts['threshold'].append(t.threshold.astype(np.float64))
+        parts['left'].append(np.where(is_leaf, -1, t.children_left + offset).astype(np.int32))
+        parts['right'].append(np.where(is_leaf, -1, t.children_right + offset).astype(np.int32))
+        parts['value'].append(leaf_value(t).astype(np.float64))
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+
+    arrays = {k: np.concatenate(v) for k, v in parts.items()}
+    arrays['roots'] = np.asarray(roots, dtype=np.int32)
+    return arrays, max_depth
+
+
+def to_artifact(model):
+    """Translate a fitted sklearn model into (kind, arrays, meta) without keeping any sklearn objects."""
+    name = type(model).__name__
+    pos = _positive_index(model)
+
+    if name == 'LogisticRegression':
+        arrays = {'coef': model.coef_[0].astype(np.float64),
+                  'intercept': np.asarray(model.intercept_, dtype=np.float64)}
+        return 'linear', arrays, {}
+
+    if name in ('RandomForestClassifier', 'ExtraTreesClassifier', 'DecisionTreeClassifier'):
+        trees = model.estimators_ if hasattr(model, 'estimators_') else [model]
+
+        def leaf_proba(t):
+            counts = t.value[:, 0, :]
+            return counts[:, pos] / np.maximum(counts.sum(axis=1), 1e-300)
+
+        arrays, depth = _flatten_trees(trees, leaf_proba)
+        return 'trees', arrays, {'aggregation': 'mean_proba', 'max_depth': depth}
+
+    if name == 'GradientBoostingClassifier':
+        init = float(model._raw_predict_init(np.zeros((1, len(FEATURES)), dtype=np.float32))[0, 0])
+        arrays, depth = _flatten_trees(model.estimators_[:, 0], lambda t: t.value[:, 0, 0])
+        return 'trees', arrays, {'aggregation': 'sum_logit', 'max_depth': depth,
+                                 'init': init, 'scale': float(model.learning_rate)}
+
+    raise ValueError(f"No artifact format for {name}; export LogisticRegression or a tree ensemble")
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_artifact(model, directory, metadata=None):
+    """Write `model`'s arrays and manifest into a fresh `directory`; returns the manifest."""
+    kind, arrays, meta = to_artifact(model)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+    files = {}
+    for key, array in arrays.items():
+        file_name = f"{key}.npy"
+        np.save(os.path.join(directory, file_name), np.ascontiguousarray(array))
+        files[key] = {'file': file_name, 'sha256': _sha256(os.path.join(directory, file_name))}
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'kind': kind,
+        'estimator': type(model).__name__,
+        'features': FEATURES,
+        'params': meta,
+        'arrays': files,
+        'exported_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'training': metadata or {},
+    }
+    with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+    return manifest
+
+
+def _staging_path(path):
+    """A sibling directory unique to this writer, so concurrent exports never share one."""
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+
+def _swap_into_place(staging_path, path):
+    """Rename a fully written artifact directory over `path`, then drop the one it replaced."""
+    old_path = f"{staging_path}.old"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(staging_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def export_model(model, path=ARTIFACT_PATH, metadata=None):
+    """Write `model` as a versioned, pickle-free artifact directory and return its manifest.
+
+    The directory is built next to `path` and renamed into place, so readers never see half-written arrays.
+    """
+    staging_path = _staging_path(path)
+    try:
+        manifest = _write_artifact(model, staging_path, metadata)
+        _swap_into_place(staging_path, path)
+    except BaseException:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    return manifest
+
+
+def artifact_version(manifest):
+    """Short content id of an artifact: changes whenever any of its arrays change."""
+    digest = hashlib.sha256(''.join(sorted(e['sha256'] for e in manifest['arrays'].values())).encode())
+    return digest.hexdigest()[:12]
+
+
+# --- LOAD ---
+def _predictor(kind, arrays, meta):
+    return LinearPredictor(arrays) if kind == 'linear' else TreeEnsemblePredictor(arrays, meta)
+
+
+def to_predictor(model):
+    """In-memory predictor for a fitted sklearn model: what the app would serve, without writing it out."""
+    return _predictor(*to_artifact(model))
+
+
+def load_model(path=ARTIFACT_PATH, verify=True):
+    """Memory-map an artifact and return its predictor (exposes the sklearn-style predict_proba)."""
+    manifest_path = os.path.join(path, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        raise ArtifactError(f"No model artifact at '{path}'")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format {manifest.get('format_version')} in '{path}'")
+
+    arrays = {}
+    for key, entry in manifest['arrays'].items():
+        file_path = os.path.join(path, entry['file'])
+        if verify and _sha256(file_path) != entry['sha256']:
+            raise ArtifactError(f"Checksum mismatch for '{file_path}'")
+        arrays[key] = np.load(file_path, mmap_mode='r')
+
+    predictor = _predictor(manifest['kind'], arrays, manifest['params'])
+    predictor.manifest = manifest
+    predictor.version = artifact_version(manifest)
+    return predictor
+
+
+def check_parity(model, predictor, n_samples=100000, seed=42):
+    """Max abs difference in P(home) between the sklearn model and the artifact on random states."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'ScoreMargin': rng.integers(-60, 61, n_samples),
+        'TimeRemainingSec': rng.integers(0, 2881, n_samples),
+    })
+    return float(np.max(np.abs(model.predict_proba(X)[:, 1] - predictor.predict_proba(X)[:, 1])))
+
+
+def check_latency(model, predictor, n_rows=LATENCY_ROWS, repeats=3, seed=42):
+    """(slowdown vs sklearn, artifact us per row) for batch predict_proba on random states, best of `repeats`."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'ScoreMargin': rng.integers(-60, 61, n_rows),
+        'TimeRemainingSec': rng.integers(0, 2881, n_rows),
+    })
+    timings = []
+    for predict in (model.predict_proba, predictor.predict_proba):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            predict(X)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best)
+    return timings[1] / timings[0], timings[1] / n_rows * 1e6
+
+
+def export_checked(model, path=ARTIFACT_PATH, metadata=None, tolerance=PARITY_TOLERANCE, max_slowdown=MAX_SLOWDOWN):
+    """Export, reload and check the artifact before it replaces the one at `path`.
+
+    The checks run against a staging directory; a model that disagrees with sklearn or is much slower
+    raises ArtifactError and leaves the live artifact untouched. Returns (max abs error, slowdown vs sklearn).
+    """
+    staging_path = _staging_path(path)
+    try:
+        _write_artifact(model, staging_path, metadata)
+        predictor = load_model(staging_path)
+        max_err = check_parity(model, predictor)
+        if max_err > tolerance:
+            raise ArtifactError(f"Artifact parity check failed: max abs error {max_err:.2e} > {tolerance:.0e}")
+        slowdown, row_us = check_latency(model, predictor)
+        if slowdown > max_slowdown and row_us > LATENCY_FLOOR_US:
+            raise ArtifactError(f"Artifact latency check failed: predict_proba {slowdown:.1f}x slower than sklearn "
+                                f"({row_us:.1f} us/row, limit {max_slowdown:.0f}x)")
+        _swap_into_place(staging_path, path)
+    except BaseException:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    return max_err, slowdown
+
+
+if __name__ == "__main__":
+    import joblib
+
+    # Convert an existing pickle: python model_artifact.py nba_win_probability_model.pkl
+    pickle_path = sys.argv[1] if len(sys.argv) > 1 else 'nba_win_probability_model.pkl'
+    print(f"Loading sklearn model from '{pickle_path}'...")
+    model = joblib.load(pickle_path)
+
+    max_err, slowdown = export_checked(model, metadata={'source': pickle_path})
+    size = sum(os.path.getsize(os.path.join(ARTIFACT_PATH, f)) for f in os.listdir(ARTIFACT_PATH))
+    print(f"   Wrote '{ARTIFACT_PATH}/' ({size / 1e6:.2f} MB vs {os.path.getsize(pickle_path) / 1e6:.2f} MB pickle)")
+    print(f"   Parity vs sklearn (100,000 random states): max abs error {max_err:.2e}")
+    print(f"   Batch predict_proba ({LATENCY_ROWS:,} rows): {slowdown:.2f}x sklearn's time")
+
+    start = time.perf_counter()
+    load_model()
+    print(f"   Artifact load: {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    joblib.load(pickle_path)
+    print(f"   Pickle load:   {(time.perf_counter() - start) * 1000:.1f} ms (sklearn already imported)")
@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+# --- CONFIGURATION ---
+PARAMS_PATH = 'nba_simulator_params.json'   # Written by fit_params(); the app falls back to DEFAULT_PARAMS
+REGULATION_SECONDS = 2880
+OVERTIME_SECONDS = 300
+MAX_OVERTIMES = 4           # Games still tied after this many simulated overtimes are settled by a coin flip
+N_SIMS = 20000              # Simulated finishes per game state
+CONFIDENCE = 0.95
+MARGIN_QUANTILES = (5, 25, 50, 75, 95)
+POINTS = np.array([0, 1, 2, 3])
+# League-typical fallback: ~100 possessions per team, ~half of them scoring
+DEFAULT_PARAMS = {
+    'seconds_per_possession': 14.4,
+    'home_outcomes': [0.49, 0.09, 0.30, 0.12],   # P(0, 1, 2, 3 points) on a home possession
+    'away_outcomes': [0.50, 0.09, 0.30, 0.11],
+    'games': 0,
+}
+
+
+# --- FIT ---
+def fit_params(df):
+    """Possession model parameters from GameStates rows (GameID, Quarter, HomeScore, AwayScore).
+
+    Play-by-play rows do not record possessions, so pace and per-possession scoring are solved
+    for instead: the point mix of scoring plays comes from the score steps, and the scoring
+    chance per possession is the one that reproduces both the mean regulation scores and the
+    spread of regulation margins across games. The pace is therefore an effective one: it is
+    whatever makes a simulated game as variable as a real one.
+    """
+    df = df.sort_values(['GameID', 'Quarter', 'HomeScore', 'AwayScore'])
+    regulation = df[df['Quarter'] <= 4].groupby('GameID')[['HomeScore', 'AwayScore']].max()
+    mean_home, mean_away = regulation['HomeScore'].mean(), regulation['AwayScore'].mean()
+    margin_var = (regulation['HomeScore'] - regulation['AwayScore']).var()
+
+    mixes = {}
+    for side in ('HomeScore', 'AwayScore'):
+        steps = df.groupby('GameID')[side].diff()
+        # Larger jumps are several scores logged on one row; count them as the biggest single score
+        steps = steps[steps > 0].clip(upper=3).astype(int)
+        mixes[side] = np.bincount(steps, minlength=4)[1:4] / max(len(steps), 1)
+
+    pooled = (mixes['HomeScore'] + mixes['AwayScore']) / 2
+    mean_pts = (pooled * POINTS[1:]).sum()
+    mean_sq = (pooled * POINTS[1:] ** 2).sum()
+    total = mean_home + mean_away
+    # Per team: mean = n*s*m, variance = n*s*(m2 - s*m^2); the margin variance sums both teams
+    make = np.clip((mean_sq - margin_var * mean_pts / total) / mean_pts ** 2, 0.2, 0.9)
+    possessions = total / (2 * mean_pts * make)   # Per team per regulation game
+
+    params = {'seconds_per_possession': float(REGULATION_SECONDS / (2 * possessions)), 'games': int(len(regulation))}
+    for key, side, mean in (('home_outcomes', 'HomeScore', mean_home), ('away_outcomes', 'AwayScore', mean_away)):
+        side_make = mean / (possessions * (mixes[side] * POINTS[1:]).sum())
+        params[key] = [float(1 - side_make)] + [float(p) for p in side_make * mixes[side]]
+    return params
+
+
+def save_params(params, path=PARAMS_PATH):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(params, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_params(path=PARAMS_PATH):
+    """Fitted parameters, or DEFAULT_PARAMS when none have been fitted yet."""
+    if not os.path.exists(path):
+        return dict(DEFAULT_PARAMS)
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- SIMULATE ---
+def _points(rng, possessions, outcomes):
+    """Points scored on `possessions` (any shape) possessions with P(0..3 points) = outcomes."""
+    return rng.multinomial(possessions, outcomes) @ POINTS
+
+
+def _play(rng, seconds, possession, params, n_sims):
+    """Home-minus-away points over `seconds` for every (state, simulation): shape (states, n_sims).
+
+    Possessions alternate, so the count is nearly fixed by the clock and whoever has the ball
+    now gets the odd one; only how many of them score is random.
+    """
+    expected = seconds[:, None] / params['seconds_per_possession']
+    shape = (len(seconds), n_sims)
+    # Randomized rounding keeps the mean possession count exact
+    total = np.floor(expected + rng.random(shape)).astype(np.int64)
+    home_first = np.where(possession[:, None] == 0, rng.random(shape) < 0.5, possession[:, None] > 0)
+    home = (total + home_first) // 2
+    return (_points(rng, home, params['home_outcomes'])
+            - _points(rng, total - home, params['away_outcomes']))
+
+
+def simulate(margin, seconds, period=4, possession=0, params=None, n_sims=N_SIMS, seed=None):
+    """Simulate the rest of one or more games at once.
+
+    `margin` is home minus away, `seconds` is TimeRemainingSec as stored in GameStates (game
+    time left in regulation, time left in the period in overtime), `period` the current period
+    and `possession` +1 home ball, -1 away ball, 0 unknown. Scalars or equal-length arrays.
+
+    Returns a dict of arrays with one entry per state: win_prob, ci_low/ci_high (the
+    CONFIDENCE interval of the estimate), margin_mean, margin_quantiles (MARGIN_QUANTILES of
+    the final margin) and margins, every simulated final margin (states x n_sims).
+    """
+    params = params or load_params()
+    margin, seconds, period, possession = (np.atleast_1d(np.asarray(a)) for a in (margin, seconds, period, possession))
+    margin, seconds, period, possession = np.broadcast_arrays(margin, seconds, period, possession)
+    rng = np.random.default_rng(seed)
+
+    # Overtime rows count down from 300, so the same clock semantics hold in every period
+    seconds = np.clip(seconds.astype(float), 0, np.where(period > 4, OVERTIME_SECONDS, REGULATION_SECONDS))
+    final = margin[:, None] + _play(rng, seconds, possession, params, n_sims)
+
+    # Loop over overtime periods, not possessions: each one replays only the sims still tied
+    for _ in range(MAX_OVERTIMES):
+        tied = np.flatnonzero(final == 0)
+        if not len(tied):
+            break
+        final.flat[tied] = _play(rng, np.full(len(tied), OVERTIME_SECONDS), np.zeros(len(tied)), params, 1)[:, 0]
+    tied = final == 0
+    final[tied] = np.where(rng.random(tied.sum()) < 0.5, 1, -1)
+
+    win = (final > 0).mean(axis=1)
+    low, high = wilson_interval(win, n_sims)
+    return {
+        'win_prob': win,
+        'ci_low': low,
+        'ci_high': high,
+        'margin_mean': final.mean(axis=1),
+        'margin_quantiles': np.percentile(final, MARGIN_QUANTILES, axis=1).T,
+        'margins': final,
+    }
+
+
+def wilson_interval(p, n, confidence=CONFIDENCE):
+    """Wilson score interval for a proportion p observed over n trials."""
+    from statistics import NormalDist
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+    return center - half, center + half
+
+
+class Simulator:
+    """predict_proba-compatible wrapper, so the simulator can stand in wherever the model is used."""
+
+    def __init__(self, params=None, n_sims=N_SIMS, seed=None):
+        self.params = params or load_params()
+        self.n_sims = n_sims
+        self.seed = seed
+
+    def simulate(self, margin, seconds, period=4, possession=0):
+        return simulate(margin, seconds, period, possession, self.params, self.n_sims, self.seed)
+
+    def predict_proba(self, X):
+        p_home = self.simulate(np.asarray(X['ScoreMargin']), np.asarray(X['TimeRemainingSec']))['win_prob']
+        return np.column_stack([1 - p_home, p_home])
+
+
+# --- BENCHMARK ---
+def benchmark(simulator, n_games=15, poll_interval=10.0, calls=10, seed=42):
+    """Throughput and latency of scoring a full live slate in one simulate() call.
+
+    Returns (sims per second, median seconds per slate, slates that fit in one poll interval).
+    """
+    rng = np.random.default_rng(seed)
+    margins = rng.integers(-15, 16, n_games)
+    seconds = rng.integers(0, REGULATION_SECONDS + 1, n_games)
+    simulator.simulate(margins, seconds)   # Warm-up
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        simulator.simulate(margins, seconds)
+        times.append(time.perf_counter() - start)
+    slate = float(np.median(times))
+    return n_games * simulator.n_sims / slate, slate, poll_interval / slate
+
+
+if __name__ == "__main__":
+    import storage
+
+    parser = argparse.ArgumentParser(description="Fit and benchmark the Monte Carlo win probability simulator")
+    parser.add_argument('--fit', action='store_true', help="Fit scoring parameters from GameStates first")
+    parser.add_argument('--backend', default=os.environ.get('NBA_STORAGE_BACKEND', 'sqlite'))
+    parser.add_argument('--store', default=os.environ.get('NBA_LOCAL_STORE'), help="Local store path")
+    parser.add_argument('--sims', type=int, default=N_SIMS, help="Simulations per game state")
+    parser.add_argument('--games', type=int, default=15, help="Live games per slate in the benchmark")
+    args = parser.parse_args()
+
+    if args.fit:
+        print(f"Fitting scoring parameters from {args.backend}...")
+        df = storage.open_store(args.backend, path=args.store).read_game_states(
+            ['GameID', 'Quarter', 'HomeScore', 'AwayScore'])
+        params = fit_params(df)
+        save_params(params)
+        print(f"   {params['games']} games: {params['seconds_per_possession']:.1f}s per possession, "
+              f"home P(0..3) {np.round(params['home_outcomes'], 3)}, away {np.round(params['away_outcomes'], 3)}")
+
+    simulator = Simulator(n_sims=args.sims, seed=0)
+    print("\nExample states:")
+    for margin, seconds in ((0, 2880), (5, 600), (-3, 60), (10, 120)):
+        r = simulator.simulate(margin, seconds)
+        q = r['margin_quantiles'][0]
+        print(f"   margin {margin:+3d}, {seconds:4d}s left: P(home) {r['win_prob'][0]:.1%} "
+              f"[{r['ci_low'][0]:.1%}, {r['ci_high'][0]:.1%}]  final margin 5-95%: {q[0]:+.0f} to {q[-1]:+.0f}")
+
+    from scoreboard_poller import POLL_INTERVAL
+    sims_per_s, slate_s, headroom = benchmark(simulator, args.games, POLL_INTERVAL)
+    print(f"\nThroughput: {sims_per_s / 1e6:.2f}M simulations/s on {os.cpu_count()} CPU(s)")
+    print(f"   {args.games} live games x {args.sims} sims: {slate_s * 1000:.1f} ms per refresh "
+          f"({headroom:.0f}x inside the {POLL_INTERVAL}s poll interval)")
+    if headroom < 1:
+        sys.exit(1)
@@ -0,0 +1,88 @@
+import time
+import numpy as np
+import pandas as pd
+import altair as alt
+import instrumentation
+
+# --- CONFIGURATION ---
+MIN_REDRAW_INTERVAL = 0.5   # Seconds between chart payloads sent to the browser
+MAX_CHART_POINTS = 300      # Points per payload: the recent tail exactly, older plays as per-bucket min/max
+TAIL_POINTS = 60            # Most recent plays always sent at full resolution
+QUARTER_LINES = [12, 24, 36]
+
+
+class ReplayChart:
+    """Append-only momentum chart for the replay loop.
+
+    Points go into preallocated arrays and the Altair spec is built once. Streamlit can only
+    replace a chart, so each redraw re-sends it; redraws wait for MIN_REDRAW_INTERVAL and
+    carry at most max_points points however long the game runs (see _visible).
+    """
+
+    def __init__(self, placeholder, capacity, min_redraw_interval=MIN_REDRAW_INTERVAL,
+                 max_points=MAX_CHART_POINTS, tail_points=TAIL_POINTS):
+        self.placeholder = placeholder
+        self.min_redraw_interval = min_redraw_interval
+        self.max_points = max_points
+        self.tail_points = tail_points
+
+        # Preallocated buffers (the replay length is known up front)
+        self.elapsed = np.empty(capacity, dtype=np.float64)
+        self.probability = np.empty(capacity, dtype=np.float64)
+        self.time_label = np.empty(capacity, dtype=object)
+        self.size = 0
+        self._drawn = 0
+        self._last_draw = 0.0
+
+        # Chart specs are built once and only re-bound to data on redraw
+        self._line = alt.Chart().mark_line(color='#ff4b4b').encode(
+            x=alt.X('Elapsed', title='Game Time (Minutes)', scale=alt.Scale(domain=[0, 48])),
+            y=alt.Y('Probability', title='Win Probability', scale=alt.Scale(domain=[0, 1])),
+            tooltip=['TimeLabel', alt.Tooltip('Probability', format='.1%')]
+        ).properties(height=300)
+        self._rules = alt.Chart(pd.DataFrame({'x': QUARTER_LINES})).mark_rule(
+            color='gray', strokeDash=[5, 5]).encode(x='x')
+
+    def append(self, elapsed, probability, time_label):
+        """Add one point to the buffer; the browser is updated on the next flush."""
+        if self.size == len(self.elapsed):
+            raise IndexError("ReplayChart buffer is full")
+        self.elapsed[self.size] = elapsed
+        self.probability[self.size] = probability
+        self.time_label[self.size] = time_label
+        self.size += 1
+
+    def _visible(self, n):
+        """Indices of the first n points to draw: all of them while they fit in max_points, otherwise
+        the last tail_points plus the lowest and highest play of each equal bucket of the rest, so
+        swings keep their extremes."""
+        if n <= self.max_points:
+            return slice(0, n)
+        buckets = (self.max_points - self.tail_points) // 2
+        head = n - self.tail_points
+        width = -(-head // buckets)
+        # The last bucket is padded with its final play, so a pick in the padding maps back onto it
+        grid = np.pad(self.probability[:head], (0, buckets * width - head), mode='edge').reshape(buckets, width)
+        offsets = np.arange(buckets) * width
+        picked = np.concatenate([offsets + grid.argmin(axis=1), offsets + grid.argmax(axis=1)])
+        return np.concatenate([np.unique(np.minimum(picked, head - 1)), np.arange(head, n)])
+
+    def flush(self, force=False):
+        """Send the chart if there are undrawn points and the redraw budget allows it."""
+        if self.size == self._drawn:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_draw < self.min_redraw_interval:
+            return
+
+        n = self.size
+        with instrumentation.span('chart.render'):
+            visible = self._visible(n)
+            data = pd.DataFrame({
+                "Elapsed": self.elapsed[visible],
+                "Probability": self.probability[visible],
+                "TimeLabel": self.time_label[visible],
+            })
+            self.placeholder.altair_chart(self._line.properties(data=data) + self._rules, use_container_width=True)
+        self._drawn = n
+        self._last_draw = now
@@ -0,0 +1,142 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import model_artifact
+import ingest_v6_teams
+
+# --- CONFIGURATION ---
+# Scores the store ingest_v6_teams.py loads: its server/credentials and NBA_STORAGE_BACKEND/NBA_LOCAL_STORE
+WORKERS = os.cpu_count() or 1
+GAMES_PER_CHUNK = 50        # Unit of work per process and per atomic write
+INPUT_COLUMNS = ['GameID', 'HomeTeamID', 'AwayTeamID', 'Quarter', 'TimeRemainingSec', 'HomeScore', 'AwayScore', 'HomeWin']
+
+_model = None   # Loaded once per worker process (memory-mapped, so workers share the pages)
+
+
+def _init_worker(artifact_path):
+    global _model
+    _model = model_artifact.load_model(artifact_path)
+
+
+def score_chunk(plays, model_version, source_versions):
+    """Score every play of a chunk of games in one call and derive the per-game stats.
+
+    `plays` holds whole games in play order. Returns (curves, stats) ready for
+    write_win_probabilities.
+    """
+    margins = (plays['HomeScore'] - plays['AwayScore']).to_numpy()
+    features = pd.DataFrame({'ScoreMargin': margins, 'TimeRemainingSec': plays['TimeRemainingSec'].to_numpy()})
+    probs = _model.predict_proba(features)[:, 1]
+
+    game_ids = plays['GameID'].astype(str).to_numpy()
+    curves = pd.DataFrame({
+        'GameID': game_ids,
+        'ModelVersion': model_version,
+        'Play': plays.groupby('GameID', sort=False).cumcount().to_numpy(),
+        'TimeRemainingSec': plays['TimeRemainingSec'].to_numpy(),
+        'HomeScore': plays['HomeScore'].to_numpy(),
+        'AwayScore': plays['AwayScore'].to_numpy(),
+        'Probability': probs,
+    })
+
+    # Everything from the eventual winner's point of view
+    home_win = plays['HomeWin'].astype(bool).to_numpy()
+    work = pd.DataFrame({
+        'GameID': game_ids,
+        'Swing': np.abs(curves.groupby('GameID', sort=False)['Probability'].diff().fillna(0).to_numpy()),
+        'WinnerProb': np.where(home_win, probs, 1 - probs),
+        'WinnerMargin': np.where(home_win, margins, -margins),
+    })
+    per_game = work.groupby('GameID', sort=False).agg(
+        BiggestSwing=('Swing', 'max'),
+        ExcitementIndex=('Swing', 'sum'),
+        MinWinnerProb=('WinnerProb', 'min'),
+        WorstMargin=('WinnerMargin', 'min'),
+    )
+    first = plays.assign(GameID=game_ids).groupby('GameID', sort=False).first()
+
+    stats = pd.DataFrame({
+        'GameID': per_game.index,
+        'ModelVersion': model_version,
+        'SourceVersion': [int(source_versions.get(g, 0)) for g in per_game.index],
+        'HomeTeamID': first['HomeTeamID'].to_numpy(),
+        'AwayTeamID': first['AwayTeamID'].to_numpy(),
+        'HomeWin': first['HomeWin'].astype(int).to_numpy(),
+        'BiggestSwing': per_game['BiggestSwing'].to_numpy(),
+        'MinWinnerProb': per_game['MinWinnerProb'].to_numpy(),
+        'LargestComeback': np.maximum(0, -per_game['WorstMargin'].to_numpy()),
+        'ExcitementIndex': per_game['ExcitementIndex'].to_numpy(),
+    })
+    return curves, stats
+
+
+def score_all_games(artifact_path=model_artifact.ARTIFACT_PATH, workers=WORKERS,
+                    games_per_chunk=GAMES_PER_CHUNK, force=False):
+    """Materialize win probability curves and per-game stats for the current model.
+
+    Games already scored by this model from their current ingest version are skipped
+    unless force=True, so re-running after a nightly incremental ingest only scores new games.
+    """
+    model_version = model_artifact.load_model(artifact_path).version
+    store = ingest_v6_teams.get_store()
+    store.ensure_schema()
+    print(f"Scoring GameStates from {ingest_v6_teams.STORAGE_BACKEND} with model {model_version}...")
+
+    manifest = store.read_manifest()
+    source_versions = dict(zip(manifest['GameID'].astype(str), manifest['Version'].astype(int)))
+
+    plays = store.read_game_states(INPUT_COLUMNS)
+    plays['GameID'] = plays['GameID'].astype(str)
+    if not force:
+        done = store.read_win_stats(model_version)
+        done = set(done.loc[[int(v) == source_versions.get(str(g), 0)
+                             for g, v in zip(done['GameID'], done['SourceVersion'])], 'GameID'].astype(str))
+        plays = plays[~plays['GameID'].isin(done)]
+        if done:
+            print(f"   {len(done)} games already scored by this model; skipping them.")
+
+    # Whole games in the same play order as read_game and the blobs (storage.REPLAY_ORDER), so
+    # the Play index and the swing/comeback stats agree with every replay path on clock ties
+    order = np.lexsort((plays['AwayScore'].to_numpy(), plays['HomeScore'].to_numpy(), plays['Quarter'].to_numpy(),
+                        -plays['TimeRemainingSec'].to_numpy(), plays['GameID'].to_numpy()))
+    plays = plays.iloc[order]
+    game_ids = plays['GameID'].unique()
+    if not len(game_ids):
+        print("Nothing to score.")
+        return 0
+
+    bounds = np.searchsorted(plays['GameID'].to_numpy(), game_ids[::games_per_chunk])
+    bounds = list(bounds) + [len(plays)]
+    chunks = [plays.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    print(f"   {len(plays)} plays in {len(game_ids)} games -> {len(chunks)} chunks on {workers} worker(s).")
+
+    start = time.perf_counter()
+    scored = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(artifact_path,)) as pool:
+        futures = [pool.submit(score_chunk, chunk, model_version, source_versions) for chunk in chunks]
+        for future in as_completed(futures):
+            curves, stats = future.result()
+            store.write_win_probabilities(curves, stats)
+            scored += len(stats)
+    elapsed = time.perf_counter() - start
+    print(f"   Scored and stored {scored} games in {elapsed:.1f}s ({len(plays) / max(elapsed, 1e-9):,.0f} plays/s).")
+
+    print("\nMost dramatic games (lowest win probability for the eventual winner):")
+    for _, row in store.read_dramatic_games(model_version, limit=5).iterrows():
+        print(f"   {row['GameID']}: winner bottomed out at {row['MinWinnerProb']:.1%}, "
+              f"came back from {int(row['LargestComeback'])} down, biggest swing {row['BiggestSwing']:.1%}")
+    return scored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute win probability curves for every stored game")
+    parser.add_argument('--model', default=model_artifact.ARTIFACT_PATH, help="Model artifact directory")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Scoring processes")
+    parser.add_argument('--chunk-games', type=int, default=GAMES_PER_CHUNK, help="Games per work unit")
+    parser.add_argument('--force', action='store_true', help="Rescore games that are already materialized")
+    args = parser.parse_args()
+
+    score_all_games(args.model, workers=args.workers, games_per_chunk=args.chunk_games, force=args.force)
@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import glob
+import time
+import random
+import argparse
+import threading
+import urllib.request
+import instrumentation
+
+# --- CONFIGURATION ---
+POLL_INTERVAL = 10          # Seconds between upstream scoreboard fetches
+MAX_BACKOFF = 120           # Cap for the retry delay after consecutive failures
+JITTER = 0.1                # +/- fraction applied to every delay so replicas do not poll in lockstep
+IDLE_TIMEOUT = 300          # Stop polling after this long without a reader; the next read resumes it...
+RESUME_TIMEOUT = 10         # ...and waits up to this long for a fresh fetch rather than serve the stale snapshot
+CDN_SCOREBOARD_URL = 'https://cdn.nba.com/static/json/liveData/scoreboard/todaysScoreboard_00.json'
+
+
+# --- FETCHERS ---
+# A fetcher is any zero-argument callable returning the list of game dicts (nba_api live format)
+def nba_api_fetcher():
+    """Fetch today's games through nba_api (imported on first use)."""
+    from nba_api.live.nba.endpoints import scoreboard
+    return scoreboard.ScoreBoard().games.get_dict()
+
+
+def http_fetcher(url=CDN_SCOREBOARD_URL, timeout=10):
+    """Fetch a scoreboard JSON document ({"scoreboard": {"games": [...]}}) from a URL."""
+    def fetch():
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return json.load(resp)['scoreboard']['games']
+    return fetch
+
+
+def fixture_fetcher(pattern):
+    """Replay recorded scoreboard JSON files in name order, one per fetch, holding on the last."""
+    paths = sorted(glob.glob(pattern)) if not os.path.isfile(pattern) else [pattern]
+    if not paths:
+        raise FileNotFoundError(f"No scoreboard fixtures match '{pattern}'")
+    state = {'i': 0}
+
+    def fetch():
+        path = paths[min(state['i'], len(paths) - 1)]
+        state['i'] += 1
+        with open(path) as f:
+            doc = json.load(f)
+        return doc['scoreboard']['games'] if isinstance(doc, dict) else doc
+    return fetch
+
+
+def fetcher_from_source(source):
+    """'nba_api' (default), an http(s) URL, or a fixture file/glob."""
+    if not source or source == 'nba_api':
+        return nba_api_fetcher
+    if source.startswith(('http://', 'https://')):
+        return http_fetcher(source)
+    return fixture_fetcher(source)
+
+
+# --- POLLER ---
+class ScoreboardPoller:
+    """One background thread per process that keeps the latest scoreboard in memory.
+
+    Sessions call snapshot() instead of hitting the API, so upstream traffic is one request
+    per interval however many people are watching. The version only increments when the
+    games actually change. Failures back off exponentially (with jitter) and the last good
+    snapshot keeps being served. After IDLE_TIMEOUT without readers polling pauses and the
+    snapshot is marked stale; the next reader resumes polling and waits for its first fetch.
+    """
+
+    def __init__(self, fetch, interval=POLL_INTERVAL, max_backoff=MAX_BACKOFF, idle_timeout=IDLE_TIMEOUT,
+                 resume_timeout=RESUME_TIMEOUT):
+        self.fetch = fetch
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self.resume_timeout = resume_timeout
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._games = []
+        self._version = 0
+        self._fetched_at = None
+        self._last_read = time.monotonic()
+        self._idle = False
+        self._stale = False
+        self.last_error = None
+        self.stats = {'fetches': 0, 'failures': 0, 'changes': 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scoreboard-poller", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _jitter(self, delay):
+        return delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            # Nobody has looked for a while: sleep until the next snapshot() call
+            if time.monotonic() - self._last_read > self.idle_timeout:
+                with self._lock:
+                    self._stale = True   # No longer being kept current
+                self._idle = True
+                self._wake.clear()
+                if time.monotonic() - self._last_read > self.idle_timeout:
+                    self._wake.wait()
+                self._idle = False
+                continue
+
+            try:
+                with instrumentation.span('scoreboard.fetch'):
+                    games = self.fetch()
+                failures = 0
+                self._publish(games)
+                delay = self.interval
+            except Exception as e:
+                failures += 1
+                with self._lock:
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    self.stats['failures'] += 1
+                    # A reader waiting out a stale snapshot gets the old one with the error instead
+                    self._stale = False
+                    self._changed.notify_all()
+                delay = min(self.max_backoff, self.interval * 2 ** failures)
+            self._wake.clear()
+            self._wake.wait(self._jitter(delay))
+
+    def _publish(self, games):
+        with self._lock:
+            self.stats['fetches'] += 1
+            self._fetched_at = time.time()
+            self.last_error = None
+            self._stale = False
+            if games != self._games:
+                self._games = games
+                self._version += 1
+                self.stats['changes'] += 1
+                instrumentation.inc('scoreboard.changes')
+            self._changed.notify_all()
+
+    def _touch(self):
+        """Note a reader, and wake the thread if it had gone idle."""
+        self._last_read = time.monotonic()
+        if self._idle:
+            self._wake.set()
+
+    def _attempts(self):
+        return self.stats['fetches'] + self.stats['failures']
+
+    def snapshot(self):
+        """(version, games, fetched_at) of the latest successful fetch; version 0 means none yet.
+
+        If polling had paused for lack of readers, waits (up to resume_timeout) for the fetch this
+        call triggers, so the first reader back does not get a snapshot from before the pause.
+        """
+        self._touch()
+        with self._changed:
+            if self._stale:
+                attempts = self._attempts()
+                self._changed.wait_for(lambda: self._attempts() > attempts, timeout=self.resume_timeout)
+            return self._version, self._games, self._fetched_at
+
+    def wait_for_version(self, version, timeout):
+        """Block until the snapshot is newer than `version` (or the timeout passes); returns the snapshot."""
+        self._touch()
+        with self._changed:
+            self._changed.wait_for(lambda: self._version > version, timeout=timeout)
+        return self.snapshot()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record scoreboard fixtures or serve them as a fake scoreboard")
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help="Save the current scoreboard as a fixture")
+    rec.add_argument('out')
+    rec.add_argument('--source', default='nba_api')
+    srv = sub.add_parser('serve', help="Serve fixtures over HTTP in the CDN format, advancing one per request")
+    srv.add_argument('pattern')
+    srv.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        games = fetcher_from_source(args.source)()
+        with open(args.out, 'w') as f:
+            json.dump({'scoreboard': {'games': games}}, f, indent=2)
+        print(f"Recorded {len(games)} games to '{args.out}'.")
+    else:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        fetch = fixture_fetcher(args.pattern)
+        requests = {'n': 0}
+
+        class FakeScoreboard(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests['n'] += 1
+                body = json.dumps({'scoreboard': {'games': fetch()}}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *a):
+                sys.stderr.write(f"   request #{requests['n']}: {fmt % a}\n")
+
+        print(f"Serving '{args.pattern}' on http://127.0.0.1:{args.port}/ (point SCOREBOARD_SOURCE here)")
+        ThreadingHTTPServer(('127.0.0.1', args.port), FakeScoreboard).serve_forever()
@@ -0,0 +1,194 @@
+import os
+import re
+import glob
+import time
+import uuid
+import argparse
+import threading
+import numpy as np
+from contextlib import contextmanager
+import storage
+
+try:
+    import fcntl
+except ImportError:   # Windows: builders fall back to the CURRENT re-check alone
+    fcntl = None
+
+# --- CONFIGURATION ---
+SEASON_STORE_PATH = 'nba_season_store'   # Directory of versioned .npy files plus a CURRENT pointer
+# Replay columns of every play, 8 bytes per row, grouped by game in play order
+PLAY_DTYPE = np.dtype([('TimeRemainingSec', '<i2'), ('Quarter', '<i2'), ('HomeScore', '<i2'), ('AwayScore', '<i2')])
+INDEX_DTYPE = np.dtype([('GameID', 'U20'), ('Offset', '<i8'), ('Length', '<i4'),
+                        ('HomeTeamID', '<i4'), ('AwayTeamID', '<i4')])
+
+
+def build_arrays(df):
+    """(plays, index) arrays from GameStates rows: games in GameID order, plays in storage.REPLAY_ORDER."""
+    game_ids = df['GameID'].astype(str).to_numpy()
+    order = np.lexsort((df['AwayScore'].to_numpy(), df['HomeScore'].to_numpy(), df['Quarter'].to_numpy(),
+                        -df['TimeRemainingSec'].to_numpy(), game_ids))
+
+    plays = np.empty(len(df), dtype=PLAY_DTYPE)
+    for name in PLAY_DTYPE.names:
+        plays[name] = df[name].to_numpy()[order]
+
+    sorted_ids = game_ids[order]
+    unique_ids, offsets, lengths = np.unique(sorted_ids, return_index=True, return_counts=True)
+    index = np.empty(len(unique_ids), dtype=INDEX_DTYPE)
+    index['GameID'] = unique_ids
+    index['Offset'] = offsets
+    index['Length'] = lengths
+    index['HomeTeamID'] = df['HomeTeamID'].to_numpy()[order][offsets]
+    index['AwayTeamID'] = df['AwayTeamID'].to_numpy()[order][offsets]
+    return plays, index
+
+
+def current_version(path=SEASON_STORE_PATH):
+    """Data version of the published files, or None if nothing has been built yet."""
+    try:
+        with open(os.path.join(path, 'CURRENT')) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _publish_lock(path):
+    """Exclusive lock on `path`/LOCK so concurrent builders publish one at a time."""
+    with open(os.path.join(path, 'LOCK'), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield   # Closing the file releases the lock
+
+
+def build(store, path=SEASON_STORE_PATH, version=None):
+    """Snapshot the store's GameStates into new versioned files and publish them atomically.
+
+    `version` defaults to the newest ingest version in the manifest, which is what readers
+    compare against to decide when to refresh. Returns the published version, which is a
+    concurrent builder's when that one already published the same or a newer version.
+    """
+    if version is None:
+        manifest = store.read_manifest()
+        version = int(manifest['Version'].max()) if len(manifest) else 0
+    plays, index = build_arrays(store.read_game_states(['GameID', 'HomeTeamID', 'AwayTeamID'] + storage.REPLAY_ORDER))
+
+    os.makedirs(path, exist_ok=True)
+    with _publish_lock(path):
+        # A slower builder must never move CURRENT back to an older snapshot
+        published = current_version(path)
+        if published is not None and published >= version:
+            return published
+
+        for name, array in (('plays', plays), ('index', index)):
+            tmp = os.path.join(path, f'{name}-{version}.npy.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp, os.path.join(path, f'{name}-{version}.npy'))
+
+        # The pointer is the commit: readers switch to the new files in one step
+        tmp = os.path.join(path, f'CURRENT.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+        with open(tmp, 'w') as f:
+            f.write(str(version))
+        os.replace(tmp, os.path.join(path, 'CURRENT'))
+
+        # Only older versions go: processes still mapping one keep their pages until they refresh
+        # (unlink is safe on POSIX)
+        for old in glob.glob(os.path.join(path, '*-*.npy')):
+            match = re.search(r'-(\d+)\.npy$', old)
+            if match and int(match.group(1)) < version:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+    return version
+
+
+class SeasonStore:
+    """Every stored play memory-mapped from disk, so worker processes share one copy via the page cache.
+
+    game() returns a zero-copy slice of the mapped array. refresh() swaps in a newer build
+    atomically: callers holding an older slice keep a valid view of the old mapping.
+    """
+
+    def __init__(self, path=SEASON_STORE_PATH):
+        self.path = path
+        self.version = None
+        self._plays = None
+        self._index = {}
+        self._lock = threading.Lock()
+        self.failed_version = None   # data_version whose rebuild last failed
+
+    def load(self):
+        """Map the published version; returns False if none exists yet."""
+        version = current_version(self.path)
+        if version is None:
+            return False
+        plays_path = os.path.join(self.path, f'plays-{version}.npy')
+        try:
+            plays = np.load(plays_path, mmap_mode='r')
+        except ValueError:
+            plays = np.load(plays_path)   # An empty array cannot be mapped
+        index = np.load(os.path.join(self.path, f'index-{version}.npy'))
+        lookup = {game_id: (int(offset), int(length), int(home), int(away))
+                  for game_id, offset, length, home, away in index.tolist()}
+        # One reference swap: concurrent readers see the old or the new snapshot, never a mix
+        self._plays, self._index, self.version = plays, lookup, version
+        return True
+
+    def refresh(self, store, data_version):
+        """Make sure the mapped snapshot is at least `data_version`, rebuilding from `store` if needed.
+
+        A failed rebuild is not retried for the same `data_version`: callers keep the older
+        snapshot (or their fallback) until a newer ingest version arrives.
+        """
+        if self.version is not None and self.version >= data_version:
+            return
+        if self.failed_version == data_version:
+            return
+        with self._lock:
+            if self.version is not None and self.version >= data_version:
+                return
+            if self.failed_version == data_version:
+                return
+            try:
+                # Another process may already have published a fresh enough build
+                published = current_version(self.path)
+                if published is None or published < data_version:
+                    build(store, self.path)
+                self.load()
+            except Exception:
+                self.failed_version = data_version
+                raise
+
+    def game(self, game_id):
+        """Plays of one game in replay order as a structured array view, or None if not stored."""
+        entry = self._index.get(str(game_id))
+        if entry is None:
+            return None
+        offset, length = entry[0], entry[1]
+        return self._plays[offset:offset + length]
+
+    def __len__(self):
+        return len(self._index)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped season store from GameStates")
+    parser.add_argument('--path', default=SEASON_STORE_PATH)
+    parser.add_argument('--backend', default=os.environ.get('NBA_STORAGE_BACKEND', 'sqlite'))
+    parser.add_argument('--store', default=os.environ.get('NBA_LOCAL_STORE'), help="Local store path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    version = build(storage.open_store(args.backend, path=args.store), args.path)
+    resident = SeasonStore(args.path)
+    resident.load()
+    print(f"Built season store v{version}: {len(resident)} games, "
+          f"{len(resident._plays)} plays in {time.perf_counter() - start:.1f}s.")
+
+    game_ids = list(resident._index)
+    start = time.perf_counter()
+    for game_id in game_ids:
+        resident.game(game_id)
+    print(f"   Per-game lookup: {(time.perf_counter() - start) / max(len(game_ids), 1) * 1e6:.1f} us.")
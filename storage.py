@@ -0,0 +1,1081 @@
+import os
+import re
+import glob
+import uuid
+import shutil
+import importlib
+import time
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+import game_blobs
+import instrumentation
+
+# --- CONFIGURATION ---
+# Columns written by the ingest pipeline (GameDate is stamped by the store)
+GAME_STATE_COLUMNS = [
+    'GameID', 'Season', 'HomeTeamID', 'AwayTeamID', 'Quarter', 'TimeRemainingSec',
+    'HomeScore', 'AwayScore', 'HomeWin'
+]
+# One row per ingested game; Version stamps let the app drop cached data for re-ingested games
+MANIFEST_COLUMNS = ['GameID', 'Season', 'ContentHash', 'Version']
+REPLAY_COLUMNS = ['TimeRemainingSec', 'HomeScore', 'AwayScore', 'Quarter', 'HomeTeamID', 'AwayTeamID']
+# Play order of a replay: clock descending, then quarter and scores (both only ever rise) to break ties
+REPLAY_ORDER = ['TimeRemainingSec', 'Quarter', 'HomeScore', 'AwayScore']
+WRITE_CHUNK_SIZE = 5000
+STAGING_TABLE = 'GameStates_staging'
+STAGING_BATCHES_TABLE = 'GameStates_staging_batches'   # Bulk-loader batch ids committed to staging
+BLOB_ROW_GROUP = 64   # Games per Parquet row group in blobs.parquet (the unit a single-game read fetches)
+# Materialized model output, keyed by (ModelVersion, GameID); written by score_win_probability.py
+WIN_CURVE_COLUMNS = ['GameID', 'ModelVersion', 'Play', 'TimeRemainingSec', 'HomeScore', 'AwayScore', 'Probability']
+WIN_STATS_COLUMNS = [
+    'GameID', 'ModelVersion', 'SourceVersion', 'HomeTeamID', 'AwayTeamID', 'HomeWin',
+    'BiggestSwing', 'MinWinnerProb', 'LargestComeback', 'ExcitementIndex'
+]
+# Model features + label; training reads these as unique rows with a Plays count
+TRAINING_COLUMNS = ['ScoreMargin', 'TimeRemainingSec', 'HomeWin']
+# One row per game, written by the ingest pipeline; the app lists and searches games here
+GAMES_COLUMNS = ['GameID', 'Season', 'GameDate', 'HomeTeamID', 'AwayTeamID', 'HomeFinal', 'AwayFinal', 'Plays']
+# (name, key columns, covered columns); the GameID/TimeRemainingSec index answers read_game on its own
+GAME_STATES_INDEXES = [
+    ('IX_GameStates_GameID_Time', 'GameID, TimeRemainingSec', 'HomeScore, AwayScore, Quarter, HomeTeamID, AwayTeamID'),
+    ('IX_GameStates_Season_GameID', 'Season, GameID', None),
+]
+# Superseded by IX_GameStates_GameID_Time; dropped by ensure_schema
+LEGACY_INDEXES = ['IX_GameStates_GameID']
+
+
+class GameStateStore:
+    """Columnar read/write access to the GameStates table, independent of where it lives."""
+
+    def read_game_states(self, columns=None):
+        """Return the requested GameStates columns (all if None) for every play."""
+        raise NotImplementedError
+
+    def list_games(self, limit=50):
+        """Return the first `limit` games (GameID, HomeTeamID, AwayTeamID) ordered by GameID."""
+        return self.search_games(limit=limit)[['GameID', 'HomeTeamID', 'AwayTeamID']]
+
+    def search_games(self, team_id=None, season=None, date_from=None, date_to=None, after=None, limit=50):
+        """Return up to `limit` Games rows (GAMES_COLUMNS) matching the filters, ordered by GameID.
+
+        `team_id` matches either side. Pages are keyset-based: pass the last GameID of the
+        previous page as `after`, so every page costs the same however deep it is.
+        """
+        raise NotImplementedError
+
+    def list_seasons(self):
+        """Games per Season with the first and last known GameDate, from the Games catalog."""
+        raise NotImplementedError
+
+    def has_catalog(self):
+        """Whether the Games catalog exists (stores loaded before it existed get it from ensure_schema)."""
+        return True
+
+    def read_game(self, game_id):
+        """Return the replay columns for one game in play order (REPLAY_ORDER)."""
+        raise NotImplementedError
+
+    def read_game_blob(self, game_id):
+        """Return one game's packed replay record (see game_blobs.py), or None if it has none."""
+        raise NotImplementedError
+
+    def read_training_counts(self, folds=None):
+        """Return the unique (TRAINING_COLUMNS) rows with the number of plays behind each as Plays.
+
+        With folds=k the rows also carry Fold = GameID % k, so every game falls in exactly one fold.
+        """
+        df = self.read_game_states(['GameID', 'HomeScore', 'AwayScore', 'TimeRemainingSec', 'HomeWin'])
+        return aggregate_training_counts(df, folds)
+
+    def identity(self):
+        """Where this store keeps its data, e.g. 'sqlite:/abs/path.db' (keys the bulk-load checkpoint)."""
+        raise NotImplementedError
+
+    def write_game_states(self, df, staging=False, batch_id=None):
+        """Append the rows of `df` (GAME_STATE_COLUMNS) to GameStates, or to the staging area.
+
+        A staged write with a `batch_id` records that id in the same step as the rows (see staged_batches).
+        """
+        raise NotImplementedError
+
+    def clear_game_states(self):
+        """Delete every row of GameStates."""
+        raise NotImplementedError
+
+    # --- STAGED LOADS ---
+    max_writers = 4   # Concurrent write_game_states(staging=True) calls the backend tolerates
+
+    def begin_staging(self, resume=False):
+        """Create an empty staging area next to GameStates (keep the existing one if resuming)."""
+        raise NotImplementedError
+
+    def staged_batches(self):
+        """Ids of the batches whose rows are in the staging area; a resumed load skips exactly these."""
+        raise NotImplementedError
+
+    def count_rows_by_game(self, staging=False):
+        """Row count per GameID, as a Series indexed by GameID."""
+        raise NotImplementedError
+
+    def swap_staging(self, manifest=None, catalog=None, blobs=None):
+        """Atomically replace GameStates with the staging area. Readers see either the old or new data.
+
+        The manifest, Games catalog and replay blobs of the new data, when given, are replaced in
+        the same step, so they never describe the previous load.
+        """
+        raise NotImplementedError
+
+    # --- INCREMENTAL LOADS ---
+    def ensure_schema(self):
+        """Create or migrate the Season column, indexes, IngestManifest and Games if they are missing."""
+
+    def read_manifest(self):
+        """Return the ingest manifest (MANIFEST_COLUMNS), one row per game."""
+        raise NotImplementedError
+
+    def replace_manifest(self, manifest):
+        """Overwrite the whole manifest (after a full rebuild)."""
+        raise NotImplementedError
+
+    def replace_catalog(self, catalog):
+        """Overwrite the whole Games catalog (GAMES_COLUMNS) after a full rebuild."""
+        raise NotImplementedError
+
+    def replace_game_blobs(self, blobs):
+        """Overwrite every packed replay record with `blobs` (GameID, Blob) after a full rebuild."""
+        raise NotImplementedError
+
+    def upsert_games(self, df, manifest):
+        """Atomically replace every row of the games in `manifest` with `df`, record them and
+        refresh their Games rows and replay blobs."""
+        raise NotImplementedError
+
+    # --- MATERIALIZED WIN PROBABILITY ---
+    def write_win_probabilities(self, curves, stats):
+        """Replace the curves (WIN_CURVE_COLUMNS) and stats (WIN_STATS_COLUMNS) of the games in `stats`.
+
+        Each call is atomic, so a game is either fully scored for a model version or absent.
+        """
+        raise NotImplementedError
+
+    def read_win_stats(self, model_version):
+        """Per-game stats (WIN_STATS_COLUMNS) materialized for one model version."""
+        raise NotImplementedError
+
+    def read_win_curve(self, game_id, model_version, source_version=None):
+        """Scored plays of one game in play order; empty unless scored by this model from this ingest version."""
+        raise NotImplementedError
+
+    def read_dramatic_games(self, model_version, limit=20):
+        """Stats of the games where the eventual winner's win probability fell lowest."""
+        raise NotImplementedError
+
+
+# --- SQL BACKENDS ---
+class SQLGameStateStore(GameStateStore):
+    """Shared SQL for the database backends. Subclasses provide connect() and the dialect bits."""
+
+    param = '?'          # Placeholder style of the DB-API driver
+    limit_first = False  # Whether _limit's placeholder comes before the statement's other parameters
+    now_sql = 'CURRENT_TIMESTAMP'
+    truncate_sql = "DELETE FROM GameStates"
+    table_exists_sql = None   # One-parameter query whose first column is NULL (or no row) for a missing table
+    pool = None          # Optional db_pool.ConnectionPool; otherwise one connection per call
+
+    def open_connection(self):
+        """Open a single new connection (no retries)."""
+        raise NotImplementedError
+
+    def connect(self):
+        return self.open_connection()
+
+    def retryable_errors(self):
+        """Driver exceptions that are worth a reconnect attempt."""
+        return sqlite3.OperationalError
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection if a pool is attached, else open and close one."""
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+        with instrumentation.span('db.connect'):
+            conn = self.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _limit(self, select):
+        """Add a row-limit placeholder to a complete 'SELECT ... ORDER BY ...' statement."""
+        raise NotImplementedError
+
+    def query(self, sql, params=None):
+        """Run a parameterized SELECT and return the result as a DataFrame."""
+        with self.connection() as conn, instrumentation.span('db.query'):
+            return pd.read_sql(sql, conn, params=params)
+
+    def read_game_states(self, columns=None):
+        cols = ', '.join(columns) if columns else '*'
+        return self.query(f"SELECT {cols} FROM GameStates")
+
+    def read_training_counts(self, folds=None):
+        # Aggregated on the server: only the distinct feature/label tuples cross the network
+        fold = f"CAST(GameID AS BIGINT) % {int(folds)}" if folds else None
+        df = self.query(f"""
+            SELECT HomeScore - AwayScore AS ScoreMargin, TimeRemainingSec, HomeWin,
+                   {f"{fold} AS Fold, " if fold else ""}COUNT(*) AS Plays
+            FROM GameStates
+            GROUP BY HomeScore - AwayScore, TimeRemainingSec, HomeWin{f", {fold}" if fold else ""}
+        """)
+        return aggregate_training_counts(df, folds)
+
+    def search_games(self, team_id=None, season=None, date_from=None, date_to=None, after=None, limit=50):
+        where, params = [], []
+        if team_id is not None:
+            where.append(f"(HomeTeamID = {self.param} OR AwayTeamID = {self.param})")
+            params += [int(team_id), int(team_id)]
+        if season is not None:
+            where.append(f"Season = {self.param}")
+            params.append(int(season))
+        if date_from is not None:
+            where.append(f"GameDate >= {self.param}")
+            params.append(str(date_from))
+        if date_to is not None:
+            where.append(f"GameDate <= {self.param}")
+            params.append(str(date_to))
+        if after is not None:
+            where.append(f"GameID > {self.param}")
+            params.append(str(after))
+        sql = self._limit(f"""
+            SELECT {', '.join(GAMES_COLUMNS)} FROM Games
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY GameID
+        """)
+        return self.query(sql, params=self._limit_params(limit, params))
+
+    def list_seasons(self):
+        return self.query("""
+            SELECT Season, COUNT(*) AS Games, MIN(GameDate) AS FirstDate, MAX(GameDate) AS LastDate
+            FROM Games GROUP BY Season ORDER BY Season
+        """)
+
+    def has_catalog(self):
+        with self.connection() as conn, instrumentation.span('db.query'):
+            cursor = conn.cursor()
+            cursor.execute(self.table_exists_sql, ('Games',))
+            row = cursor.fetchone()
+        return row is not None and row[0] is not None
+
+    def _index_sql(self, name, table, keys, covered=None):
+        # No INCLUDE clause here: covered columns become trailing key columns instead
+        return f"CREATE INDEX {name} ON {table} ({keys}{', ' + covered if covered else ''})"
+
+    def _backfill_catalog(self, cursor):
+        """Derive the Games catalog from GameStates once, for stores loaded before it existed."""
+        cursor.execute(f"""
+            INSERT INTO Games ({', '.join(GAMES_COLUMNS)})
+            SELECT GameID, MAX(Season), NULL, MAX(HomeTeamID), MAX(AwayTeamID),
+                   MAX(HomeScore), MAX(AwayScore), COUNT(*)
+            FROM GameStates
+            WHERE NOT EXISTS (SELECT 1 FROM Games)
+            GROUP BY GameID
+        """)
+
+    def read_game(self, game_id):
+        sql = f"""
+            SELECT {', '.join(REPLAY_COLUMNS)}
+            FROM GameStates
+            WHERE GameID = {self.param}
+            ORDER BY TimeRemainingSec DESC, Quarter, HomeScore, AwayScore
+        """
+        return self.query(sql, params=(str(game_id),))
+
+    def read_game_blob(self, game_id):
+        with self.connection() as conn, instrumentation.span('db.query'):
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT Blob FROM GameBlobs WHERE GameID = {self.param}", (str(game_id),))
+            row = cursor.fetchone()
+        return bytes(row[0]) if row else None
+
+    def _limit_params(self, limit, params=()):
+        return (int(limit),) + tuple(params) if self.limit_first else tuple(params) + (int(limit),)
+
+    def _insert(self, cursor, table, df, columns, stamp_column=None):
+        """Bulk insert `columns` of `df`, stamping `stamp_column` (if any) with the server time."""
+        placeholders = ', '.join([self.param] * len(columns))
+        stamp_name = f", {stamp_column}" if stamp_column else ''
+        stamp_value = f", {self.now_sql}" if stamp_column else ''
+        sql = f"""
+            INSERT INTO {table} ({', '.join(columns)}{stamp_name})
+            VALUES ({placeholders}{stamp_value})
+        """
+        records = df[columns].astype(object).values.tolist()
+        self._prepare_bulk(cursor)
+        for i in range(0, len(records), WRITE_CHUNK_SIZE):
+            cursor.executemany(sql, records[i:i + WRITE_CHUNK_SIZE])
+
+    def write_game_states(self, df, staging=False, batch_id=None):
+        table = STAGING_TABLE if staging else 'GameStates'
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._insert(cursor, table, df, GAME_STATE_COLUMNS, 'GameDate')
+            if staging and batch_id is not None:
+                # Same transaction as the rows: a batch is either staged and recorded, or neither
+                cursor.execute(f"INSERT INTO {STAGING_BATCHES_TABLE} (BatchID) VALUES ({self.param})",
+                               (int(batch_id),))
+            conn.commit()
+
+    def staged_batches(self):
+        return set(self.query(f"SELECT BatchID FROM {STAGING_BATCHES_TABLE}")['BatchID'].astype(int))
+
+    def clear_game_states(self):
+        with self.connection() as conn:
+            conn.cursor().execute(self.truncate_sql)
+            conn.commit()
+
+    def count_rows_by_game(self, staging=False):
+        table = STAGING_TABLE if staging else 'GameStates'
+        df = self.query(f"SELECT GameID, COUNT(*) AS Plays FROM {table} GROUP BY GameID")
+        return df.set_index('GameID')['Plays']
+
+    def read_manifest(self):
+        return self.query(f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM IngestManifest")
+
+    def _replace_tables(self, cursor, manifest=None, catalog=None, blobs=None):
+        """Delete and re-insert each per-game table given; the caller commits."""
+        tables = [('IngestManifest', manifest, MANIFEST_COLUMNS, 'IngestedAt'),
+                  ('Games', None if catalog is None else _catalog_records(catalog), GAMES_COLUMNS, None),
+                  ('GameBlobs', blobs, ['GameID', 'Blob'], None)]
+        for table, df, columns, stamp_column in tables:
+            if df is not None:
+                cursor.execute(f"DELETE FROM {table}")
+                self._insert(cursor, table, df, columns, stamp_column)
+
+    def replace_manifest(self, manifest):
+        with self.connection() as conn:
+            self._replace_tables(conn.cursor(), manifest=manifest)
+            conn.commit()
+
+    def replace_catalog(self, catalog):
+        with self.connection() as conn:
+            self._replace_tables(conn.cursor(), catalog=catalog)
+            conn.commit()
+
+    def replace_game_blobs(self, blobs):
+        with self.connection() as conn:
+            self._replace_tables(conn.cursor(), blobs=blobs)
+            conn.commit()
+
+    def upsert_games(self, df, manifest):
+        game_ids = [(str(g),) for g in manifest['GameID']]
+        with self.connection() as conn:
+            # Delete + insert in one transaction: readers see the old or the new game, never a mix
+            cursor = conn.cursor()
+            for table in ('GameStates', 'IngestManifest', 'Games', 'GameBlobs'):
+                cursor.executemany(f"DELETE FROM {table} WHERE GameID = {self.param}", game_ids)
+            self._insert(cursor, 'GameStates', df, GAME_STATE_COLUMNS, 'GameDate')
+            self._insert(cursor, 'IngestManifest', manifest, MANIFEST_COLUMNS, 'IngestedAt')
+            self._insert(cursor, 'Games', _catalog_records(build_catalog(df)), GAMES_COLUMNS)
+            self._insert(cursor, 'GameBlobs', game_blobs.encode_games(df), ['GameID', 'Blob'])
+            conn.commit()
+
+    def write_win_probabilities(self, curves, stats):
+        keys = [(str(g), str(m)) for g, m in zip(stats['GameID'], stats['ModelVersion'])]
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            for table in ('GameWinProbability', 'GameWinStats'):
+                cursor.executemany(
+                    f"DELETE FROM {table} WHERE GameID = {self.param} AND ModelVersion = {self.param}", keys)
+            self._insert(cursor, 'GameWinProbability', curves, WIN_CURVE_COLUMNS)
+            self._insert(cursor, 'GameWinStats', stats, WIN_STATS_COLUMNS, 'ScoredAt')
+            conn.commit()
+
+    def read_win_stats(self, model_version):
+        return self.query(f"SELECT {', '.join(WIN_STATS_COLUMNS)} FROM GameWinStats WHERE ModelVersion = {self.param}",
+                          params=(str(model_version),))
+
+    def read_win_curve(self, game_id, model_version, source_version=None):
+        # Only trust a curve scored from the currently ingested version of the game
+        fresh = f"""
+            AND EXISTS (SELECT 1 FROM GameWinStats s
+                        WHERE s.GameID = p.GameID AND s.ModelVersion = p.ModelVersion
+                          AND s.SourceVersion = {self.param})
+        """ if source_version else ''
+        params = (str(game_id), str(model_version)) + ((int(source_version),) if source_version else ())
+        return self.query(f"""
+            SELECT Play, TimeRemainingSec, HomeScore, AwayScore, Probability
+            FROM GameWinProbability p
+            WHERE p.GameID = {self.param} AND p.ModelVersion = {self.param} {fresh}
+            ORDER BY Play
+        """, params=params)
+
+    def read_dramatic_games(self, model_version, limit=20):
+        sql = self._limit(f"""
+            SELECT {', '.join(WIN_STATS_COLUMNS)} FROM GameWinStats
+            WHERE ModelVersion = {self.param}
+            ORDER BY MinWinnerProb
+        """)
+        return self.query(sql, params=self._limit_params(limit, (str(model_version),)))
+
+    def _prepare_bulk(self, cursor):
+        pass
+
+
+class AzureSQLStore(SQLGameStateStore):
+    """GameStates in Azure SQL, reached through pymssql (app) or pyodbc (ETL/training)."""
+
+    now_sql = 'GETDATE()'
+    truncate_sql = "TRUNCATE TABLE GameStates"
+
+    def __init__(self, server, database, username, password, driver='pymssql',
+                 odbc_driver='{ODBC Driver 18 for SQL Server}', max_retries=3, retry_delay=5):
+        self.server = server
+        self.database = database
+        self.username = username
+        self.password = password
+        self.driver = driver
+        self.odbc_driver = odbc_driver
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay  # Seconds
+        self.param = '%s' if driver == 'pymssql' else '?'
+
+    def connect(self):
+        """Establish connection with retry logic for 'Sleeping' serverless DBs."""
+        for attempt in range(self.max_retries):
+            try:
+                return self.open_connection()
+            except self.retryable_errors():
+                if attempt < self.max_retries - 1:
+                    time.sleep(self.retry_delay)
+                    continue
+                raise
+
+    def identity(self):
+        return f"azure:{self.server}/{self.database}"
+
+    def retryable_errors(self):
+        """Driver exceptions worth retrying (a paused database refuses logins for a while)."""
+        return importlib.import_module(self.driver).OperationalError
+
+    def open_connection(self):
+        if self.driver == 'pymssql':
+            import pymssql
+            return pymssql.connect(
+                server=f"{self.server}:1433",
+                user=self.username,
+                password=self.password,
+                database=self.database,
+                login_timeout=30
+            )
+
+        import pyodbc
+        conn_str = (
+            f'DRIVER={self.odbc_driver};SERVER={self.server},1433;DATABASE={self.database};'
+            f'UID={self.username};PWD={self.password};'
+            'Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30;'
+        )
+        return pyodbc.connect(conn_str)
+
+    limit_first = True
+
+    @property
+    def table_exists_sql(self):
+        return f"SELECT OBJECT_ID({self.param}, 'U')"
+
+    def _limit(self, select):
+        # T-SQL puts TOP right after SELECT [DISTINCT]
+        return re.sub(r'^(\s*SELECT(\s+DISTINCT)?)', rf'\1 TOP ({self.param})', select, count=1)
+
+    def _index_sql(self, name, table, keys, covered=None):
+        return f"CREATE INDEX {name} ON {table} ({keys}){f' INCLUDE ({covered})' if covered else ''}"
+
+    def _prepare_bulk(self, cursor):
+        if self.driver == 'pyodbc':
+            cursor.fast_executemany = True
+
+    def ensure_schema(self):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("IF COL_LENGTH('GameStates', 'Season') IS NULL "
+                           "ALTER TABLE GameStates ADD Season SMALLINT NULL")
+            conn.commit()
+
+            # Backfill from the GameID layout 00 + type + YY + game number (e.g. 0021800001 -> 2018)
+            cursor.execute("""
+                UPDATE g
+                SET Season = CASE WHEN s.yy < 50 THEN 2000 + s.yy ELSE 1900 + s.yy END
+                FROM GameStates g
+                CROSS APPLY (SELECT CAST(SUBSTRING(RIGHT('0000000000' + g.GameID, 10), 4, 2) AS INT) AS yy) s
+                WHERE g.Season IS NULL
+            """)
+            cursor.execute("""
+                IF OBJECT_ID('IngestManifest') IS NULL
+                CREATE TABLE IngestManifest (
+                    GameID VARCHAR(20) NOT NULL PRIMARY KEY,
+                    Season SMALLINT,
+                    ContentHash CHAR(40),
+                    Version BIGINT,
+                    IngestedAt DATETIME2
+                )
+            """)
+            for name, keys, covered in GAME_STATES_INDEXES:
+                cursor.execute(f"""
+                    IF NOT EXISTS (SELECT 1 FROM sys.indexes
+                                   WHERE name = '{name}' AND object_id = OBJECT_ID('GameStates'))
+                    {self._index_sql(name, 'GameStates', keys, covered)}
+                """)
+            for name in LEGACY_INDEXES:
+                cursor.execute(f"""
+                    IF EXISTS (SELECT 1 FROM sys.indexes
+                               WHERE name = '{name}' AND object_id = OBJECT_ID('GameStates'))
+                    DROP INDEX {name} ON GameStates
+                """)
+            cursor.execute("""
+                IF OBJECT_ID('Games') IS NULL
+                BEGIN
+                    CREATE TABLE Games (
+                        GameID VARCHAR(20) NOT NULL PRIMARY KEY,
+                        Season SMALLINT,
+                        GameDate DATE,
+                        HomeTeamID INT,
+                        AwayTeamID INT,
+                        HomeFinal SMALLINT,
+                        AwayFinal SMALLINT,
+                        Plays INT
+                    );
+                    CREATE INDEX IX_Games_Season ON Games (Season, GameID);
+                    CREATE INDEX IX_Games_Home ON Games (HomeTeamID, GameID);
+                    CREATE INDEX IX_Games_Away ON Games (AwayTeamID, GameID);
+                    CREATE INDEX IX_Games_Date ON Games (GameDate, GameID);
+                END
+            """)
+            self._backfill_catalog(cursor)
+            cursor.execute("""
+                IF OBJECT_ID('GameBlobs') IS NULL
+                CREATE TABLE GameBlobs (
+                    GameID VARCHAR(20) NOT NULL PRIMARY KEY,
+                    Blob VARBINARY(MAX) NOT NULL
+                )
+            """)
+            cursor.execute("""
+                IF OBJECT_ID('GameWinProbability') IS NULL
+                BEGIN
+                    CREATE TABLE GameWinProbability (
+                        GameID VARCHAR(20) NOT NULL,
+                        ModelVersion VARCHAR(40) NOT NULL,
+                        Play INT NOT NULL,
+                        TimeRemainingSec INT,
+                        HomeScore SMALLINT,
+                        AwayScore SMALLINT,
+                        Probability REAL
+                    );
+                    CREATE CLUSTERED INDEX IX_GameWinProbability ON GameWinProbability (ModelVersion, GameID, Play);
+                END
+            """)
+            cursor.execute("""
+                IF OBJECT_ID('GameWinStats') IS NULL
+                BEGIN
+                    CREATE TABLE GameWinStats (
+                        GameID VARCHAR(20) NOT NULL,
+                        ModelVersion VARCHAR(40) NOT NULL,
+                        SourceVersion BIGINT,
+                        HomeTeamID INT,
+                        AwayTeamID INT,
+                        HomeWin BIT,
+                        BiggestSwing REAL,
+                        MinWinnerProb REAL,
+                        LargestComeback SMALLINT,
+                        ExcitementIndex REAL,
+                        ScoredAt DATETIME2,
+                        PRIMARY KEY (ModelVersion, GameID)
+                    );
+                    CREATE INDEX IX_GameWinStats_Drama ON GameWinStats (ModelVersion, MinWinnerProb);
+                END
+            """)
+            conn.commit()
+
+    def begin_staging(self, resume=False):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT OBJECT_ID('{STAGING_TABLE}')")
+            exists = cursor.fetchone()[0] is not None
+            if exists and resume:
+                return
+            if exists:
+                cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+            cursor.execute(f"IF OBJECT_ID('{STAGING_BATCHES_TABLE}') IS NOT NULL DROP TABLE {STAGING_BATCHES_TABLE}")
+            # Same columns as GameStates, no indexes until the data is in
+            cursor.execute(f"SELECT TOP 0 * INTO {STAGING_TABLE} FROM GameStates")
+            cursor.execute(f"CREATE TABLE {STAGING_BATCHES_TABLE} (BatchID INT NOT NULL PRIMARY KEY)")
+            conn.commit()
+
+    def swap_staging(self, manifest=None, catalog=None, blobs=None):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            # Index names are per table in SQL Server, so the staging copy can reuse them
+            for name, keys, covered in GAME_STATES_INDEXES:
+                cursor.execute(self._index_sql(name, STAGING_TABLE, keys, covered))
+            conn.commit()
+
+            # The metadata rewrite and both renames run in the driver's open transaction and commit
+            # together, so readers block briefly on the schema lock but never see a missing or
+            # half-loaded table, or metadata that belongs to the other load
+            self._replace_tables(cursor, manifest, catalog, blobs)
+            cursor.execute("EXEC sp_rename 'GameStates', 'GameStates_old'")
+            cursor.execute(f"EXEC sp_rename '{STAGING_TABLE}', 'GameStates'")
+            conn.commit()
+            cursor.execute("DROP TABLE GameStates_old")
+            cursor.execute(f"IF OBJECT_ID('{STAGING_BATCHES_TABLE}') IS NOT NULL DROP TABLE {STAGING_BATCHES_TABLE}")
+            conn.commit()
+
+
+class SQLiteStore(SQLGameStateStore):
+    """GameStates in a local SQLite file, for offline development, CI and benchmarks."""
+
+    max_writers = 1   # SQLite serializes writers anyway
+    table_exists_sql = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?"
+
+    def __init__(self, path='nba_game_states.db'):
+        self.path = path
+        self.ensure_schema()
+
+    def identity(self):
+        return f"sqlite:{os.path.abspath(self.path)}"
+
+    def ensure_schema(self):
+        with self.connection() as conn:
+            self._create_table(conn, 'GameStates')
+            # Files created before the Season column existed
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(GameStates)")]
+            if 'Season' not in columns:
+                conn.execute("ALTER TABLE GameStates ADD COLUMN Season INTEGER")
+            self._create_indexes(conn)
+            for name in LEGACY_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS IngestManifest (
+                    GameID TEXT PRIMARY KEY,
+                    Season INTEGER,
+                    ContentHash TEXT,
+                    Version INTEGER,
+                    IngestedAt TEXT
+                )
+            """)
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS GameWinProbability (
+                    GameID TEXT NOT NULL,
+                    ModelVersion TEXT NOT NULL,
+                    Play INTEGER NOT NULL,
+                    TimeRemainingSec INTEGER,
+                    HomeScore INTEGER,
+                    AwayScore INTEGER,
+                    Probability REAL
+                );
+                CREATE INDEX IF NOT EXISTS IX_GameWinProbability
+                    ON GameWinProbability (ModelVersion, GameID, Play);
+                CREATE TABLE IF NOT EXISTS GameWinStats (
+                    GameID TEXT NOT NULL,
+                    ModelVersion TEXT NOT NULL,
+                    SourceVersion INTEGER,
+                    HomeTeamID INTEGER,
+                    AwayTeamID INTEGER,
+                    HomeWin INTEGER,
+                    BiggestSwing REAL,
+                    MinWinnerProb REAL,
+                    LargestComeback INTEGER,
+                    ExcitementIndex REAL,
+                    ScoredAt TEXT,
+                    PRIMARY KEY (ModelVersion, GameID)
+                );
+                CREATE INDEX IF NOT EXISTS IX_GameWinStats_Drama ON GameWinStats (ModelVersion, MinWinnerProb);
+                CREATE TABLE IF NOT EXISTS Games (
+                    GameID TEXT PRIMARY KEY,
+                    Season INTEGER,
+                    GameDate TEXT,
+                    HomeTeamID INTEGER,
+                    AwayTeamID INTEGER,
+                    HomeFinal INTEGER,
+                    AwayFinal INTEGER,
+                    Plays INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS IX_Games_Season ON Games (Season, GameID);
+                CREATE INDEX IF NOT EXISTS IX_Games_Home ON Games (HomeTeamID, GameID);
+                CREATE INDEX IF NOT EXISTS IX_Games_Away ON Games (AwayTeamID, GameID);
+                CREATE INDEX IF NOT EXISTS IX_Games_Date ON Games (GameDate, GameID);
+                CREATE TABLE IF NOT EXISTS GameBlobs (
+                    GameID TEXT PRIMARY KEY,
+                    Blob BLOB NOT NULL
+                );
+            """)
+            self._backfill_catalog(conn.cursor())
+            conn.commit()
+
+    def _create_table(self, conn, table):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                GameID TEXT NOT NULL,
+                Season INTEGER,
+                HomeTeamID INTEGER,
+                AwayTeamID INTEGER,
+                Quarter INTEGER,
+                TimeRemainingSec INTEGER,
+                HomeScore INTEGER,
+                AwayScore INTEGER,
+                HomeWin INTEGER,
+                GameDate TEXT
+            )
+        """)
+
+    def _create_indexes(self, conn):
+        for name, keys, covered in GAME_STATES_INDEXES:
+            conn.execute(self._index_sql(name, 'GameStates', keys, covered).replace(
+                'CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1))
+
+    def open_connection(self):
+        # Pooled connections are handed between threads, one user at a time
+        return sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+
+    def _limit(self, select):
+        return f"{select} LIMIT ?"
+
+    def begin_staging(self, resume=False):
+        with self.connection() as conn:
+            if not resume:
+                conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+                conn.execute(f"DROP TABLE IF EXISTS {STAGING_BATCHES_TABLE}")
+            self._create_table(conn, STAGING_TABLE)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {STAGING_BATCHES_TABLE} (BatchID INTEGER PRIMARY KEY)")
+            conn.commit()
+
+    def swap_staging(self, manifest=None, catalog=None, blobs=None):
+        with self.connection() as conn:
+            conn.commit()
+            # One explicit transaction: the swap, the indexes and the metadata commit together
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DROP TABLE GameStates")
+            cursor.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO GameStates")
+            for name, keys, covered in GAME_STATES_INDEXES:
+                cursor.execute(self._index_sql(name, 'GameStates', keys, covered))
+            self._replace_tables(cursor, manifest, catalog, blobs)
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_BATCHES_TABLE}")
+            conn.commit()
+
+
+# --- PARQUET BACKEND ---
+def _generation(name):
+    """Publish time of a 'v<ns>' data directory name, or None for anything else."""
+    return int(name[1:]) if re.fullmatch(r'v\d+', name) else None
+
+
+class ParquetStore(GameStateStore):
+    """GameStates as a directory of Parquet part files (one file per write).
+
+    A CURRENT file names the active data directory, so a staged load or an incremental
+    upsert is published by atomically replacing that one file. The ingest manifest lives
+    in the data directory, so it always matches the data it describes.
+    """
+
+    def __init__(self, path='nba_game_states'):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def identity(self):
+        return f"parquet:{os.path.abspath(self.path)}"
+
+    def _data_dir(self, staging=False):
+        if staging:
+            return os.path.join(self.path, 'staging')
+        current = os.path.join(self.path, 'CURRENT')
+        if os.path.exists(current):
+            with open(current) as f:
+                return os.path.join(self.path, f.read().strip())
+        return self.path
+
+    def _parts(self, staging=False):
+        return sorted(glob.glob(os.path.join(self._data_dir(staging), 'part-*.parquet')))
+
+    def _read(self, columns=None, filters=None, staging=False):
+        parts = self._parts(staging)
+        if not parts:
+            return pd.DataFrame(columns=columns or GAME_STATE_COLUMNS + ['GameDate'])
+        with instrumentation.span('db.query'):
+            return pd.read_parquet(parts, columns=columns, filters=filters)
+
+    def read_game_states(self, columns=None):
+        return self._read(columns)
+
+    def read_training_counts(self, folds=None):
+        # One part file at a time, so memory is bounded by the largest part plus the running counts
+        columns = ['GameID', 'HomeScore', 'AwayScore', 'TimeRemainingSec', 'HomeWin']
+        counts = [aggregate_training_counts(pd.read_parquet(part, columns=columns), folds)
+                  for part in self._parts()]
+        return aggregate_training_counts(pd.concat(counts, ignore_index=True) if counts else None, folds)
+
+    def _read_catalog(self):
+        path = os.path.join(self._data_dir(), 'games.parquet')
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+        # Directories written before the catalog existed
+        return _catalog_records(build_catalog(
+            self._read(['GameID', 'Season', 'HomeTeamID', 'AwayTeamID', 'HomeScore', 'AwayScore'])))
+
+    def search_games(self, team_id=None, season=None, date_from=None, date_to=None, after=None, limit=50):
+        games = self._read_catalog()
+        keep = pd.Series(True, index=games.index)
+        if team_id is not None:
+            keep &= (games['HomeTeamID'] == int(team_id)) | (games['AwayTeamID'] == int(team_id))
+        if season is not None:
+            keep &= games['Season'] == int(season)
+        dates = pd.to_datetime(games['GameDate'])   # Unknown dates never match a date filter
+        if date_from is not None:
+            keep &= dates >= pd.Timestamp(date_from)
+        if date_to is not None:
+            keep &= dates <= pd.Timestamp(date_to)
+        if after is not None:
+            keep &= games['GameID'] > str(after)
+        return games[keep].sort_values('GameID').head(limit).reset_index(drop=True)
+
+    def list_seasons(self):
+        return self._read_catalog().groupby('Season', as_index=False).agg(
+            Games=('GameID', 'size'), FirstDate=('GameDate', 'min'), LastDate=('GameDate', 'max'))
+
+    def read_game(self, game_id):
+        df = self._read(REPLAY_COLUMNS, filters=[('GameID', '==', str(game_id))])
+        return df.sort_values(REPLAY_ORDER, ascending=[False, True, True, True], kind='stable').reset_index(drop=True)
+
+    def read_game_blob(self, game_id):
+        path = os.path.join(self._data_dir(), 'blobs.parquet')
+        if not os.path.exists(path):
+            return None
+        # Sorted by GameID in small row groups, so the filter only reads the one group holding the game
+        blobs = pd.read_parquet(path, filters=[('GameID', '==', str(game_id))])
+        return bytes(blobs['Blob'].iloc[0]) if len(blobs) else None
+
+    def _write_blobs(self, blobs, data_dir):
+        tmp = os.path.join(data_dir, 'blobs.parquet.tmp')
+        blobs = blobs.assign(GameID=blobs['GameID'].astype(str)).sort_values('GameID')
+        blobs[['GameID', 'Blob']].to_parquet(tmp, index=False, row_group_size=BLOB_ROW_GROUP)
+        os.replace(tmp, os.path.join(data_dir, 'blobs.parquet'))
+
+    def replace_game_blobs(self, blobs):
+        self._write_blobs(blobs, self._data_dir())
+
+    def _write_part(self, df, data_dir, batch_id=None):
+        out = df[GAME_STATE_COLUMNS].copy()
+        out['GameID'] = out['GameID'].astype(str)
+        out['GameDate'] = pd.Timestamp.now()
+        # Unique names so parallel writers never collide; written under a temp name and renamed, so a
+        # crash mid-write never leaves a truncated part that a resumed load would read as complete.
+        # A bulk-load batch id in the name is recorded by that same rename (see staged_batches).
+        batch = '' if batch_id is None else f'b{int(batch_id)}-'
+        part = os.path.join(data_dir, f'part-{batch}{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet')
+        out.to_parquet(f"{part}.tmp", index=False)
+        os.replace(f"{part}.tmp", part)
+
+    def write_game_states(self, df, staging=False, batch_id=None):
+        self._write_part(df, self._data_dir(staging), batch_id if staging else None)
+
+    def staged_batches(self):
+        names = (os.path.basename(part) for part in self._parts(staging=True))
+        return {int(m.group(1)) for m in (re.match(r'part-b(\d+)-', name) for name in names) if m}
+
+    def clear_game_states(self):
+        for part in self._parts():
+            os.remove(part)
+
+    def begin_staging(self, resume=False):
+        staging = self._data_dir(staging=True)
+        if os.path.exists(staging) and not resume:
+            shutil.rmtree(staging)
+        os.makedirs(staging, exist_ok=True)
+
+    def count_rows_by_game(self, staging=False):
+        return self._read(['GameID'], staging=staging)['GameID'].value_counts().rename('Plays')
+
+    def swap_staging(self, manifest=None, catalog=None, blobs=None):
+        # Metadata goes into the staging directory first, so it is published with the data it describes
+        staging = self._data_dir(staging=True)
+        if manifest is not None:
+            self._write_manifest(manifest, staging)
+        if catalog is not None:
+            self._write_catalog(catalog, staging)
+        if blobs is not None:
+            self._write_blobs(blobs, staging)
+        version = f'v{time.time_ns()}'
+        os.rename(staging, os.path.join(self.path, version))
+        self._publish(version)
+
+    def _publish(self, version):
+        """Point CURRENT at a new data directory. The one it replaces is kept until the next publish,
+        so readers that already resolved it can finish; older generations are dropped."""
+        previous = self._data_dir()
+        tmp = os.path.join(self.path, f'CURRENT.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+        with open(tmp, 'w') as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(self.path, 'CURRENT'))
+
+        if os.path.abspath(previous) == os.path.abspath(self.path):
+            return   # First publish over the legacy layout: its root part files are the previous generation
+        # Part files of the legacy layout live directly in the root
+        for part in glob.glob(os.path.join(self.path, 'part-*.parquet')):
+            os.remove(part)
+        kept = _generation(os.path.basename(previous))
+        for data_dir in glob.glob(os.path.join(self.path, 'v*')):
+            generation = _generation(os.path.basename(data_dir))
+            if generation is not None and generation < kept:
+                shutil.rmtree(data_dir, ignore_errors=True)
+
+    def read_manifest(self):
+        path = os.path.join(self._data_dir(), 'manifest.parquet')
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=MANIFEST_COLUMNS)
+        return pd.read_parquet(path)
+
+    def _write_manifest(self, manifest, data_dir):
+        tmp = os.path.join(data_dir, 'manifest.parquet.tmp')
+        manifest[MANIFEST_COLUMNS].assign(GameID=manifest['GameID'].astype(str)).to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(data_dir, 'manifest.parquet'))
+
+    def replace_manifest(self, manifest):
+        self._write_manifest(manifest, self._data_dir())
+
+    def _write_catalog(self, catalog, data_dir):
+        tmp = os.path.join(data_dir, 'games.parquet.tmp')
+        _catalog_records(catalog).to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(data_dir, 'games.parquet'))
+
+    def replace_catalog(self, catalog):
+        self._write_catalog(catalog, self._data_dir())
+
+    def upsert_games(self, df, manifest):
+        """Build the next data directory (hard-linking untouched parts) and publish it."""
+        changed = set(manifest['GameID'].astype(str))
+        version = f'v{time.time_ns()}'
+        new_dir = os.path.join(self.path, version)
+        os.makedirs(new_dir)
+
+        for part in self._parts():
+            target = os.path.join(new_dir, os.path.basename(part))
+            ids = pd.read_parquet(part, columns=['GameID'])['GameID']
+            if not ids.isin(changed).any():
+                try:
+                    os.link(part, target)
+                except OSError:
+                    shutil.copy2(part, target)
+                continue
+            kept = pd.read_parquet(part)
+            kept = kept[~kept['GameID'].isin(changed)]
+            if len(kept):
+                kept.to_parquet(target, index=False)
+
+        self._write_part(df, new_dir)
+
+        old = self.read_manifest()
+        old = old[~old['GameID'].astype(str).isin(changed)]
+        self._write_manifest(pd.concat([old, manifest[MANIFEST_COLUMNS]], ignore_index=True), new_dir)
+        games = self._read_catalog()
+        games = games[~games['GameID'].astype(str).isin(changed)]
+        self._write_catalog(pd.concat([_catalog_records(games), _catalog_records(build_catalog(df))],
+                                      ignore_index=True), new_dir)
+        blobs_path = os.path.join(self._data_dir(), 'blobs.parquet')
+        blobs = pd.read_parquet(blobs_path) if os.path.exists(blobs_path) else None
+        if blobs is not None:
+            blobs = blobs[~blobs['GameID'].isin(changed)]
+        self._write_blobs(pd.concat([blobs, game_blobs.encode_games(df)], ignore_index=True), new_dir)
+        self._publish(version)
+
+    # Materialized output: one curve file and one stats file per game under win_probability/<model>/
+    def _win_dir(self, model_version, kind):
+        return os.path.join(self.path, 'win_probability', str(model_version), kind)
+
+    def write_win_probabilities(self, curves, stats):
+        curves = curves.assign(GameID=curves['GameID'].astype(str))
+        stats = stats.assign(GameID=stats['GameID'].astype(str), ScoredAt=pd.Timestamp.now())
+        for (game_id, model_version), game_stats in stats.groupby(['GameID', 'ModelVersion'], sort=False):
+            game_curve = curves[(curves['GameID'] == game_id) & (curves['ModelVersion'] == model_version)]
+            # Curve first, stats last: a stats file marks the game as completely scored
+            for kind, frame in (('curves', game_curve[WIN_CURVE_COLUMNS]), ('stats', game_stats)):
+                out_dir = self._win_dir(model_version, kind)
+                os.makedirs(out_dir, exist_ok=True)
+                tmp = os.path.join(out_dir, f'{game_id}.parquet.tmp')
+                frame.to_parquet(tmp, index=False)
+                os.replace(tmp, os.path.join(out_dir, f'{game_id}.parquet'))
+
+    def read_win_stats(self, model_version):
+        files = glob.glob(os.path.join(self._win_dir(model_version, 'stats'), '*.parquet'))
+        if not files:
+            return pd.DataFrame(columns=WIN_STATS_COLUMNS)
+        return pd.read_parquet(files)[WIN_STATS_COLUMNS]
+
+    def read_win_curve(self, game_id, model_version, source_version=None):
+        stats_path = os.path.join(self._win_dir(model_version, 'stats'), f'{game_id}.parquet')
+        curve_path = os.path.join(self._win_dir(model_version, 'curves'), f'{game_id}.parquet')
+        columns = ['Play', 'TimeRemainingSec', 'HomeScore', 'AwayScore', 'Probability']
+        if not os.path.exists(stats_path) or (
+                source_version and int(pd.read_parquet(stats_path)['SourceVersion'].iloc[0]) != int(source_version)):
+            return pd.DataFrame(columns=columns)
+        return pd.read_parquet(curve_path, columns=columns).sort_values('Play').reset_index(drop=True)
+
+    def read_dramatic_games(self, model_version, limit=20):
+        return self.read_win_stats(model_version).sort_values('MinWinnerProb').head(limit).reset_index(drop=True)
+
+
+def aggregate_training_counts(df, folds=None):
+    """Collapse plays (or partial counts) into unique TRAINING_COLUMNS rows with a summed Plays column."""
+    keys = TRAINING_COLUMNS + (['Fold'] if folds else [])
+    if df is None or not len(df):
+        return pd.DataFrame({c: pd.Series(dtype='int64') for c in keys + ['Plays']})
+    df = df.copy()
+    if 'ScoreMargin' not in df:
+        df['ScoreMargin'] = df['HomeScore'] - df['AwayScore']
+    if folds and 'Fold' not in df:
+        df['Fold'] = pd.to_numeric(df['GameID']).astype('int64') % folds
+    if 'Plays' not in df:
+        df['Plays'] = 1
+    df = df[keys + ['Plays']].astype('int64')
+    return df.groupby(keys, as_index=False, sort=True)['Plays'].sum()
+
+
+def build_catalog(df):
+    """One GAMES_COLUMNS row per game of a GameStates frame (scores only rise, so the max is the final).
+
+    GameDate comes from the frame's GameDate column when the source provided real dates.
+    """
+    if df is None or not len(df):
+        return pd.DataFrame(columns=GAMES_COLUMNS)
+    df = df.assign(GameID=df['GameID'].astype(str))
+    games = df.groupby('GameID', as_index=False, sort=True).agg(
+        Season=('Season', 'max'),
+        HomeTeamID=('HomeTeamID', 'max'),
+        AwayTeamID=('AwayTeamID', 'max'),
+        HomeFinal=('HomeScore', 'max'),
+        AwayFinal=('AwayScore', 'max'),
+        Plays=('Season', 'size'),
+    )
+    games['GameDate'] = (df.groupby('GameID', sort=True)['GameDate'].max().to_numpy()
+                         if 'GameDate' in df else None)
+    return games[GAMES_COLUMNS]
+
+
+def _catalog_records(catalog):
+    """Catalog rows with ISO date strings and None for unknown dates, as every backend stores them."""
+    dates = pd.to_datetime(catalog['GameDate'], errors='coerce')
+    return catalog[GAMES_COLUMNS].assign(
+        GameID=catalog['GameID'].astype(str),
+        GameDate=dates.dt.strftime('%Y-%m-%d').astype(object).where(dates.notna(), None),
+    )
+
+
+def open_store(backend='azure', path=None, **azure_config):
+    """Build a store for 'azure', 'sqlite' or 'parquet'. Azure takes server/database/username/password."""
+    if backend == 'azure':
+        return AzureSQLStore(**azure_config)
+    if backend == 'sqlite':
+        return SQLiteStore(path or 'nba_game_states.db')
+    if backend == 'parquet':
+        return ParquetStore(path or 'nba_game_states')
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -1,11 +1,19 @@
-import pyodbc
+import os
+import json
+import time
+import argparse
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split, GroupKFold, ParameterGrid
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, log_loss
+from sklearn.metrics import accuracy_score, log_loss, brier_score_loss
+from sklearn.base import clone
 import joblib
+import sklearn
+import storage
+import model_artifact
+import instrumentation
 
 # --- CONFIGURATION ---
 # Database configuration for model training
@@ -14,52 +22,70 @@ DATABASE = 'UPDATE-INFO-HERE'
 USERNAME = 'UPDATE-INFO-HERE'
 PASSWORD = 'UPDATE-INFO-HERE'
 DRIVER = '{ODBC Driver 18 for SQL Server}'
+STORAGE_BACKEND = os.environ.get('NBA_STORAGE_BACKEND', 'azure')   # 'azure', 'sqlite' or 'parquet'
+LOCAL_STORE_PATH = os.environ.get('NBA_LOCAL_STORE')              # File/directory for local backends
+MODEL_PATH = model_artifact.ARTIFACT_PATH   # Pickle-free artifact directory loaded by the app
 
+# --- MODEL SELECTION ---
+CV_FOLDS = 5                  # GroupKFold splits; every game sits in exactly one fold
+N_JOBS = -1                   # Parallel (candidate, fold) fits; -1 uses every core
+MAX_LATENCY_MS = 5.0          # Per-row predict_proba budget of the exported artifact: the dashboard scores on every tick
+LATENCY_CALLS = 200           # Single-row calls timed per candidate
+RESULTS_PATH = 'model_selection_results.csv'
+# Estimator -> parameter grid; override with --grid grid.json using the same shape
+CANDIDATE_GRID = {
+    'RandomForest': {'n_estimators': [50, 100], 'max_depth': [8, 16, None], 'min_samples_leaf': [1, 20]},
+    'LogisticRegression': {'C': [0.01, 0.1, 1.0], 'solver': ['liblinear']},
+    'GradientBoosting': {'n_estimators': [100, 200], 'max_depth': [2, 3], 'learning_rate': [0.1]},
+}
+ESTIMATORS = {
+    'RandomForest': lambda: RandomForestClassifier(random_state=42),
+    'LogisticRegression': lambda: LogisticRegression(),
+    'GradientBoosting': lambda: GradientBoostingClassifier(random_state=42),
+}
+FEATURES = ['ScoreMargin', 'TimeRemainingSec']
 
-def get_db_connection():
-    """Establish connection to Azure SQL Database."""
-    conn_str = (
-        f'DRIVER={DRIVER};SERVER={SERVER},1433;DATABASE={DATABASE};'
-        f'UID={USERNAME};PWD={PASSWORD};'
-        'Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30;'
-    )
-    return pyodbc.connect(conn_str)
 
+def get_store():
+    """Open the GameStates store (Azure SQL unless a local backend is configured)."""
+    return storage.open_store(
+        STORAGE_BACKEND, path=LOCAL_STORE_PATH,
+        server=SERVER, database=DATABASE, username=USERNAME, password=PASSWORD,
+        driver='pyodbc', odbc_driver=DRIVER
+    )
 
-def train_and_compare():
-    print("Fetching clean data from Azure SQL...")
-    conn = get_db_connection()
-    # Fetch required columns to calculate margin
-    query = """
-        SELECT HomeScore, AwayScore, TimeRemainingSec, HomeWin 
-        FROM GameStates
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
 
-    print(f"Loaded {len(df)} rows.")
+def split_counts(counts, test_size=0.2, random_state=42):
+    """Train/test split of aggregated plays: each count is split binomially, like a random per-play split."""
+    rng = np.random.default_rng(random_state)
+    test_plays = rng.binomial(counts['Plays'].to_numpy(), test_size)
+    train = counts.assign(Plays=counts['Plays'] - test_plays)
+    test = counts.assign(Plays=test_plays)
+    return train[train['Plays'] > 0], test[test['Plays'] > 0]
 
-    # Feature Engineering
-    df['ScoreMargin'] = df['HomeScore'] - df['AwayScore']
 
-    # Define Features (X) and Target (y)
-    X = df[['ScoreMargin', 'TimeRemainingSec']]
-    y = df['HomeWin']
+def expand_counts(counts):
+    """Back to one row per play (used to check the weighted fit against the unaggregated one)."""
+    return counts.loc[counts.index.repeat(counts['Plays']), ['ScoreMargin', 'TimeRemainingSec', 'HomeWin']]
 
-    # Split Data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-    # --- MODEL 1: RANDOM FOREST ---
+def fit_models(X, y, sample_weight=None):
+    """Fit the two candidate models; weights let one row stand in for many identical plays."""
     print("\nTraining Random Forest...")
     rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
-    rf_model.fit(X_train, y_train)
+    with instrumentation.span('train.fit', model='RF'):
+        rf_model.fit(X, y, sample_weight=sample_weight)
 
-    # --- MODEL 2: LOGISTIC REGRESSION ---
     print("Training Logistic Regression...")
     # C=0.1 helps prevent overfitting, solver='liblinear' is efficient for this dataset size
     lr_model = LogisticRegression(C=0.1, solver='liblinear')
-    lr_model.fit(X_train, y_train)
+    with instrumentation.span('train.fit', model='LR'):
+        lr_model.fit(X, y, sample_weight=sample_weight)
+    return rf_model, lr_model
 
+
+def report(rf_model, lr_model, X_test, y_test, sample_weight=None):
+    """Print the showdown scenario and weighted test-set metrics; returns the metrics."""
     # --- THE SHOWDOWN: UP 20 with 2 MINS LEFT ---
     print("\nTHE SHOWDOWN: Home Team Up 20 with 2:00 left")
     test_scenario = pd.DataFrame({'ScoreMargin': [20], 'TimeRemainingSec': [120]})
@@ -71,15 +97,216 @@ def train_and_compare():
     print(f"   Logistic Regression says: {lr_prob:.4%} win chance")
 
     # --- METRICS ---
+    metrics = {}
     print("\nAccuracy Check (Test Set):")
-    print(f"   RF Accuracy: {accuracy_score(y_test, rf_model.predict(X_test)):.4f}")
-    print(f"   LR Accuracy: {accuracy_score(y_test, lr_model.predict(X_test)):.4f}")
+    for name, m in [('RF', rf_model), ('LR', lr_model)]:
+        metrics[f'{name} Accuracy'] = accuracy_score(y_test, m.predict(X_test), sample_weight=sample_weight)
+        metrics[f'{name} Log Loss'] = log_loss(y_test, m.predict_proba(X_test), sample_weight=sample_weight,
+                                               labels=[0, 1])
+        print(f"   {name} Accuracy: {metrics[f'{name} Accuracy']:.4f}   "
+              f"Log Loss: {metrics[f'{name} Log Loss']:.4f}")
+    return metrics
+
+
+def save_model(model, **metadata):
+    """Export the model as a compact artifact, checked for parity and speed against the fitted estimator."""
+    metadata.update({
+        'params': {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+        'sklearn_version': sklearn.__version__,
+        'storage_backend': STORAGE_BACKEND,
+    })
+    with instrumentation.span('train.export'):
+        max_err, slowdown = model_artifact.export_checked(model, MODEL_PATH, metadata)
+    print(f"   Parity vs sklearn: max abs error {max_err:.2e}, batch predict {slowdown:.2f}x sklearn's time")
+
+
+def expand_grid(grid):
+    """(name, estimator) for every parameter combination in the grid."""
+    candidates = []
+    for kind, params in grid.items():
+        for combo in ParameterGrid(params):
+            label = ', '.join(f"{k}={v}" for k, v in sorted(combo.items()))
+            candidates.append((f"{kind}({label})", ESTIMATORS[kind]().set_params(**combo)))
+    return candidates
+
+
+def fit_fold(estimator, X, y, w, train_idx, test_idx, keep_model=False):
+    """Fit one candidate on the training folds and score it on the held-out games.
+
+    The fitted model is returned (as scores['model']) only with keep_model=True, so the other
+    folds do not ship their forests back from the worker processes.
+    """
+    # Plain arrays cross the process boundary (joblib memory-maps them); names are restored here
+    X_train = pd.DataFrame(X[train_idx], columns=FEATURES)
+    X_test = pd.DataFrame(X[test_idx], columns=FEATURES)
+    model = clone(estimator)
+    start = time.perf_counter()
+    model.fit(X_train, y[train_idx], sample_weight=w[train_idx])
+    fit_time = time.perf_counter() - start
+
+    prob = model.predict_proba(X_test)[:, 1]
+    scores = {
+        'log_loss': log_loss(y[test_idx], prob, sample_weight=w[test_idx], labels=[0, 1]),
+        'brier': brier_score_loss(y[test_idx], prob, sample_weight=w[test_idx]),
+        'fit_time': fit_time,
+    }
+    if keep_model:
+        scores['model'] = model
+    return scores
+
+
+def row_latency_ms(model, calls=LATENCY_CALLS):
+    """Median wall time of a single-row predict_proba, the way the dashboard calls the model.
+
+    Pass the model_artifact predictor, not the sklearn estimator: that is what the app serves.
+    """
+    row = pd.DataFrame({'ScoreMargin': [5], 'TimeRemainingSec': [600]})
+    model.predict_proba(row)   # Warm-up
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def select_model(grid=None, folds=CV_FOLDS, n_jobs=N_JOBS, max_latency_ms=MAX_LATENCY_MS):
+    """Cross-validate every candidate by game, in parallel, and export the best one.
+
+    The winner has the lowest mean log loss among candidates whose single-row latency, timed on
+    the exported artifact predictor, fits max_latency_ms; it is refit on all games and saved to MODEL_PATH.
+    """
+    store = get_store()
+    print(f"Fetching game-grouped training counts from {STORAGE_BACKEND}...")
+    with instrumentation.span('train.read'):
+        counts = store.read_training_counts(folds=folds).reset_index(drop=True)
+    print(f"Loaded {len(counts)} unique states covering {int(counts['Plays'].sum())} plays.")
+
+    candidates = expand_grid(grid or CANDIDATE_GRID)
+    splits = list(GroupKFold(n_splits=folds).split(counts, groups=counts['Fold']))
+    print(f"Cross-validating {len(candidates)} candidates x {folds} folds (n_jobs={n_jobs})...")
+
+    X = counts[FEATURES].to_numpy()
+    y = counts['HomeWin'].to_numpy()
+    w = counts['Plays'].to_numpy()
+    with instrumentation.span('train.cross_validate'):
+        fits = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(fit_fold)(estimator, X, y, w, train_idx, test_idx, keep_model=fold == 0)
+            for _, estimator in candidates
+            for fold, (train_idx, test_idx) in enumerate(splits)
+        )
+
+    # Latency is timed serially here so parallel fits do not skew it
+    rows = []
+    for i, (name, _) in enumerate(candidates):
+        scores = fits[i * folds:(i + 1) * folds]
+        # Folds ran in worker processes, so their fit times are recorded here
+        for s in scores:
+            instrumentation.observe('train.fit', s['fit_time'], model=name.split('(')[0])
+        rows.append({
+            'Candidate': name,
+            'LogLoss': np.mean([s['log_loss'] for s in scores]),
+            'LogLossStd': np.std([s['log_loss'] for s in scores]),
+            'Brier': np.mean([s['brier'] for s in scores]),
+            'FitSeconds': np.mean([s['fit_time'] for s in scores]),
+            'LatencyMs': row_latency_ms(model_artifact.to_predictor(scores[0]['model'])),
+        })
+    results = pd.DataFrame(rows).sort_values('LogLoss').reset_index(drop=True)
+    results['WithinBudget'] = results['LatencyMs'] <= max_latency_ms
+    results.to_csv(RESULTS_PATH, index=False)
+
+    print("\nCross-validated results (mean over held-out games):")
+    print(results.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    eligible = results[results['WithinBudget']]
+    if eligible.empty:
+        print(f"\nNo candidate predicts within {max_latency_ms} ms; picking the fastest instead.")
+        eligible = results.sort_values('LatencyMs')
+    best_name = eligible.iloc[0]['Candidate']
+    best = dict(candidates)[best_name]
+
+    print(f"\nBest: {best_name}. Refitting on all games and saving to '{MODEL_PATH}/'...")
+    best.fit(counts[FEATURES], counts['HomeWin'], sample_weight=counts['Plays'])
+    best_row = eligible.iloc[0]
+    save_model(best, candidate=best_name, plays=int(counts['Plays'].sum()), folds=folds,
+               cv_log_loss=float(best_row['LogLoss']), cv_brier=float(best_row['Brier']),
+               latency_ms=float(best_row['LatencyMs']))
+    print(f"Done. Full results in '{RESULTS_PATH}'.")
+    return results
+
+
+def train_and_compare(aggregate=True, verify=False):
+    store = get_store()
+    print(f"Fetching clean data from {STORAGE_BACKEND}...")
+    if aggregate:
+        # Unique (margin, seconds, win) tuples with play counts, grouped where the data lives
+        with instrumentation.span('train.read'):
+            counts = store.read_training_counts()
+        print(f"Loaded {len(counts)} unique states covering {int(counts['Plays'].sum())} plays.")
+        train, test = split_counts(counts)
+        features = FEATURES
+        rf_model, lr_model = fit_models(train[features], train['HomeWin'], sample_weight=train['Plays'])
+        metrics = report(rf_model, lr_model, test[features], test['HomeWin'], sample_weight=test['Plays'])
+
+        if verify:
+            # Same split, one row per play, no weights: the metrics should agree
+            print("\nVerifying against the unaggregated fit...")
+            train_raw, test_raw = expand_counts(train), expand_counts(test)
+            raw_models = fit_models(train_raw[features], train_raw['HomeWin'])
+            raw_metrics = report(*raw_models, test_raw[features], test_raw['HomeWin'])
+            print("\nWeighted vs unaggregated:")
+            for key, value in metrics.items():
+                print(f"   {key}: {value:.4f} vs {raw_metrics[key]:.4f} (diff {value - raw_metrics[key]:+.4f})")
+    else:
+        # Fetch required columns to calculate margin
+        with instrumentation.span('train.read'):
+            df = store.read_game_states(['HomeScore', 'AwayScore', 'TimeRemainingSec', 'HomeWin'])
+        print(f"Loaded {len(df)} rows.")
+
+        # Feature Engineering
+        df['ScoreMargin'] = df['HomeScore'] - df['AwayScore']
+
+        # Define Features (X) and Target (y)
+        X = df[['ScoreMargin', 'TimeRemainingSec']]
+        y = df['HomeWin'].astype(int)
+
+        # Split Data
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        rf_model, lr_model = fit_models(X_train, y_train)
+        metrics = report(rf_model, lr_model, X_test, y_test)
 
     # --- SAVING MODEL ---
-    print("\nSaving Logistic Regression Model to 'nba_win_probability_model.pkl'...")
-    joblib.dump(lr_model, 'nba_win_probability_model.pkl')
-    print("Done. Deploy this file to Streamlit Cloud to see the update.")
+    print(f"\nSaving Logistic Regression Model to '{MODEL_PATH}/'...")
+    save_model(lr_model, aggregated=aggregate,
+               test_accuracy=float(metrics['LR Accuracy']), test_log_loss=float(metrics['LR Log Loss']))
+    print("Done. Deploy this directory to Streamlit Cloud to see the update.")
 
 
 if __name__ == "__main__":
-    train_and_compare()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train and compare the win probability models")
+    parser.add_argument('--raw', action='store_true',
+                        help="Train on one row per play instead of aggregated, weighted states")
+    parser.add_argument('--verify', action='store_true',
+                        help="Also fit on the expanded plays and compare metrics with the weighted fit")
+    parser.add_argument('--select', action='store_true',
+                        help="Run the game-grouped cross-validation harness and export the best model")
+    parser.add_argument('--grid', help="JSON file mapping estimator name to a parameter grid")
+    parser.add_argument('--folds', type=int, default=CV_FOLDS, help="GroupKFold splits for --select")
+    parser.add_argument('--jobs', type=int, default=N_JOBS, help="Parallel fits for --select (-1 = all cores)")
+    parser.add_argument('--max-latency-ms', type=float, default=MAX_LATENCY_MS,
+                        help="Per-row inference budget a selected model must meet")
+    parser.add_argument('--metrics', help="Write timings to this file (*.prom: Prometheus text, else JSON lines)")
+    args = parser.parse_args()
+
+    if args.select:
+        grid = None
+        if args.grid:
+            with open(args.grid) as f:
+                grid = json.load(f)
+        select_model(grid, folds=args.folds, n_jobs=args.jobs, max_latency_ms=args.max_latency_ms)
+    else:
+        train_and_compare(aggregate=not args.raw, verify=args.verify)
+
+    if args.metrics:
+        instrumentation.export(args.metrics)
+        print(f"Metrics written to '{args.metrics}'.")
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import uuid
+import hashlib
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+LEGACY_MODEL_PATH = 'nba_win_probability_model.pkl'   # Versioned by file hash when the app falls back to it
+SURFACE_PATH = 'nba_win_probability_surface.npy'     # Plus '<path>.version': the model version it was built from
+MAX_MARGIN = 80        # Margins beyond +/-80 are clamped to the edge of the grid
+MAX_SECONDS = 2880     # Regulation length; overtime rows already count down from 300
+
+
+def _write_atomic(path, mode, write):
+    """Write `path` through a temp file unique to this writer, so concurrent builds never share one."""
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_surface(model, max_margin=MAX_MARGIN, max_seconds=MAX_SECONDS, dtype=np.float32):
+    """Evaluate the model once over the full margin x seconds grid.
+
+    Row i holds margin (i - max_margin), column j holds j seconds remaining.
+    """
+    margins = np.arange(-max_margin, max_margin + 1)
+    seconds = np.arange(0, max_seconds + 1)
+    mm, ss = np.meshgrid(margins, seconds, indexing='ij')
+    grid = pd.DataFrame({'ScoreMargin': mm.ravel(), 'TimeRemainingSec': ss.ravel()})
+    probs = model.predict_proba(grid)[:, 1]
+    return probs.reshape(mm.shape).astype(dtype)
+
+
+class WinProbabilitySurface:
+    """Precomputed home win probabilities answered by direct array indexing."""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.max_margin = (grid.shape[0] - 1) // 2
+        self.max_seconds = grid.shape[1] - 1
+
+    @classmethod
+    def load(cls, path=SURFACE_PATH):
+        """Memory-map a saved surface so replicas share the pages instead of copying them."""
+        return cls(np.load(path, mmap_mode='r'))
+
+    def save(self, path=SURFACE_PATH, version=None):
+        """Write the surface atomically so readers never see a half-written file, then record the
+        model version it was built from (written second: a crash in between only forces a rebuild)."""
+        _write_atomic(path, 'wb', lambda f: np.save(f, np.asarray(self.grid)))
+        if version is not None:
+            _write_atomic(f"{path}.version", 'w', lambda f: f.write(version))
+
+    def lookup(self, margin, seconds):
+        """Home win probability for scalar or array inputs, clamped to the grid."""
+        m = np.clip(np.rint(margin).astype(int) + self.max_margin, 0, 2 * self.max_margin)
+        s = np.clip(np.rint(seconds).astype(int), 0, self.max_seconds)
+        return self.grid[m, s].astype(np.float64)
+
+    def predict_proba(self, X):
+        """Drop-in replacement for the sklearn call: returns [[P(away), P(home)], ...]."""
+        p_home = self.lookup(np.asarray(X['ScoreMargin']), np.asarray(X['TimeRemainingSec']))
+        return np.column_stack([1 - p_home, p_home])
+
+
+def model_version(model, pickle_path=LEGACY_MODEL_PATH):
+    """Content id of `model`: the artifact's version, or the hash of the legacy pickle it was loaded from.
+
+    Unlike file mtimes, both survive git checkouts and container copies.
+    """
+    version = getattr(model, 'version', None)
+    if version is None and os.path.exists(pickle_path):
+        digest = hashlib.sha256()
+        with open(pickle_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        version = f"pkl-{digest.hexdigest()[:12]}"
+    return version
+
+
+def surface_version(path=SURFACE_PATH):
+    """Model version the saved surface was built from, or None if unknown."""
+    try:
+        with open(f"{path}.version") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def load_or_build_surface(model, version=None, path=SURFACE_PATH):
+    """Reuse the surface on disk if it was built from the same model version, otherwise rebuild and save it.
+
+    `version` defaults to model_version(model); a model without one is rebuilt on every call.
+    """
+    version = version or model_version(model)
+    if version is not None and os.path.exists(path) and surface_version(path) == version:
+        return WinProbabilitySurface.load(path)
+
+    surface = WinProbabilitySurface(build_surface(model))
+    try:
+        surface.save(path, version)
+        return WinProbabilitySurface.load(path)
+    except OSError:
+        # Read-only filesystem: keep serving from memory
+        return surface
+
+
+def check_parity(model, surface, n_samples=100000, seed=42):
+    """Compare the surface against the model on random in-range states. Returns the max abs error."""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'ScoreMargin': rng.integers(-surface.max_margin, surface.max_margin + 1, n_samples),
+        'TimeRemainingSec': rng.integers(0, surface.max_seconds + 1, n_samples),
+    })
+    expected = model.predict_proba(X)[:, 1]
+    actual = surface.predict_proba(X)[:, 1]
+    return float(np.max(np.abs(expected - actual)))
+
+
+def benchmark(predictor, n_calls=2000, batch_size=1000, seed=42):
+    """Mean latency (microseconds) for single-row calls and per row of a batched call."""
+    rng = np.random.default_rng(seed)
+    single = pd.DataFrame({'ScoreMargin': [5], 'TimeRemainingSec': [600]})
+    batch = pd.DataFrame({
+        'ScoreMargin': rng.integers(-30, 31, batch_size),
+        'TimeRemainingSec': rng.integers(0, MAX_SECONDS + 1, batch_size),
+    })
+
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        predictor.predict_proba(single)
+    single_us = (time.perf_counter() - start) / n_calls * 1e6
+
+    start = time.perf_counter()
+    for _ in range(10):
+        predictor.predict_proba(batch)
+    batch_us = (time.perf_counter() - start) / (10 * batch_size) * 1e6
+
+    return single_us, batch_us
+
+
+if __name__ == "__main__":
+    import model_artifact
+
+    # An artifact directory (what the app serves) or a sklearn .pkl (checks the surface against sklearn itself)
+    model_path = sys.argv[1] if len(sys.argv) > 1 else model_artifact.ARTIFACT_PATH
+    print(f"Loading model from '{model_path}'...")
+    if model_path.endswith('.pkl'):
+        import joblib
+        model, label = joblib.load(model_path), "sklearn model"
+        version = model_version(model, model_path)
+    else:
+        model, label = model_artifact.load_model(model_path), "model artifact"
+        version = model.version
+
+    print("Building lookup surface...")
+    start = time.perf_counter()
+    surface = WinProbabilitySurface(build_surface(model))
+    print(f"   Built {surface.grid.shape} grid in {time.perf_counter() - start:.2f}s "
+          f"({surface.grid.nbytes / 1e6:.1f} MB)")
+    surface.save(SURFACE_PATH, version)
+
+    print(f"\nParity Check vs the {label} (100,000 random states):")
+    max_err = check_parity(model, surface)
+    print(f"   Max abs error: {max_err:.2e}")
+    if label == "model artifact":
+        print("   (The artifact itself is checked against sklearn on export; pass a .pkl to compare with sklearn directly.)")
+
+    print("\nLatency (mean per row):")
+    for name, predictor in [("model", model), ("lookup", WinProbabilitySurface.load(SURFACE_PATH))]:
+        single_us, batch_us = benchmark(predictor)
+        print(f"   {name:<8} single-row: {single_us:9.1f} us   batched: {batch_us:7.3f} us")